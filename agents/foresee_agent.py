@@ -1,37 +1,124 @@
-from typing import Optional, List,Dict, Any
+from typing import Optional, List,Dict, Any, Tuple
+import asyncio
+import logging
 import uuid
 
 from google.adk.agents import LlmAgent
 from google.adk.tools.tool_context import ToolContext
 
-def get_retrieved_papers(tool_context: ToolContext) -> List[Dict[str, Any]]:
+from agents.paper_tools import get_paper_details, list_papers, read_paper_section
+from core import config
+from core.foresee_payload import build_foresee_payload
+from core.fulltext import section_titles
+from core.paper_store import LazyPapers, load_session_papers
+from core.result_pages import result_handle, short_id
+from core.trend_analysis import analysis_available, analyze_papers
+
+
+logger = logging.getLogger(__name__)
+
+# Entry ids of the papers the last `get_retrieved_papers` payload covered: all
+# of them for a landscape, only the included ones for a list of abstracts.
+COVERED_IDS_KEY = "foresee_covered_ids"
+
+
+def uses_preanalysis(total_papers: int) -> bool:
+    """Whether `get_retrieved_papers` sends a cluster / trend landscape for this many papers."""
+    return (
+        config.FORESEE_PREANALYSIS
+        and total_papers >= config.FORESEE_PREANALYSIS_MIN_PAPERS
+        and analysis_available()
+    )
+
+
+def _add_section_titles(records: List[Dict[str, Any]], entry_ids: Dict[str, str]) -> None:
+    """Give every record (by short id, see `entry_ids`) whose full text was ingested its section titles."""
+    for record in records:
+        titles = section_titles(entry_ids[record["id"]])
+        if titles:
+            record["sections"] = titles
+
+
+def _foresee_input(papers: LazyPapers) -> Tuple[Dict[str, Any], List[str]]:
+    if uses_preanalysis(len(papers)):
+        landscape = analyze_papers(
+            papers,
+            max_clusters=config.FORESEE_MAX_CLUSTERS,
+            recent_years=config.TREND_RECENT_YEARS,
+        )
+        landscape["handle"] = result_handle(papers.entry_ids)
+        if config.FULLTEXT_ENABLED:
+            entry_ids = {short_id(entry_id): entry_id for entry_id in papers.entry_ids}
+            for cluster in landscape["clusters"]:
+                _add_section_titles(cluster["representative_papers"], entry_ids)
+        logger.info(
+            "get_retrieved_papers: got %d papers, sending %d clusters and %d rising terms",
+            len(papers), len(landscape["clusters"]), len(landscape["rising_terms"]),
+            extra={"papers": len(papers), "clusters": len(landscape["clusters"])},
+        )
+        return landscape, list(papers.entry_ids)
+
+    top_k = config.FORESEE_TOP_K
+    # Only load the head of the ranking; the spare half makes up for dropped near-duplicates.
+    head = papers[:top_k * 2] if top_k else list(papers)
+    payload = build_foresee_payload(
+        head,
+        token_budget=config.FORESEE_TOKEN_BUDGET,
+        top_k=top_k or None,
+    )
+    payload["total"] = len(papers)
+    payload["handle"] = result_handle(papers.entry_ids)
+    entry_ids = {short_id(paper.entry_id): paper.entry_id for paper in head}
+    if config.FULLTEXT_ENABLED:
+        _add_section_titles(payload["papers"], entry_ids)
+    logger.info(
+        "get_retrieved_papers: got %d papers, sending %d (~%d tokens)",
+        len(papers), payload["included"], payload["estimated_tokens"],
+        extra={"papers": len(papers), "included": payload["included"], "estimated_tokens": payload["estimated_tokens"]},
+    )
+    return payload, [entry_ids[record["id"]] for record in payload["papers"]]
+
+
+async def get_retrieved_papers(tool_context: ToolContext) -> Dict[str, Any]:
     """ Read retrieved paper with the tool `retrieve_papers` from session state. 
 
-        Expects `retrieval_agent.retrieval_papers` to have stored a list of paper dicts under `state["retrieved_papers"]`.
+        Expects `retrieval_agent.retrieval_papers` to have stored the paper ids under `state["retrieved_paper_ids"]`,
+        in relevance order; the papers themselves are loaded lazily from the paper store. Near-duplicate papers are dropped and the rest are compacted and
+        cut off at FORESEE_TOKEN_BUDGET, so the payload fits the model context.
         Returns:
             {
                 "status": "success",
+                "handle": <str>,
                 "total": <int>,
-                "abstract": [<str>, ...],
-                "papers": [<paper_dict>, ...],
+                "included": <int>,
+                "dropped_duplicates": <int>,
+                "omitted": <int>,
+                "estimated_tokens": <int>,
+                "papers": [{"id", "title", "year", "authors", "abstract", "sections"?}, ...],
+            }
+
+        For large sets (FORESEE_PREANALYSIS_MIN_PAPERS or more, with NumPy/SciPy
+        installed) the abstracts are replaced by a fixed-size landscape of the
+        whole set instead:
+            {
+                "status": "success",
+                "handle": <str>,
+                "total": <int>,
+                "clusters": [{"label", "top_terms", "size", "share", "years",
+                              "representative_papers": [{"id", "title", "year"}, ...]}, ...],
+                "rising_terms": [{"term", "recent_share", "earlier_share"}, ...],
+                "papers_per_year": {"<year>": <int>, ...},
             }
-            
-    """
 
-    abstracts: List[str] = []
-    papers = tool_context.state.get("retrieved_papers") or []
-    for paper in papers:
-        abstract = paper.get("abstract") or ""
-        
-        if abstract:
-            abstracts.append(abstract)
-    print(f"[foresee_agent.get_retrieved_papers] got {len(papers)} papers")
-    return {
-        "status": "success",
-        "total": len(papers),
-        "abstracts": abstracts,
-        "papers": papers
-        }
+        With FULLTEXT_ENABLED, papers whose PDF was ingested carry their `sections` titles,
+        readable with `read_paper_section`. Either way the payload size is bounded; the remaining papers can be read through
+        `handle` with the `list_papers` and `get_paper_details` tools.
+    """
+    papers = load_session_papers(tool_context.state)
+    # Loading and clustering thousands of papers must not block the event loop.
+    payload, covered = await asyncio.to_thread(_foresee_input, papers)
+    tool_context.state[COVERED_IDS_KEY] = covered
+    return payload
 
   
 
@@ -64,8 +151,65 @@ def create_foresee_agent(model) -> LlmAgent:
             1. ...  
 
             Always ground your analysis in the given abstracts. If no papers are available, briefly explain that to the user instead of guessing.
+            If the tool reports `omitted` papers, mention that the analysis covers the `included` most relevant papers out of `total`.
+            If the tool returns `clusters` instead of `papers`, treat each cluster (label, top terms, size, representative papers)
+            as a research theme, use the largest clusters and the `rising_terms` as hotspots, and mention that all `total` papers were clustered.
+            Papers that carry a `sections` list were read in full: for the most relevant of them, call `read_paper_section`
+            (e.g. section "method" or "conclusion") to ground methods and future directions in the full text, not only the abstract.
+            You may call `get_paper_details` for a few paper ids (e.g. a cluster's representative papers) when you need their
+            full abstracts, or `list_papers` with the returned `handle` to skim further papers; do not page through everything.
          
             """,
 
+        tools=[get_retrieved_papers, list_papers, get_paper_details, read_paper_section]
+    )
+
+
+def create_foresee_map_agent(model) -> LlmAgent:
+    return LlmAgent(
+        model=model,
+        name='foresee_map_agent',
+        description="Agent that writes compact analysis notes for one batch of retrieved papers",
+        instruction="""
+        You analyze ONE batch out of a larger set of retrieved papers. Your notes will be merged with
+        the notes of other batches, so be compact and factual.
+
+        1. Call the `get_retrieved_papers` tool to obtain this batch.
+        2. Reply with exactly these four sections, each a short bullet list (at most 5 bullets),
+           citing paper ids in brackets where helpful:
+            Themes:
+            Methods:
+            Hotspots:
+            Future directions:
+
+            Do not add an introduction or a conclusion. If the batch is empty, reply "No papers in this batch."
+            """,
         tools=[get_retrieved_papers]
     )
+
+
+def create_foresee_reduce_agent(model) -> LlmAgent:
+    return LlmAgent(
+        model=model,
+        name='foresee_reduce_agent',
+        description="Agent that merges per-batch paper analyses into one research trend summary",
+        instruction="""
+        You are a professional and helpful research assistant. 
+
+        You receive analysis notes written for several batches of retrieved papers.
+        1. Merge the notes: combine overlapping themes, and rank hotspots by how many batches mention them.
+        2. Foresee 3-5 concrete future research directions.
+           Make them specific and actionable (e.g., "Apply X methodology to problem Y in population Z", rather than vague statements).
+        3. Present your answer in this structure:
+            ## Current Research Themes
+            1. ...
+ 
+            ## Research Hotspots
+            - ...
+
+            ## Possible Future Directions
+            1. ...  
+
+            Always ground your analysis in the given notes, and mention how many papers were analyzed.
+            """,
+    )
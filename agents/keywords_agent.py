@@ -1,10 +1,23 @@
-from typing import List, Dict, Any
+from typing import Optional, List, Dict, Any
+import logging
 
 from google.adk.agents import LlmAgent
 from google.adk.tools.tool_context import ToolContext
 
+from core.query_planner import SEARCH_CONSTRAINTS_KEY, plan_for_session
 
-def save_keywords(tool_context: ToolContext, keywords: List[str], confirmed: bool = False) -> Dict[str, Any]:
+
+logger = logging.getLogger(__name__)
+
+
+def save_keywords(
+    tool_context: ToolContext,
+    keywords: List[str],
+    confirmed: bool = False,
+    categories: Optional[List[str]] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+) -> Dict[str, Any]:
     """
     Save suggested or confirmed keywords into the shared session state.
 
@@ -16,8 +29,23 @@ def save_keywords(tool_context: ToolContext, keywords: List[str], confirmed: boo
 
     This allows the retrieval_agent to reliably read the final, confirmed
     keywords from state["confirmed_keywords"].
+
+    Optional search constraints (arXiv `categories` such as "cs.LG", and a
+    `from_date` / `to_date` like "2023" or "2023-05-17") are stored under
+    state["search_constraints"]. The result includes the arXiv query that
+    will be sent and an explanation of it.
     """
     keywords_list = keywords or []
+    constraints = {
+        key: value
+        for key, value in (("categories", categories), ("from_date", from_date), ("to_date", to_date))
+        if value
+    }
+    try:
+        plan = plan_for_session(keywords_list, constraints)
+    except ValueError as exc:
+        return {"status": "error", "error": str(exc)}
+    tool_context.state[SEARCH_CONSTRAINTS_KEY] = constraints
 
     tool_context.state["keywords"] = keywords
     tool_context.state["confirmed"] = confirmed
@@ -28,9 +56,10 @@ def save_keywords(tool_context: ToolContext, keywords: List[str], confirmed: boo
     else:
         status = "suggested"
 
-    print(f"[keywords_agent.save_keywords] status={status}, keywords={keywords_list}")
+    logger.info("save_keywords: status=%s, keywords=%s", status, keywords_list,
+                extra={"status": status, "keywords": keywords_list})
 
-    return {"status": status, "keywords": keywords_list}   
+    return {"status": status, "keywords": keywords_list, "search": plan.to_dict()}   
 
 
 def create_keywords_agent(model) -> LlmAgent:
@@ -51,7 +80,10 @@ def create_keywords_agent(model) -> LlmAgent:
         4. When the user explicitly confirms the keywords, call `save_keywords` with confirmed=True and finish
         with: `FINAL KEYWORDS: keyword1, keyword2, ...`.
         5. Remind the users to confirm the keywords before the retrieval agent starts to work.
-        5. Do NOT output FINAL KEYWORDS until the user confirms.
+        6. If the user limits the search to arXiv categories (e.g. cs.LG) or a time span (e.g. "since 2022"),
+        pass them as `categories`, `from_date` and `to_date` (formats 2022, 2022-05 or 2022-05-17) with every
+        `save_keywords` call. If the user asks how the search works, explain it with the `search` field the tool returns.
+        7. Do NOT output FINAL KEYWORDS until the user confirms.
 
         Confirmation signals include:
         - The user says 'OK','ok','yes' or 'y'.
@@ -0,0 +1,69 @@
+from typing import List, Dict, Any
+import asyncio
+
+from google.adk.tools.tool_context import ToolContext
+
+from core.fulltext import read_section
+from core.result_pages import page_results, paper_details, resolve_paper_id
+
+
+# Tools shared by the retrieval and foresee agents. `retrieve_papers` and
+# `get_retrieved_papers` return a compact result handle; these let the agent
+# read the rest of the results a page or a few papers at a time, and the
+# sections of papers whose full text was ingested (see `core.fulltext`).
+
+async def list_papers(tool_context: ToolContext, handle: str, offset: int = 0, limit: int = 0) -> Dict[str, Any]:
+    """
+    List retrieved papers in ranking order, one page at a time.
+
+    Args:
+        handle: the `handle` returned by `retrieve_papers` or `get_retrieved_papers`.
+        offset: index of the first paper to list (use `next_offset` from the previous page).
+        limit: papers per page (0 = the default page size; capped by the server).
+
+    Returns:
+        {"status", "handle", "total", "offset", "next_offset",
+         "papers": [{"id", "title", "year", "authors", "abstract" (shortened)}, ...]}
+        `next_offset` is null on the last page.
+    """
+    return await asyncio.to_thread(page_results, tool_context.state, handle, offset, limit)
+
+
+async def get_paper_details(tool_context: ToolContext, paper_ids: List[str]) -> Dict[str, Any]:
+    """
+    Fetch the full record of specific retrieved papers by id.
+
+    Args:
+        paper_ids: ids as shown by `list_papers` (e.g. "2401.01234v1"); a few per call.
+
+    Returns:
+        {"status", "papers": [{"id", "entry_id", "title", "authors", "published",
+         "abstract", "pdf_url"}, ...], "not_found": [...]}
+    """
+    return await asyncio.to_thread(paper_details, tool_context.state, paper_ids)
+
+
+def _read_section(state, paper_id: str, section: str, chunk: int) -> Dict[str, Any]:
+    entry_id = resolve_paper_id(state, paper_id)
+    if entry_id is None:
+        return {"status": "error", "error": f"{paper_id!r} is not among the retrieved papers."}
+    return read_section(entry_id, section, chunk)
+
+
+async def read_paper_section(
+    tool_context: ToolContext, paper_id: str, section: str = "", chunk: int = 0
+) -> Dict[str, Any]:
+    """
+    Read one section of a paper's full text, one chunk at a time.
+
+    Only papers listed with `sections` (their PDF was read) have full text.
+
+    Args:
+        paper_id: id as shown by `get_retrieved_papers` or `list_papers`.
+        section: section title or its beginning, e.g. "method" or "conclusion" (empty = first section).
+        chunk: chunk index within the section (see `chunks` in the result).
+
+    Returns:
+        {"status", "section", "chunk", "chunks", "text", "sections": [all section titles]}
+    """
+    return await asyncio.to_thread(_read_section, tool_context.state, paper_id, section, chunk)
@@ -1,32 +1,308 @@
-from typing import List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable, Iterator, MutableMapping
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+import asyncio
+import logging
+import threading
 
 import arxiv
 from google.adk.agents import LlmAgent
 from google.adk.tools.tool_context import ToolContext
 
+from agents.paper_tools import get_paper_details, list_papers
+from core import config
+from core.arxiv_cache import ArxivSearchCache, get_search_cache
+from core.arxiv_client import get_arxiv_client
+from core.bm25_index import BM25Index
+from core.paper_store import PAPER_IDS_KEY, get_paper_store, save_session_papers
+from core.prefetch import Prefetcher
+from core.query_planner import plan_for_session, session_constraints
+from core.result_pages import describe_results
+from core.papers import Paper, PaperCollection, short_authors
+
+
+logger = logging.getLogger(__name__)
+
 
 # ============================================================================
 # Helper functions
 # ============================================================================
-def _paper_to_dict(result: arxiv.Result) -> Dict[str, Any]:
-    """Convert an arXiv result to a plain dict."""
-    return {
-        "entry_id": result.entry_id,
-        "title": result.title.strip(),
-        "authors": [author.name for author in result.authors],
-        "published": result.published.isoformat() if result.published else None,
-        "abstract": result.summary.strip(),
-        "pdf_url": result.pdf_url,
-    }
+def _result_to_paper(result: arxiv.Result) -> Paper:
+    """Convert an arXiv result to a compact paper record."""
+    return Paper(
+        entry_id=result.entry_id,
+        title=result.title.strip(),
+        authors=[author.name for author in result.authors],
+        published=int(result.published.timestamp()) if result.published else None,
+        abstract=result.summary.strip(),
+        pdf_url=result.pdf_url,
+    )
 
 
-def _paper_to_summary(paper: Dict[str, Any]) -> str:
+def _paper_to_summary(paper: Paper) -> str:
     """Return a short, human-readable summary for the paper."""
-    authors = ", ".join(paper["authors"][:3])
-    if len(paper["authors"]) > 3:
-        authors += ", et al."
-    published = paper["published"] or "unknown date"
-    return f"- {paper['title']} ({published}) • {authors}"
+    published = paper.published_iso or "unknown date"
+    return f"- {paper.title} ({published}) • {paper.short_authors()}"
+
+
+def format_paper_list(result: Dict[str, Any], abstract_chars: int = 300) -> str:
+    """Render a `fetch_papers` result as the numbered list the retrieval agent would write."""
+    if result.get("error"):
+        return f"⚠️ {result['error']}"
+    lines: List[str] = []
+    for number, data in enumerate(result.get("papers") or [], start=1):
+        authors = short_authors(data.get("authors") or [])
+        year = (data.get("published") or "")[:4] or "n.d."
+        abstract = " ".join((data.get("abstract") or "").split())
+        if len(abstract) > abstract_chars:
+            abstract = abstract[:abstract_chars].rsplit(" ", 1)[0] + "…"
+        lines.append(
+            f"{number}. **{data.get('title', '')}**\n"
+            f"   {authors or 'Unknown authors'} ({year})\n"
+            f"   {abstract}"
+        )
+    shown = len(lines)
+    total = result.get("total", shown)
+    header = f"Retrieved {total} papers for: {result.get('query', '')}"
+    if total > shown:
+        header += f" (showing the top {shown})"
+    return "\n\n".join([header, *lines]) if lines else f"No papers found for: {result.get('query', '')}"
+
+
+def _iter_arxiv_pages(
+    query_str: str,
+    max_results: int = 10,
+    sort_by: arxiv.SortCriterion = arxiv.SortCriterion.Relevance,
+    sort_order: arxiv.SortOrder = arxiv.SortOrder.Descending,
+    page_size: Optional[int] = None,
+    cancel_event: Optional[threading.Event] = None,
+    use_prefetch: bool = True,
+) -> Iterator[List[Paper]]:
+    """
+    Yield arXiv results one page at a time, as they arrive from the API.
+
+    A search already prefetched during keyword refinement is taken over:
+    its pages so far come at once, the rest as the prefetch fetches them.
+    Repeated queries are served
+    from the on-disk cache. A search is only written to the cache once it
+    has been read to the end, so cancelled or abandoned searches never
+    leave partial entries behind.
+    """
+    page_size = max(1, min(page_size or config.ARXIV_PAGE_SIZE, max_results))
+    key = ArxivSearchCache.make_key(query_str, max_results, sort_by.value, sort_order.value)
+
+    if use_prefetch:
+        prefetched = _prefetcher.take(key)
+        if prefetched is not None:
+            logger.info("using prefetched results for query: %s", query_str, extra={"query": query_str})
+            # Closing the pages early (e.g. on cancel) also stops the prefetch.
+            with closing(prefetched):
+                for page in prefetched:
+                    if cancel_event is not None and cancel_event.is_set():
+                        return
+                    yield page
+            return
+
+    cache = get_search_cache()
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            logger.info("cache hit for query: %s", query_str, extra={"query": query_str})
+            for start in range(0, len(cached), page_size):
+                yield [Paper.from_dict(data) for data in cached[start:start + page_size]]
+            return
+
+    client = get_arxiv_client(page_size)
+    search = arxiv.Search(
+        query=query_str,
+        max_results=max_results,
+        sort_by=sort_by,
+        sort_order=sort_order,
+    )
+
+    papers: List[Paper] = []
+    page: List[Paper] = []
+    for result in client.results(search):
+        if cancel_event is not None and cancel_event.is_set():
+            logger.info("search cancelled after %d papers", len(papers), extra={"papers": len(papers)})
+            return
+        paper = _result_to_paper(result)
+        papers.append(paper)
+        page.append(paper)
+        if len(page) >= page_size:
+            yield page
+            page = []
+    if page:
+        yield page
+
+    if cache is not None:
+        cache.put(key, query_str, [paper.to_dict() for paper in papers])
+
+
+def _search_arxiv(
+    query_str: str,
+    max_results: int = 10,
+    sort_by: arxiv.SortCriterion = arxiv.SortCriterion.Relevance,
+    sort_order: arxiv.SortOrder = arxiv.SortOrder.Descending,
+    cancel_event: Optional[threading.Event] = None,
+) -> List[Paper]:
+    """Run an arXiv search and return all results as one list."""
+    papers: List[Paper] = []
+    for page in _iter_arxiv_pages(query_str, max_results, sort_by, sort_order, cancel_event=cancel_event):
+        papers.extend(page)
+    return papers
+
+
+def fetch_since(
+    keywords: List[str],
+    watermark: Optional[int],
+    max_results: int,
+    constraints: Optional[Dict[str, Any]] = None,
+) -> List[Paper]:
+    """
+    Fetch the papers for `keywords` submitted at or after `watermark`, newest first.
+
+    The query is planned with the topic's search `constraints` (categories,
+    dates), like the session it was saved from.
+
+    Results are requested by submission date and paging stops at the first
+    paper older than the watermark, so a refresh costs a page or two when
+    little is new. Paging goes on until the watermark is crossed however
+    many papers that takes: stopping earlier would leave a gap between the
+    oldest paper fetched and the watermark that no later refresh covers.
+    Without a watermark, the `max_results` newest papers are returned.
+    Papers published exactly at the watermark come back again and are
+    expected to be deduplicated by the caller.
+    """
+    query_str = plan_for_session(keywords, constraints).query
+    client = get_arxiv_client(max(1, min(config.ARXIV_PAGE_SIZE, max_results)))
+    search = arxiv.Search(
+        query=query_str,
+        max_results=max_results if watermark is None else None,
+        sort_by=arxiv.SortCriterion.SubmittedDate,
+        sort_order=arxiv.SortOrder.Descending,
+    )
+    papers: List[Paper] = []
+    for result in client.results(search):
+        paper = _result_to_paper(result)
+        if watermark is not None and paper.published is not None and paper.published < watermark:
+            break
+        papers.append(paper)
+    logger.info(
+        "fetch_since: %d papers since %s for query: %s", len(papers), watermark, query_str,
+        extra={"papers": len(papers), "query": query_str},
+    )
+    return papers
+
+
+def _prefetch_search(query_str: str, max_results: int, cancel_event: threading.Event) -> Iterator[List[Paper]]:
+    return _iter_arxiv_pages(query_str, max_results, cancel_event=cancel_event, use_prefetch=False)
+
+
+_prefetcher = Prefetcher(_prefetch_search, max_workers=config.PREFETCH_MAX_WORKERS)
+
+
+def prefetch_keywords(
+    session_id: str, keywords: List[str], constraints: Optional[Dict[str, Any]] = None
+) -> List[str]:
+    """
+    Start background searches for a draft keyword list (see `Prefetcher`).
+
+    The searches are the ones `fetch_papers` will run if these keywords and
+    search `constraints` are confirmed: the planned query in single mode, or
+    one query per keyword in fanout mode, where a partly changed list still
+    reuses the searches for the keywords it kept.
+    """
+    keywords = [keyword for keyword in keywords if keyword]
+    if not keywords:
+        return []
+    try:
+        plan = plan_for_session(keywords, constraints)
+    except ValueError:
+        return []
+    if config.RETRIEVAL_MODE == "fanout":
+        queries = [(query, config.FANOUT_RESULTS_PER_KEYWORD) for query in plan.keyword_queries]
+    else:
+        queries = [(plan.query, config.RETRIEVAL_MAX_RESULTS)] if plan.query else []
+    searches = {
+        ArxivSearchCache.make_key(
+            query, max_results, arxiv.SortCriterion.Relevance.value, arxiv.SortOrder.Descending.value
+        ): (query, max_results)
+        for query, max_results in queries
+    }
+    started = _prefetcher.prefetch(session_id, searches)
+    if started:
+        logger.info("prefetching: %s", started)
+    return started
+
+
+def cancel_prefetch(session_id: str) -> int:
+    """Cancel the speculative searches still pending for `session_id`."""
+    return _prefetcher.cancel_session(session_id)
+
+
+def prefetch_stats() -> Dict[str, Any]:
+    return _prefetcher.stats()
+
+
+def _reciprocal_rank_fusion(
+    ranked_lists: List[List[Paper]], k: int = 60
+) -> List[Paper]:
+    """
+    Merge several ranked paper lists into one, deduplicated by `entry_id`.
+
+    Each paper scores sum(1 / (k + rank)) over the lists it appears in, so
+    papers matched by several keywords rise to the top while every keyword
+    still contributes its best hits.
+    """
+    scores: Dict[str, float] = {}
+    merged: Dict[str, Paper] = {}
+    for ranked in ranked_lists:
+        for rank, paper in enumerate(ranked, start=1):
+            entry_id = paper.entry_id
+            scores[entry_id] = scores.get(entry_id, 0.0) + 1.0 / (k + rank)
+            merged.setdefault(entry_id, paper)
+    order = sorted(merged, key=lambda entry_id: scores[entry_id], reverse=True)
+    return [merged[entry_id] for entry_id in order]
+
+
+def _fanout_search(
+    queries: List[str], max_results: int, cancel_event: Optional[threading.Event] = None
+) -> List[Paper]:
+    """
+    Run the per-keyword queries concurrently, then merge the results with RRF.
+
+    Setting `cancel_event` stops every search; what each has found so far is merged.
+    """
+    workers = max(1, min(len(queries), config.FANOUT_MAX_WORKERS))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="arxiv-fanout") as pool:
+        ranked_lists = list(
+            pool.map(
+                lambda query: _search_arxiv(
+                    query, max_results=config.FANOUT_RESULTS_PER_KEYWORD, cancel_event=cancel_event
+                ),
+                queries,
+            )
+        )
+    return _reciprocal_rank_fusion(ranked_lists, k=config.RRF_K)[:max_results]
+
+
+# Cancellation flags for in-flight streaming retrievals, keyed by session id.
+_cancel_events: Dict[str, threading.Event] = {}
+
+
+def cancel_retrieval(session_id: str) -> bool:
+    """
+    Ask an in-flight `retrieve_papers` call for `session_id` to stop early.
+
+    Papers fetched so far stay in session state. Returns False when no
+    retrieval is running for that session.
+    """
+    event = _cancel_events.get(session_id)
+    if event is None:
+        return False
+    event.set()
+    return True
 
 
 # ============================================================================
@@ -42,17 +318,46 @@ def get_keywords(tool_context: ToolContext) -> Dict[str, Any]:
         or tool_context.state.get("keywords")
         or []
     )
-    print(f"[retrieval_agent.get_keywords] Keywords in state: {keywords}")
+    logger.info("get_keywords: keywords in state: %s", keywords)
     return {"status": "success", "keywords": keywords}
 
 
-def retrieve_papers(tool_context: ToolContext, keywords: List[str]) -> Dict[str, Any]:
+async def fetch_papers(
+    state: MutableMapping[str, Any],
+    session_id: str,
+    keywords: List[str],
+    progress_fn: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
     """
     Retrieve papers from arXiv using the provided (or stored) keywords.
+
+    This is the body of the `retrieve_papers` tool, usable without an agent:
+    `state` is any session state mapping (e.g. an ADK `State` recording a
+    delta) and `session_id` identifies the run for `cancel_retrieval`.
+
+    The arXiv query is planned by `core.query_planner`: keywords are scoped
+    to QUERY_FIELDS and combined with the category and date constraints in
+    state["search_constraints"]. With RETRIEVAL_MODE=fanout, every keyword
+    is searched concurrently and the results are merged, deduplicated and
+    re-ranked; otherwise all keywords go into a single query.
+
+    Single-query results are streamed page by page: each page is written to
+    the paper store as soon as it arrives, and the fetch can be stopped early
+    with `cancel_retrieval`. The ids go into state["retrieved_paper_ids"]
+    once, when fetching ends, so a large result set is not copied into the
+    session's state delta again for every page. Only the first
+    RETRIEVAL_PREVIEW_SIZE papers are returned; the `retrieve_papers` tool
+    turns the result into a compact handle instead.
+
+    Once fetching ends, the papers are re-ranked with a local BM25 index
+    against the user's original query and the keywords.
+
+    Progress ("Fetched 200/500 papers") goes to `progress_fn` (the user's
+    console) when given, and to the log at INFO otherwise.
     """
 
-    keywords_list = keywords or tool_context.state.get("confirmed_keywords") or tool_context.state.get("keywords") or []
-    print(f"[retrieval_agent.retrieve_papers] Using keywords: {keywords_list}")
+    keywords_list = keywords or state.get("confirmed_keywords") or state.get("keywords") or []
+    logger.info("fetch_papers: using keywords %s", keywords_list, extra={"session_id": session_id, "keywords": keywords_list})
 
     if not keywords_list:
         return {
@@ -63,26 +368,64 @@ def retrieve_papers(tool_context: ToolContext, keywords: List[str]) -> Dict[str,
             "error": "No keywords provided or found in session state.",
         }
 
-    query_str = " OR ".join(keywords_list)
+    try:
+        plan = plan_for_session(keywords_list, session_constraints(state))
+    except ValueError as exc:
+        plan, plan_error = None, str(exc)
+    else:
+        plan_error = None if plan.query else "The keywords contain no searchable terms."
+    if plan_error:
+        return {
+            "query": "",
+            "total": 0,
+            "papers": [],
+            "summaries": [],
+            "error": plan_error,
+        }
+    query_str = plan.query
+    max_results = config.RETRIEVAL_MAX_RESULTS
 
-    papers: List[Dict[str, Any]] = []
-    summaries: List[str] = []
+    papers = PaperCollection()
+    index = BM25Index()
+    cancel_event = threading.Event()
+    _cancel_events[session_id] = cancel_event
 
     try:
-        search = arxiv.Search(
-            query=query_str,
-            max_results=10, 
-            sort_by=arxiv.SortCriterion.Relevance,
-            sort_order=arxiv.SortOrder.Descending,
-        )
-        for result in search.results():
-            paper_dict = _paper_to_dict(result)
-            papers.append(paper_dict)
-            summaries.append(_paper_to_summary(paper_dict))
+        if config.RETRIEVAL_MODE == "fanout":
+            papers = PaperCollection(await asyncio.to_thread(
+                _fanout_search, plan.keyword_queries, max_results, cancel_event
+            ))
+            index.add(papers)
+            save_session_papers(state, papers)
+        else:
+            state[PAPER_IDS_KEY] = []
+            store = get_paper_store()
+            pages = _iter_arxiv_pages(query_str, max_results=max_results, cancel_event=cancel_event)
+            while not cancel_event.is_set():
+                page = await asyncio.to_thread(next, pages, None)
+                if page is None:
+                    break
+                papers.extend(page)
+                index.add(page)
+                # Papers go to the paper store as they arrive; state gets their ids once, below.
+                await asyncio.to_thread(store.put_many, page)
+                progress = f"📥 Fetched {len(papers)}/{max_results} papers"
+                if progress_fn is not None:
+                    progress_fn(progress)
+                else:
+                    logger.info("fetch_papers: %s", progress)
+                logger.debug(
+                    "fetch_papers: page of %d papers for query: %s", len(page), query_str,
+                    extra={"session_id": session_id, "papers": len(papers), "page": len(page), "query": query_str},
+                )
 
-        tool_context.state["retrieved_papers"] = papers
+        if config.RERANK_ENABLED:
+            # Rank locally against the user's own words as well as the keywords.
+            rank_query = " ".join([state.get("user_query") or "", *keywords_list])
+            papers = index.rerank(rank_query)
+        state[PAPER_IDS_KEY] = papers.entry_ids()
 
-    except arxiv.HTTPError as exc:
+    except arxiv.ArxivError as exc:
         return {
             "query": query_str,
             "total": 0,
@@ -90,15 +433,37 @@ def retrieve_papers(tool_context: ToolContext, keywords: List[str]) -> Dict[str,
             "summaries": [],
             "error": f"arXiv request failed: {exc}",
         }
+    finally:
+        cancel_event.set()
+        _cancel_events.pop(session_id, None)
 
+    preview = papers[:config.RETRIEVAL_PREVIEW_SIZE]
     return {
         "query": query_str,
+        "explanation": plan.notes,
         "total": len(papers),
-        "papers": papers,
-        "summaries": summaries,
+        "papers": preview.to_dicts(),
+        "summaries": [_paper_to_summary(paper) for paper in preview],
     }
 
 
+async def retrieve_papers(tool_context: ToolContext, keywords: List[str]) -> Dict[str, Any]:
+    """
+    Retrieve papers from arXiv using the provided (or stored) keywords.
+
+    Returns a compact result handle: the planned query and its explanation,
+    the `total` number of papers kept in session state and the titles of the
+    best-ranked ones. Read the
+    papers with `list_papers(handle, offset)` and `get_paper_details(paper_ids)`.
+    """
+    result = await fetch_papers(tool_context.state, tool_context.session.id, keywords)
+    if result.get("error"):
+        return {"status": "error", "query": result["query"], "total": 0, "error": result["error"]}
+    handle = await asyncio.to_thread(describe_results, tool_context.state, result["query"])
+    handle["explanation"] = result["explanation"]
+    return handle
+
+
 def create_retrieval_agent(model) -> LlmAgent:
     return LlmAgent(
         model=model,
@@ -106,11 +471,16 @@ def create_retrieval_agent(model) -> LlmAgent:
         description="Agent that retrieves papers from arXiv with specific keywords.",
         instruction="""
             You are a professional research assistant that helps users find research papers with specific keywords.
-            Always follow these steps:
+            Always follow these steps (except in the case described in step 5):
             1. Call `get_keywords` to obtain the confirmed keywords from the shared session state.
-            2. Pass those keywords to `retrieve_papers` to fetch papers from arXiv.
-            3. Return a clear, numbered list of papers to the user. For each paper, show at least: title, authors, published year, and a short abstract based on the `summary` field.
+            2. Pass those keywords to `retrieve_papers` to fetch papers from arXiv. It returns a result `handle`,
+               the `total` number of papers and the titles of the top ones, not the papers themselves.
+            3. Call `list_papers` with that handle to read the first page of papers, and return a clear, numbered
+               list to the user. For each paper, show at least: title, authors, published year, and a short abstract.
+               Only call `get_paper_details` if you need a paper's full abstract or PDF link.
+            4. If `total` is larger than the number of papers you listed, tell the user how many papers were retrieved in total.
+            5. If the message says the papers were already retrieved and only asks for a summary, do not call any tool; write a short narrative summary of the listed papers instead.
         """,
-        tools=[get_keywords, retrieve_papers],
+        tools=[get_keywords, retrieve_papers, list_papers, get_paper_details],
     )
 
@@ -0,0 +1,149 @@
+from typing import List, Dict, Any
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+from core import config
+from core.headless import run_headless_session
+from main import (
+    APP_NAME,
+    build_runners,
+    configure_api_key,
+    create_logging_plugin,
+    create_metrics_plugin,
+    create_model,
+    create_session_service,
+    setup_logging,
+)
+
+
+# ============================================================================
+# Helper functions
+# ============================================================================
+def load_topics(path: str) -> List[Dict[str, str]]:
+    """
+    Read topics from a JSONL file.
+
+    Each line needs a `topic` (or `query`) field, or a `title` with an optional
+    `body` as in `requests.jsonl`. An `id`/`request_id` field is carried over to
+    the results; otherwise the line number is used.
+    """
+    topics: List[Dict[str, str]] = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            topic = record.get("topic") or record.get("query")
+            if not topic:
+                topic = ". ".join(part for part in (record.get("title"), record.get("body")) if part)
+            if not topic:
+                raise ValueError(f"{path}:{line_no}: no topic, query or title field")
+            topic_id = str(record.get("id") or record.get("request_id") or line_no)
+            topics.append({"id": topic_id, "topic": topic})
+    return topics
+
+
+# ============================================================================
+# Batch runner
+# ============================================================================
+async def run_batch(
+    topics: List[Dict[str, str]],
+    output_path: str,
+    concurrency: int,
+    max_refinements: int = 2,
+    run_foresee: bool = True,
+) -> Dict[str, Any]:
+    """
+    Run one headless session per topic, at most `concurrency` at a time.
+
+    All sessions share one model and one session service. Every result is
+    appended to `output_path` as soon as its session finishes, and its
+    metrics record to `METRICS_JSONL_PATH`.
+    """
+    model = create_model()
+    session_service = create_session_service()
+    metrics = create_metrics_plugin()
+    plugins = [create_logging_plugin(), metrics]
+    runners = build_runners(model, session_service, plugins)
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    write_lock = asyncio.Lock()
+    statuses: Dict[str, int] = {}
+    started = time.perf_counter()
+
+    with open(output_path, "a", encoding="utf-8") as out:
+
+        async def run_one(item: Dict[str, str]) -> None:
+            async with semaphore:
+                print(f"[batch] starting {item['id']}: {item['topic'][:60]}")
+                result = await run_headless_session(
+                    topic=item["topic"],
+                    session_service=session_service,
+                    runners=runners,
+                    app_name=APP_NAME,
+                    user_id=f"batch_{item['id']}",
+                    max_refinements=max_refinements,
+                    run_foresee=run_foresee,
+                    metrics=metrics,
+                )
+            result = {"id": item["id"], **result}
+            statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+            async with write_lock:
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                out.flush()
+                if config.METRICS_JSONL_PATH and result["session_id"]:
+                    metrics.persist(result["session_id"], config.METRICS_JSONL_PATH)
+            if result["session_id"]:
+                metrics.discard(result["session_id"])
+            print(
+                f"[batch] finished {item['id']}: status={result['status']}, "
+                f"papers={result['total_papers']}, {result['elapsed_seconds']}s"
+            )
+
+        await asyncio.gather(*(run_one(item) for item in topics))
+
+    elapsed = time.perf_counter() - started
+    if config.METRICS_PROM_PATH:
+        metrics.write_prometheus(config.METRICS_PROM_PATH)
+    return {
+        "topics": len(topics),
+        "statuses": statuses,
+        "elapsed_seconds": round(elapsed, 3),
+        "sessions_per_second": round(len(topics) / elapsed, 3) if elapsed else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run research sessions for many topics without a terminal.")
+    parser.add_argument("topics", help="JSONL file with one topic per line")
+    parser.add_argument("--output", default="batch_results.jsonl", help="JSONL file the results are appended to")
+    parser.add_argument("--concurrency", type=int, default=4, help="sessions run at the same time")
+    parser.add_argument("--max-refinements", type=int, default=2, help="keyword confirmation attempts per topic")
+    parser.add_argument("--skip-foresee", action="store_true", help="stop after retrieval")
+    args = parser.parse_args()
+
+    configure_api_key()
+    setup_logging()
+    logger = logging.getLogger("research_assistant")
+    topics = load_topics(args.topics)
+    logger.info("Starting batch run over %d topics", len(topics))
+
+    summary = asyncio.run(
+        run_batch(
+            topics,
+            output_path=args.output,
+            concurrency=args.concurrency,
+            max_refinements=args.max_refinements,
+            run_foresee=not args.skip_foresee,
+        )
+    )
+    logger.info("Batch run finished: %s", summary)
+    print(f"[batch] {json.dumps(summary)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+"""
+Offline benchmark suite.
+
+Runs full research sessions against a local arXiv stand-in (`fake_arxiv`)
+and a deterministic fake model (`fake_llm`), so retrieval and orchestration
+changes can be measured without network access or API keys.
+Entry point: `python -m benchmarks.run`.
+"""
@@ -0,0 +1,310 @@
+from typing import Optional, List
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import escape
+import argparse
+import glob
+import os
+import random
+import re
+import threading
+import time
+import urllib.parse
+import zlib
+
+import requests
+
+
+ATOM_NS = "http://www.w3.org/2005/Atom"
+_ENTRY_RE = re.compile(r"<entry>.*?</entry>", re.DOTALL)
+
+# Vocabulary for synthetic abstracts, so that ranking and dedup have real text to work on.
+_VOCABULARY = """
+graph neural network transformer attention diffusion model language retrieval
+benchmark dataset reinforcement learning policy agent reasoning planning robust
+federated privacy contrastive representation self supervised vision multimodal
+generative adversarial optimization convergence stochastic gradient sparse
+efficient inference quantization distillation pruning hardware latency memory
+causal explanation fairness uncertainty bayesian calibration temporal forecasting
+""".split()
+
+
+# ============================================================================
+# Feed construction
+# ============================================================================
+def synthetic_entry(query: str, index: int) -> str:
+    """Build one deterministic Atom `<entry>` for result `index` of `query`."""
+    seed = zlib.crc32(f"{query}\x00{index}".encode())
+    rng = random.Random(seed)
+    arxiv_id = f"{2000 + seed % 500:04d}.{seed % 100000:05d}"
+    year = 2015 + seed % 10
+    month = 1 + seed % 12
+    day = 1 + seed % 28
+    # Each entry leans towards one of six topics, so clustering has structure to find.
+    topic = _VOCABULARY[(seed % 6) * 8:(seed % 6) * 8 + 8]
+    title = " ".join(rng.choice(topic) for _ in range(8)).capitalize()
+    abstract = " ".join(
+        rng.choice(topic) if rng.random() < 0.6 else rng.choice(_VOCABULARY) for _ in range(150)
+    )
+    authors = "".join(
+        f"<author><name>Author {rng.randrange(400)}</name></author>"
+        for _ in range(1 + seed % 6)
+    )
+    published = f"{year}-{month:02d}-{day:02d}T00:00:00Z"
+    return (
+        f"<entry><id>http://arxiv.org/abs/{arxiv_id}v1</id>"
+        f"<updated>{published}</updated><published>{published}</published>"
+        f"<title>{escape(title)}</title><summary>{escape(abstract)}</summary>{authors}"
+        f'<link href="http://arxiv.org/abs/{arxiv_id}v1" rel="alternate" type="text/html"/>'
+        f'<link title="pdf" href="http://arxiv.org/pdf/{arxiv_id}v1" rel="related" type="application/pdf"/>'
+        f'<arxiv:primary_category xmlns:arxiv="http://arxiv.org/schemas/atom" term="cs.LG" '
+        f'scheme="http://arxiv.org/schemas/atom"/>'
+        f'<category term="cs.LG" scheme="http://arxiv.org/schemas/atom"/></entry>'
+    )
+
+
+_SECTIONS = ("Introduction", "Related Work", "Method", "Experiments", "Conclusion", "References")
+
+
+def _pdf_text(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def synthetic_pdf(arxiv_id: str, pages: int = 4, lines_per_page: int = 48) -> bytes:
+    """
+    Build a small, valid PDF for `arxiv_id` with numbered section headings.
+
+    The text is deterministic per id, so extraction results can be compared,
+    and the file is written by hand to keep the stand-in free of PDF libraries.
+    """
+    rng = random.Random(zlib.crc32(arxiv_id.encode()))
+    lines: List[str] = [f"Synthetic paper {arxiv_id}", ""]
+    for number, section in enumerate(_SECTIONS, start=1):
+        lines += ["", f"{number} {section}" if section != "References" else section, ""]
+        for _ in range(rng.randrange(8, 20)):
+            lines.append(" ".join(rng.choice(_VOCABULARY) for _ in range(12)))
+    pages_text = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)][:pages] or [[]]
+
+    objects: List[bytes] = []
+    n_pages = len(pages_text)
+    # 1 catalog, 2 page tree, 3 font, then a page and its content stream per page.
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(n_pages))
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {n_pages} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for i, page_lines in enumerate(pages_text):
+        stream = "BT /F1 9 Tf 12 TL 50 750 Td " + " ".join(f"({_pdf_text(line)}) Tj T*" for line in page_lines) + " ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>".encode()
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream".encode())
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def load_recorded_entries(feeds_dir: str) -> List[str]:
+    """Read every `<entry>` from the recorded Atom feeds (`*.xml`) in `feeds_dir`."""
+    entries: List[str] = []
+    for path in sorted(glob.glob(os.path.join(feeds_dir, "*.xml"))):
+        with open(path, encoding="utf-8") as f:
+            entries.extend(_ENTRY_RE.findall(f.read()))
+    return entries
+
+
+def render_feed(entries: List[str], total: int, start: int, page_size: int) -> bytes:
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<feed xmlns="{ATOM_NS}" xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">'
+        "<title>arXiv Query</title>"
+        f"<opensearch:totalResults>{total}</opensearch:totalResults>"
+        f"<opensearch:startIndex>{start}</opensearch:startIndex>"
+        f"<opensearch:itemsPerPage>{page_size}</opensearch:itemsPerPage>"
+        + "".join(entries)
+        + "</feed>"
+    ).encode("utf-8")
+
+
+# ============================================================================
+# Server
+# ============================================================================
+class FakeArxivServer:
+    """
+    Local stand-in for the arXiv query API.
+
+    Serves the entries of recorded feeds (when `feeds_dir` is given) or
+    deterministic synthetic entries, paginated like the real API and
+    answering every request after `latency` seconds. Point the app at it
+    with `config.ARXIV_API_URL = server.url`. `/pdf/<id>` serves a small
+    synthetic PDF per paper (`config.FULLTEXT_PDF_BASE_URL = server.pdf_url`).
+    """
+
+    def __init__(
+        self,
+        feeds_dir: Optional[str] = None,
+        latency: float = 0.0,
+        total_results: int = 10000,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.latency = latency
+        self.total_results = total_results
+        self.recorded = load_recorded_entries(feeds_dir) if feeds_dir else []
+        self.requests = 0
+        self.pdf_requests = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/api/query"
+
+    @property
+    def pdf_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/pdf"
+
+    def entries(self, query: str, start: int, count: int) -> List[str]:
+        if self.recorded:
+            return self.recorded[start:start + count]
+        stop = min(start + count, self.total_results)
+        return [synthetic_entry(query, i) for i in range(start, stop)]
+
+    def total_for(self, query: str) -> int:
+        return len(self.recorded) if self.recorded else self.total_results
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args) -> None:
+                pass
+
+            def handle(self) -> None:
+                try:
+                    super().handle()
+                except ConnectionError:
+                    # The client timed out and hung up before the answer was sent.
+                    pass
+
+            def do_GET(self) -> None:
+                path = urllib.parse.urlparse(self.path).path
+                if path.startswith("/pdf/"):
+                    self._send_pdf(path[len("/pdf/"):])
+                    return
+                with server._lock:
+                    server.requests += 1
+                params = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+                query = params.get("search_query", [""])[0]
+                start = int(params.get("start", ["0"])[0])
+                page_size = int(params.get("max_results", ["10"])[0])
+                if server.latency:
+                    time.sleep(server.latency)
+                body = render_feed(
+                    server.entries(query, start, page_size),
+                    total=server.total_for(query),
+                    start=start,
+                    page_size=page_size,
+                )
+                self.send_response(200)
+                self.send_header("Content-Type", "application/atom+xml; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_pdf(self, arxiv_id: str) -> None:
+                with server._lock:
+                    server.pdf_requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                body = synthetic_pdf(arxiv_id)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/pdf")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def start(self) -> "FakeArxivServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeArxivServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+# ============================================================================
+# CLI: record feeds / serve
+# ============================================================================
+def record_feed(query: str, max_results: int, path: str, page_size: int = 100) -> int:
+    """Download the real arXiv results for `query` into one Atom file; returns the entry count."""
+    entries: List[str] = []
+    for start in range(0, max_results, page_size):
+        response = requests.get(
+            "https://export.arxiv.org/api/query",
+            params={"search_query": query, "start": start, "max_results": min(page_size, max_results - start)},
+            timeout=30,
+        )
+        response.raise_for_status()
+        page = _ENTRY_RE.findall(response.text)
+        entries.extend(page)
+        if len(page) < page_size:
+            break
+        time.sleep(3)  # arXiv's requested delay between requests
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(render_feed(entries, total=len(entries), start=0, page_size=len(entries)))
+    return len(entries)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local arXiv API stand-in for offline benchmarks.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve = sub.add_parser("serve", help="serve recorded or synthetic feeds")
+    serve.add_argument("--feeds-dir", help="directory of recorded *.xml feeds (default: synthetic)")
+    serve.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    serve.add_argument("--port", type=int, default=8765)
+
+    record = sub.add_parser("record", help="record a real arXiv feed for later replay")
+    record.add_argument("query")
+    record.add_argument("--max-results", type=int, default=200)
+    record.add_argument("--out", required=True, help="feed file to write, e.g. benchmarks/feeds/gnn.xml")
+
+    args = parser.parse_args()
+    if args.command == "record":
+        count = record_feed(args.query, args.max_results, args.out)
+        print(f"[fake_arxiv] recorded {count} entries to {args.out}")
+        return
+
+    server = FakeArxivServer(feeds_dir=args.feeds_dir, latency=args.latency, port=args.port)
+    print(f"[fake_arxiv] serving on {server.url} (set ARXIV_API_URL to use it)")
+    server.start()
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+from typing import Any, AsyncGenerator, Dict, List
+import asyncio
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from core.bm25_index import tokenize
+from core.foresee_payload import estimate_tokens
+
+
+# Tools the fake model calls, in order of preference, with the arguments it uses.
+_TOOL_PLAN = ("save_keywords", "retrieve_papers", "get_retrieved_papers")
+
+
+def _request_text(llm_request: LlmRequest) -> str:
+    parts: List[str] = []
+    for content in llm_request.contents:
+        for part in content.parts or []:
+            if part.text:
+                parts.append(part.text)
+            elif part.function_response is not None:
+                parts.append(str(part.function_response.response))
+    return "\n".join(parts)
+
+
+def _first_user_text(llm_request: LlmRequest) -> str:
+    for content in llm_request.contents:
+        if content.role == "user":
+            for part in content.parts or []:
+                if part.text:
+                    return part.text
+    return ""
+
+
+class FakeLlm(BaseLlm):
+    """
+    Deterministic stand-in for Gemini that plugs into the ADK runners.
+
+    On a fresh turn of an agent with tools it calls that agent's main tool
+    (`save_keywords` with keywords taken from the user's words, then
+    `retrieve_papers` / `get_retrieved_papers`); once the tool has answered,
+    or for agents without tools, it replies with a short text. Every call
+    waits `latency` seconds and reports token usage estimated from the
+    request size, so metrics look like those of a real model.
+    """
+
+    model: str = "fake-llm"
+    latency: float = 0.0
+    reply_chars: int = 400
+    calls: int = 0
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        prompt_text = _request_text(llm_request)
+        last = llm_request.contents[-1] if llm_request.contents else None
+        answered = last is not None and any(
+            part.function_response is not None for part in last.parts or []
+        )
+
+        tool_name = next((name for name in _TOOL_PLAN if name in llm_request.tools_dict), None)
+        if tool_name and not answered:
+            call = types.FunctionCall(name=tool_name, args=self._tool_args(tool_name, llm_request))
+            yield self._response(types.Part(function_call=call), prompt_text, completion_tokens=20)
+            return
+
+        words = tokenize(prompt_text)[-200:] or ["done"]
+        reply = " ".join(words)
+        while len(reply) < self.reply_chars:
+            reply += " " + reply
+        reply = reply[:self.reply_chars]
+        yield self._response(types.Part(text=reply), prompt_text, estimate_tokens(reply))
+
+    def _tool_args(self, tool_name: str, llm_request: LlmRequest) -> Dict[str, Any]:
+        if tool_name == "save_keywords":
+            terms = list(dict.fromkeys(tokenize(_first_user_text(llm_request))))
+            keywords = [" ".join(terms[i:i + 2]) for i in range(0, min(len(terms), 6), 2)]
+            return {"keywords": keywords or ["machine learning"], "confirmed": True}
+        if tool_name == "retrieve_papers":
+            # Empty keywords make the tool fall back to the confirmed ones in state.
+            return {"keywords": []}
+        return {}
+
+    @staticmethod
+    def _response(part: types.Part, prompt_text: str, completion_tokens: int) -> LlmResponse:
+        return LlmResponse(
+            content=types.Content(role="model", parts=[part]),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=estimate_tokens(prompt_text),
+                candidates_token_count=completion_tokens,
+                total_token_count=estimate_tokens(prompt_text) + completion_tokens,
+            ),
+        )
+
+    @classmethod
+    def supported_models(cls) -> List[str]:
+        return [r"fake-llm"]
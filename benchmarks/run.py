@@ -0,0 +1,292 @@
+from typing import Optional, List, Dict, Any
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import math
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from google.adk.sessions import InMemorySessionService
+
+from benchmarks.fake_arxiv import FakeArxivServer
+from benchmarks.fake_llm import FakeLlm
+from core import config
+from core.headless import run_headless_session
+from main import build_runners
+from observability.metrics_plugin import MetricsPlugin
+
+
+APP_NAME = "agents"
+PHASES = ("keywords", "retrieval", "foresee")
+
+_TOPIC_AREAS = [
+    "graph neural networks for molecule property prediction",
+    "efficient transformer inference on edge hardware",
+    "privacy preserving federated learning",
+    "uncertainty calibration of large language models",
+    "diffusion models for temporal forecasting",
+    "reinforcement learning agents that plan with reasoning",
+]
+
+
+# ============================================================================
+# Helper functions
+# ============================================================================
+def configure_offline(workdir: str, arxiv_url: str, warm_cache: bool) -> None:
+    """Point every store at `workdir` and the arXiv client at the stand-in server."""
+    config.ARXIV_API_URL = arxiv_url
+    config.ARXIV_DELAY_SECONDS = 0.0
+    config.ARXIV_CACHE_ENABLED = warm_cache
+    config.ARXIV_CACHE_PATH = f"{workdir}/arxiv_search.sqlite3"
+    config.LLM_CACHE_ENABLED = warm_cache
+    config.LLM_CACHE_PATH = f"{workdir}/llm_cache.sqlite3"
+    config.PAPER_STORE_PATH = f"{workdir}/papers.sqlite3"
+    config.FULLTEXT_CACHE_DIR = f"{workdir}/fulltext"
+    config.FULLTEXT_PDF_BASE_URL = arxiv_url.rsplit("/api/", 1)[0] + "/pdf"
+    config.METRICS_JSONL_PATH = ""
+    config.METRICS_PROM_PATH = ""
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile (`q` in 0..100); 0.0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def topic_for(index: int) -> str:
+    return f"{_TOPIC_AREAS[index % len(_TOPIC_AREAS)]} (variant {index})"
+
+
+# ============================================================================
+# Scenarios
+# ============================================================================
+async def run_sessions(
+    n_sessions: int,
+    concurrency: int,
+    result_size: int,
+    llm_latency: float,
+    run_foresee: bool,
+) -> Dict[str, Any]:
+    """Run `n_sessions` headless sessions, `concurrency` at a time, and summarize them."""
+    config.RETRIEVAL_MAX_RESULTS = result_size
+    model = FakeLlm(latency=llm_latency)
+    session_service = InMemorySessionService()
+    metrics = MetricsPlugin()
+    runners = build_runners(model, session_service, [metrics])
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_one(i: int) -> Dict[str, Any]:
+        async with semaphore:
+            return await run_headless_session(
+                topic=topic_for(i),
+                session_service=session_service,
+                runners=runners,
+                app_name=APP_NAME,
+                user_id=f"bench_{i}",
+                run_foresee=run_foresee,
+                metrics=metrics,
+            )
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(run_one(i) for i in range(n_sessions)))
+    elapsed = time.perf_counter() - started
+
+    failed = [r for r in results if r["status"] != "ok"]
+    phases: Dict[str, Dict[str, float]] = {}
+    for phase in PHASES:
+        values = [r["metrics"]["phases_seconds"].get(phase, 0.0) for r in results if r["metrics"]]
+        phases[phase] = {
+            "p50": round(percentile(values, 50), 4),
+            "p95": round(percentile(values, 95), 4),
+        }
+    session_times = [r["elapsed_seconds"] for r in results]
+    return {
+        "result_size": result_size,
+        "concurrency": concurrency,
+        "sessions": n_sessions,
+        "failed": len(failed),
+        "errors": sorted({r["error"] or r["status"] for r in failed}),
+        "elapsed_seconds": round(elapsed, 4),
+        "sessions_per_second": round(n_sessions / elapsed, 3) if elapsed else 0.0,
+        "session_p50": round(percentile(session_times, 50), 4),
+        "session_p95": round(percentile(session_times, 95), 4),
+        "phases": phases,
+        "llm_calls": model.calls,
+    }
+
+
+async def measure_peak_memory(result_size: int, llm_latency: float, run_foresee: bool) -> float:
+    """Peak traced Python memory (MiB) of a single session at `result_size`."""
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        await run_sessions(1, 1, result_size, llm_latency, run_foresee)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / (1024 * 1024), 3)
+
+
+def measure_fulltext(n_papers: int, server: FakeArxivServer, workdir: str) -> Dict[str, Any]:
+    """Ingest the PDFs of `n_papers` papers twice: cold (download + extract) and warm (cache)."""
+    from core.fulltext import FullTextCache, ingest_papers
+    from core.papers import Paper
+
+    papers = [
+        Paper(f"http://arxiv.org/abs/2401.{i:05d}v1", f"Paper {i}", [], None, "", None)
+        for i in range(n_papers)
+    ]
+    cache = FullTextCache(f"{workdir}/fulltext-bench")
+    requests_before = server.pdf_requests
+    cold = ingest_papers(papers, cache)
+    warm = ingest_papers(papers, cache)
+    return {
+        "papers": n_papers,
+        "cold_seconds": cold["seconds"],
+        "warm_seconds": warm["seconds"],
+        "failed": len(cold["failed"]),
+        "pdf_requests": server.pdf_requests - requests_before,
+    }
+
+
+async def run_benchmarks(args: argparse.Namespace) -> Dict[str, Any]:
+    grid: List[Dict[str, Any]] = []
+    memory: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory(prefix="ra-bench-") as workdir, FakeArxivServer(
+        feeds_dir=args.feeds_dir, latency=args.arxiv_latency
+    ) as server:
+        configure_offline(workdir, server.url, args.warm_cache)
+        quiet = contextlib.redirect_stdout(io.StringIO()) if not args.verbose else contextlib.nullcontext()
+        with quiet:
+            # Warm-up: imports, first connections, SQLite files.
+            await run_sessions(1, 1, min(args.sizes), args.llm_latency, not args.skip_foresee)
+            for size in args.sizes:
+                for concurrency in args.concurrency:
+                    grid.append(
+                        await run_sessions(
+                            args.sessions, concurrency, size, args.llm_latency, not args.skip_foresee
+                        )
+                    )
+                memory[str(size)] = await measure_peak_memory(size, args.llm_latency, not args.skip_foresee)
+        arxiv_requests = server.requests
+        fulltext = measure_fulltext(args.fulltext, server, workdir) if args.fulltext else None
+
+    return {
+        "settings": {
+            "sizes": args.sizes,
+            "concurrency": args.concurrency,
+            "sessions": args.sessions,
+            "arxiv_latency": args.arxiv_latency,
+            "llm_latency": args.llm_latency,
+            "warm_cache": args.warm_cache,
+            "feeds_dir": args.feeds_dir,
+            "foresee": not args.skip_foresee,
+        },
+        "grid": grid,
+        "peak_memory_mib": memory,
+        "arxiv_requests": arxiv_requests,
+        "fulltext": fulltext,
+    }
+
+
+# ============================================================================
+# Reporting and regression gate
+# ============================================================================
+def print_report(report: Dict[str, Any]) -> None:
+    header = f"{'size':>6} {'conc':>5} {'sess/s':>8} {'p50 s':>7} {'p95 s':>7}"
+    header += "".join(f" {phase + ' p50':>14}" for phase in PHASES) + f" {'failed':>7}"
+    print(header)
+    for row in report["grid"]:
+        line = (
+            f"{row['result_size']:>6} {row['concurrency']:>5} {row['sessions_per_second']:>8.2f} "
+            f"{row['session_p50']:>7.3f} {row['session_p95']:>7.3f}"
+        )
+        line += "".join(f" {row['phases'][phase]['p50']:>14.3f}" for phase in PHASES)
+        print(line + f" {row['failed']:>7}")
+    print("peak memory (MiB) by result size: " + ", ".join(
+        f"{size}: {mib}" for size, mib in report["peak_memory_mib"].items()
+    ))
+    fulltext = report.get("fulltext")
+    if fulltext:
+        print(
+            f"full text of {fulltext['papers']} papers: {fulltext['cold_seconds']:.2f}s cold, "
+            f"{fulltext['warm_seconds']:.2f}s from cache ({fulltext['failed']} failed)"
+        )
+
+
+def compare_to_baseline(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Return one message per metric that regressed by more than `tolerance` (a fraction)."""
+    regressions: List[str] = []
+    base_rows = {(r["result_size"], r["concurrency"]): r for r in baseline.get("grid", [])}
+    for row in report["grid"]:
+        base = base_rows.get((row["result_size"], row["concurrency"]))
+        if base is None:
+            continue
+        cell = f"size={row['result_size']} concurrency={row['concurrency']}"
+        if row["failed"] > base["failed"]:
+            regressions.append(f"{cell}: {row['failed']} failed sessions (baseline {base['failed']})")
+        if row["sessions_per_second"] < base["sessions_per_second"] * (1 - tolerance):
+            regressions.append(
+                f"{cell}: {row['sessions_per_second']} sessions/s (baseline {base['sessions_per_second']})"
+            )
+        if row["session_p95"] > base["session_p95"] * (1 + tolerance):
+            regressions.append(f"{cell}: p95 {row['session_p95']}s (baseline {base['session_p95']}s)")
+    for size, mib in report["peak_memory_mib"].items():
+        base_mib = baseline.get("peak_memory_mib", {}).get(size)
+        if base_mib and mib > base_mib * (1 + tolerance):
+            regressions.append(f"size={size}: peak memory {mib} MiB (baseline {base_mib} MiB)")
+    return regressions
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline latency / throughput / memory benchmarks.")
+    parser.add_argument("--sizes", type=_int_list, default=[10, 100, 500], help="result-set sizes, e.g. 10,100,500")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 8], help="concurrent sessions, e.g. 1,8")
+    parser.add_argument("--sessions", type=int, default=8, help="sessions per grid cell")
+    parser.add_argument("--arxiv-latency", type=float, default=0.05, help="seconds per arXiv request")
+    parser.add_argument("--llm-latency", type=float, default=0.02, help="seconds per LLM call")
+    parser.add_argument("--feeds-dir", help="serve recorded Atom feeds instead of synthetic ones")
+    parser.add_argument("--warm-cache", action="store_true", help="keep the arXiv search and LLM caches on")
+    parser.add_argument("--skip-foresee", action="store_true", help="stop every session after retrieval")
+    parser.add_argument("--fulltext", type=int, default=0, help="also time PDF ingestion of this many papers (needs pypdf)")
+    parser.add_argument("--output", help="write the JSON report here (e.g. a new baseline)")
+    parser.add_argument("--baseline", help="JSON report to compare against; exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed regression fraction")
+    parser.add_argument("--verbose", action="store_true", help="show tool output while running")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.ERROR)
+    report = asyncio.run(run_benchmarks(args))
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"[benchmarks] report written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report, baseline, args.tolerance)
+        for message in regressions:
+            print(f"[benchmarks] REGRESSION {message}")
+        if regressions:
+            return 1
+        print("[benchmarks] no regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+from typing import Optional, List, Dict, Any
+import hashlib
+import json
+import threading
+
+from core import config
+from core.sqlite_cache import SqliteCache
+
+
+class ArxivSearchCache(SqliteCache):
+    """
+    Persistent SQLite cache for arXiv search results.
+
+    Entries are keyed by the normalized query string, `max_results` and the
+    sort settings, so the same topic searched in another session (or after a
+    restart) is served from disk instead of the arXiv API. TTL, LRU eviction
+    and hit/miss counters come from `SqliteCache`.
+    """
+
+    TABLE = "search_cache"
+
+    # -------------------------------
+    # Keys
+    # -------------------------------
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Lower-case the query and collapse whitespace."""
+        return " ".join(query.lower().split())
+
+    @classmethod
+    def make_key(cls, query: str, max_results: Optional[int], sort_by: str, sort_order: str) -> str:
+        raw = json.dumps(
+            [cls.normalize_query(query), max_results, sort_by, sort_order],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def put(self, key: str, query: str, papers: List[Dict[str, Any]]) -> None:
+        """Store the papers found for `query` under `key`."""
+        super().put(key, self.normalize_query(query), papers)
+
+
+_search_cache: Optional[ArxivSearchCache] = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> Optional[ArxivSearchCache]:
+    """Return the process-wide search cache, or None when caching is disabled."""
+    global _search_cache
+    if not config.ARXIV_CACHE_ENABLED:
+        return None
+    with _search_cache_lock:
+        if _search_cache is None:
+            _search_cache = ArxivSearchCache(
+                path=config.ARXIV_CACHE_PATH,
+                ttl_seconds=config.ARXIV_CACHE_TTL_SECONDS,
+                max_entries=config.ARXIV_CACHE_MAX_ENTRIES,
+            )
+    return _search_cache
@@ -0,0 +1,250 @@
+from typing import Optional, Dict, Any, Callable, Tuple
+import logging
+import threading
+import time
+
+import arxiv
+import feedparser
+import requests
+from requests.adapters import HTTPAdapter
+
+from core import config
+
+
+logger = logging.getLogger(__name__)
+
+# arXiv answers with these when a client sends too much; they are retried after a pause.
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+# ============================================================================
+# Rate limiting and request coalescing
+# ============================================================================
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` requests per second, bursts up to `burst`.
+
+    `acquire` reserves the next token and sleeps until it is due, so callers
+    are served in arrival order. With `rate <= 0` nothing is limited.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self._lock = threading.Lock()
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self.acquired = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.wait_seconds = 0.0
+
+    def configure(self, rate: float, burst: int = 1) -> None:
+        with self._lock:
+            self.rate = rate
+            self.burst = max(1, burst)
+            self._tokens = min(self._tokens, float(self.burst))
+
+    def acquire(self) -> float:
+        """Take one token, waiting for it if needed; returns the seconds waited."""
+        with self._lock:
+            self.acquired += 1
+            if self.rate <= 0:
+                return 0.0
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            # A negative balance is a reservation: wait until the tokens ahead of us are repaid.
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            if wait:
+                self.waiting += 1
+                self.max_waiting = max(self.max_waiting, self.waiting)
+                self.wait_seconds += wait
+        if wait:
+            time.sleep(wait)
+            with self._lock:
+                self.waiting -= 1
+        return wait
+
+
+class _Call:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls for the same key into one.
+
+    While a call for `key` is running, further `do(key, ...)` calls wait for
+    it and get its result (or exception) instead of running their own.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Return `(value, shared)`; `shared` is True when another caller's result was reused."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+
+        try:
+            call.value = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.value, False
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+# ============================================================================
+# Shared client
+# ============================================================================
+class ArxivRequestError(arxiv.ArxivError):
+    """A request that failed without an HTTP status, e.g. a timeout or a dropped connection."""
+
+
+class SharedArxivClient(arxiv.Client):
+    """
+    `arxiv.Client` whose requests go through the process-wide access layer.
+
+    Instead of each client sleeping `delay_seconds` between its own
+    requests, every request in the process takes a token from one shared
+    bucket, so concurrent sessions, fanout workers and prefetches together
+    stay within arXiv's rate limit. Identical page requests that are in
+    flight at the same time are sent once (single flight), and all clients
+    share one pooled HTTP session.
+    """
+
+    def __init__(self, page_size: int, access: "ArxivAccess", num_retries: int = 3):
+        super().__init__(page_size=page_size, delay_seconds=0.0, num_retries=num_retries)
+        self._access = access
+        self._session = access.session
+        if config.ARXIV_API_URL:
+            self.query_url_format = config.ARXIV_API_URL + "?{}"
+
+    def _parse_feed(
+        self, url: str, first_page: bool = True, _try_index: int = 0
+    ) -> feedparser.FeedParserDict:
+        feed, _ = self._access.flights.do(url, lambda: self._fetch_feed(url, first_page))
+        return feed
+
+    def _fetch_feed(self, url: str, first_page: bool) -> feedparser.FeedParserDict:
+        """
+        Fetch and parse one page, retrying failed or throttled requests with backoff.
+
+        Once the retries are used up, the last failure is raised as an
+        `arxiv.ArxivError` (`ArxivRequestError` for timeouts and connection errors).
+        """
+        access = self._access
+        error: Exception = RuntimeError("no request made")
+        for attempt in range(self.num_retries + 1):
+            if attempt:
+                access.retries += 1
+                backoff = min(config.ARXIV_DELAY_SECONDS * 2 ** attempt, 60.0)
+                logger.info("arXiv request failed (%s), retrying in %.1fs", error, backoff)
+                time.sleep(backoff)
+            access.bucket.acquire()
+            access.requests += 1
+            try:
+                response = self._session.get(
+                    url, headers={"user-agent": "research-assistant-agent"}, timeout=config.ARXIV_TIMEOUT_SECONDS
+                )
+            except requests.exceptions.RequestException as exc:
+                error = exc
+            else:
+                if response.status_code == requests.codes.OK:
+                    feed = feedparser.parse(response.content)
+                    if feed.entries or first_page:
+                        return feed
+                    error = arxiv.UnexpectedEmptyPageError(url, attempt, feed)
+                elif response.status_code in _RETRY_STATUS:
+                    error = arxiv.HTTPError(url, attempt, response.status_code)
+                else:
+                    raise arxiv.HTTPError(url, attempt, response.status_code)
+        if isinstance(error, arxiv.ArxivError):
+            raise error
+        # Callers handle every failed search as one `arxiv.ArxivError`.
+        raise ArxivRequestError(url, self.num_retries, f"request failed: {error}") from error
+
+
+class ArxivAccess:
+    """Process-wide arXiv access state: rate limiter, in-flight requests and HTTP session."""
+
+    def __init__(self, rate: float, burst: int, pool_size: int):
+        self.bucket = TokenBucket(rate, burst)
+        self.flights = SingleFlight()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=max(1, pool_size))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.requests = 0
+        self.retries = 0
+
+    def client(self, page_size: int) -> SharedArxivClient:
+        return SharedArxivClient(page_size, self)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "coalesced": self.flights.coalesced,
+            "in_flight": self.flights.in_flight,
+            "queue_depth": self.bucket.waiting,
+            "max_queue_depth": self.bucket.max_waiting,
+            "wait_seconds": round(self.bucket.wait_seconds, 3),
+        }
+
+
+def _rate() -> float:
+    return 1.0 / config.ARXIV_DELAY_SECONDS if config.ARXIV_DELAY_SECONDS > 0 else 0.0
+
+
+_access: Optional[ArxivAccess] = None
+_access_lock = threading.Lock()
+
+
+def get_arxiv_access() -> ArxivAccess:
+    """Return the process-wide arXiv access layer, following the current rate settings."""
+    global _access
+    with _access_lock:
+        if _access is None:
+            _access = ArxivAccess(_rate(), config.ARXIV_RATE_BURST, config.ARXIV_POOL_SIZE)
+        else:
+            _access.bucket.configure(_rate(), config.ARXIV_RATE_BURST)
+    return _access
+
+
+def get_arxiv_client(page_size: int) -> SharedArxivClient:
+    """Create a client for one search; all clients share the access layer."""
+    return get_arxiv_access().client(page_size)
+
+
+def arxiv_client_stats() -> Dict[str, Any]:
+    return get_arxiv_access().stats()
@@ -0,0 +1,120 @@
+from typing import Optional, List, Dict, Iterable, Tuple
+from array import array
+import heapq
+import math
+import re
+
+from core.papers import Paper, PaperCollection, PaperView
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    """
+    a an and are as at be by for from has have in is it its of on or that the
+    their this to was we were which with our these those using use based via
+    """.split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case `text` and split it into index terms, dropping stopwords."""
+    return [
+        token
+        for token in _TOKEN_RE.findall(text.lower())
+        if len(token) > 1 and token not in _STOPWORDS
+    ]
+
+
+class BM25Index:
+    """
+    In-process BM25 inverted index over paper titles and abstracts.
+
+    Postings are stored per term as two parallel `array`s (document ids and
+    term frequencies), which keeps them compact and makes `add` cheap, so the
+    index can grow page by page while papers are still streaming in.
+    Title terms are counted `title_weight` times to favour title matches.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, title_weight: int = 2):
+        self.k1 = k1
+        self.b = b
+        self.title_weight = title_weight
+        self.papers = PaperCollection()
+        self._doc_ids: Dict[str, array] = {}
+        self._term_freqs: Dict[str, array] = {}
+        self._doc_lengths = array("I")
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.papers)
+
+    def add(self, papers: Iterable[Paper]) -> None:
+        """Index more papers; existing postings are only appended to."""
+        for paper in papers:
+            doc_id = len(self.papers)
+            self.papers.append(paper)
+
+            terms = tokenize(paper.title) * self.title_weight
+            terms += tokenize(paper.abstract)
+            counts: Dict[str, int] = {}
+            for term in terms:
+                counts[term] = counts.get(term, 0) + 1
+
+            for term, count in counts.items():
+                if term not in self._doc_ids:
+                    self._doc_ids[term] = array("I")
+                    self._term_freqs[term] = array("I")
+                self._doc_ids[term].append(doc_id)
+                self._term_freqs[term].append(count)
+
+            self._doc_lengths.append(len(terms))
+            self._total_length += len(terms)
+
+    def scores(self, query: str) -> Dict[int, float]:
+        """Return BM25 scores for every document matching at least one query term."""
+        n_docs = len(self.papers)
+        if not n_docs:
+            return {}
+        avg_length = self._total_length / n_docs or 1.0
+
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            doc_ids = self._doc_ids.get(term)
+            if doc_ids is None:
+                continue
+            idf = math.log(1 + (n_docs - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5))
+            for doc_id, tf in zip(doc_ids, self._term_freqs[term]):
+                norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, query: str, top_k: Optional[int] = None) -> List[Tuple[Paper, float]]:
+        """Return the `top_k` best-matching papers with their scores."""
+        scores = self.scores(query)
+        if top_k is None:
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        else:
+            ranked = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        return [(self.papers[doc_id], score) for doc_id, score in ranked]
+
+    def rerank(self, query: str, top_k: Optional[int] = None) -> PaperView:
+        """
+        Return a view of all indexed papers ordered by BM25 score against `query`.
+
+        Ties (including papers that match no query term) keep their original
+        order, so arXiv's own ranking is the fallback.
+        """
+        scores = self.scores(query)
+        order = sorted(range(len(self.papers)), key=lambda doc_id: -scores.get(doc_id, 0.0))
+        if top_k is not None:
+            order = order[:top_k]
+        return self.papers.view(order)
+
+
+def rerank_papers(
+    papers: Iterable[Paper], query: str, top_k: Optional[int] = None
+) -> PaperView:
+    """Build a throwaway index over `papers` and rerank them against `query`."""
+    index = BM25Index()
+    index.add(papers)
+    return index.rerank(query, top_k=top_k)
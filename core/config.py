@@ -0,0 +1,175 @@
+from typing import List
+import os
+
+
+# ============================================================================
+# Helper functions
+# ============================================================================
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _env_list(name: str) -> List[str]:
+    """Comma-separated list, e.g. `a, b,c` -> ["a", "b", "c"]."""
+    return [item.strip() for item in os.getenv(name, "").split(",") if item.strip()]
+
+
+# ============================================================================
+# Settings (override any of these in the environment or in `.env`)
+# ============================================================================
+CACHE_DIR = os.getenv("RESEARCH_ASSISTANT_CACHE_DIR", ".cache")
+
+# arXiv search cache
+ARXIV_CACHE_ENABLED = _env_bool("ARXIV_CACHE_ENABLED", True)
+ARXIV_CACHE_PATH = os.getenv("ARXIV_CACHE_PATH", os.path.join(CACHE_DIR, "arxiv_search.sqlite3"))
+ARXIV_CACHE_TTL_SECONDS = _env_float("ARXIV_CACHE_TTL_SECONDS", 24 * 60 * 60)
+ARXIV_CACHE_MAX_ENTRIES = _env_int("ARXIV_CACHE_MAX_ENTRIES", 500)
+
+# LLM response cache
+LLM_CACHE_ENABLED = _env_bool("LLM_CACHE_ENABLED", True)
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(CACHE_DIR, "llm_cache.sqlite3"))
+LLM_CACHE_TTL_SECONDS = _env_float("LLM_CACHE_TTL_SECONDS", 7 * 24 * 60 * 60)
+LLM_CACHE_MAX_ENTRIES = _env_int("LLM_CACHE_MAX_ENTRIES", 2000)
+# Agent names whose model calls always go to the LLM, e.g. "keywords_agent".
+LLM_CACHE_DISABLED_AGENTS = _env_list("LLM_CACHE_DISABLED_AGENTS")
+
+# arXiv API
+# Base query URL, e.g. a local stand-in server for benchmarks (empty = export.arxiv.org).
+ARXIV_API_URL = os.getenv("ARXIV_API_URL", "")
+# Pause between requests; arXiv asks clients for 3 seconds.
+ARXIV_DELAY_SECONDS = _env_float("ARXIV_DELAY_SECONDS", 3.0)
+# The delay is enforced process-wide: all sessions share one rate limiter, which
+# allows ARXIV_RATE_BURST back-to-back requests after an idle period.
+ARXIV_RATE_BURST = _env_int("ARXIV_RATE_BURST", 1)
+ARXIV_POOL_SIZE = _env_int("ARXIV_POOL_SIZE", 8)
+ARXIV_TIMEOUT_SECONDS = _env_float("ARXIV_TIMEOUT_SECONDS", 30.0)
+
+# Retrieval
+# "single": one OR-joined query; "fanout": one concurrent query per keyword.
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "single")
+RETRIEVAL_MAX_RESULTS = _env_int("RETRIEVAL_MAX_RESULTS", 10)
+FANOUT_RESULTS_PER_KEYWORD = _env_int("FANOUT_RESULTS_PER_KEYWORD", 10)
+FANOUT_MAX_WORKERS = _env_int("FANOUT_MAX_WORKERS", 4)
+RRF_K = _env_int("RRF_K", 60)
+ARXIV_PAGE_SIZE = _env_int("ARXIV_PAGE_SIZE", 100)
+# Papers listed after a direct retrieval; the full set stays in session state.
+RETRIEVAL_PREVIEW_SIZE = _env_int("RETRIEVAL_PREVIEW_SIZE", 20)
+# Query planning: plain keywords are searched in these arXiv fields ("" = all fields,
+# unscoped) and OR-ed ("any") or AND-ed ("all"); QUERY_CATEGORIES (e.g. "cs.LG,stat.ML")
+# applies when the user gave no categories.
+QUERY_FIELDS = _env_list("QUERY_FIELDS") if os.getenv("QUERY_FIELDS") is not None else ["ti", "abs"]
+QUERY_MATCH = os.getenv("QUERY_MATCH", "any")
+QUERY_CATEGORIES = _env_list("QUERY_CATEGORIES")
+# Tools give the agents a result handle (counts and the top RESULT_HANDLE_TOP_N titles)
+# instead of the papers; `list_papers` pages through them, `get_paper_details` opens a few.
+RESULT_HANDLE_TOP_N = _env_int("RESULT_HANDLE_TOP_N", 5)
+RESULT_PAGE_SIZE = _env_int("RESULT_PAGE_SIZE", 10)
+RESULT_PAGE_MAX = _env_int("RESULT_PAGE_MAX", 25)
+RESULT_ABSTRACT_CHARS = _env_int("RESULT_ABSTRACT_CHARS", 300)
+RESULT_DETAILS_MAX = _env_int("RESULT_DETAILS_MAX", 5)
+# Re-rank retrieved papers locally with BM25 against the user's query.
+RERANK_ENABLED = _env_bool("RERANK_ENABLED", True)
+# Start arXiv searches in the background for draft keywords during refinement.
+PREFETCH_ENABLED = _env_bool("PREFETCH_ENABLED", True)
+PREFETCH_MAX_WORKERS = _env_int("PREFETCH_MAX_WORKERS", 2)
+# Call the retrieval tool directly and list the papers locally; the retrieval
+# agent's LLM is only used when the user asks for a narrative summary.
+RETRIEVAL_FAST_PATH = _env_bool("RETRIEVAL_FAST_PATH", True)
+
+# Foresee
+# Only the top-k most relevant papers are analyzed (0 = all).
+FORESEE_TOP_K = _env_int("FORESEE_TOP_K", 50)
+# Approximate token budget for the papers sent to the foresee agent (0 = no limit).
+FORESEE_TOKEN_BUDGET = _env_int("FORESEE_TOKEN_BUDGET", 12000)
+# Above FORESEE_BATCH_SIZE papers, analyze batches in parallel and merge the notes.
+FORESEE_MAP_REDUCE = _env_bool("FORESEE_MAP_REDUCE", True)
+FORESEE_BATCH_SIZE = _env_int("FORESEE_BATCH_SIZE", 50)
+FORESEE_MAP_CONCURRENCY = _env_int("FORESEE_MAP_CONCURRENCY", 4)
+# Above FORESEE_PREANALYSIS_MIN_PAPERS papers, send TF-IDF clusters and rising terms
+# instead of abstracts (needs the optional numpy/scipy "analysis" extra).
+FORESEE_PREANALYSIS = _env_bool("FORESEE_PREANALYSIS", True)
+FORESEE_PREANALYSIS_MIN_PAPERS = _env_int("FORESEE_PREANALYSIS_MIN_PAPERS", 30)
+FORESEE_MAX_CLUSTERS = _env_int("FORESEE_MAX_CLUSTERS", 8)
+# Terms are "rising" when they are more common in the last N publication years.
+TREND_RECENT_YEARS = _env_int("TREND_RECENT_YEARS", 2)
+# Start the analysis in the background while the user is still at the "Press Enter" prompt.
+SPECULATIVE_FORESEE = _env_bool("SPECULATIVE_FORESEE", False)
+
+# Full text (optional, needs the "fulltext" extra)
+# Before the analysis, download and extract the PDFs of the top FULLTEXT_MAX_PAPERS papers;
+# the foresee agent can then read their sections.
+FULLTEXT_ENABLED = _env_bool("FULLTEXT_ENABLED", False)
+FULLTEXT_MAX_PAPERS = _env_int("FULLTEXT_MAX_PAPERS", 20)
+FULLTEXT_CACHE_DIR = os.getenv("FULLTEXT_CACHE_DIR", os.path.join(CACHE_DIR, "fulltext"))
+FULLTEXT_DOWNLOAD_WORKERS = _env_int("FULLTEXT_DOWNLOAD_WORKERS", 4)
+# PDF downloads from arxiv.org have their own rate limit, apart from the API's (0 = unlimited).
+FULLTEXT_DOWNLOAD_DELAY_SECONDS = _env_float("FULLTEXT_DOWNLOAD_DELAY_SECONDS", 1.0)
+# Text extraction is CPU-bound and runs in this many processes (0 = in threads).
+FULLTEXT_EXTRACT_WORKERS = _env_int("FULLTEXT_EXTRACT_WORKERS", min(4, os.cpu_count() or 1))
+FULLTEXT_CHUNK_CHARS = _env_int("FULLTEXT_CHUNK_CHARS", 2000)
+FULLTEXT_MAX_PDF_MB = _env_float("FULLTEXT_MAX_PDF_MB", 25.0)
+# Download PDFs from `<base>/<arxiv id>` instead of each paper's pdf_url (e.g. a mirror or local server).
+FULLTEXT_PDF_BASE_URL = os.getenv("FULLTEXT_PDF_BASE_URL", "")
+
+# Storage
+# SQLAlchemy URL of the session database, or "memory" for in-process sessions.
+SESSION_DB_URL = os.getenv("SESSION_DB_URL", f"sqlite+aiosqlite:///{os.path.join(CACHE_DIR, 'sessions.sqlite3')}")
+# Papers are stored once here; session state only keeps their ids.
+PAPER_STORE_PATH = os.getenv("PAPER_STORE_PATH", os.path.join(CACHE_DIR, "papers.sqlite3"))
+# Saved topics (keywords, watermark, latest summary) for `refresh.py`.
+TOPIC_STORE_PATH = os.getenv("TOPIC_STORE_PATH", os.path.join(CACHE_DIR, "topics.sqlite3"))
+
+# Topic refresh
+# Size of a topic's first fetch; later refreshes fetch everything since the watermark.
+TOPIC_REFRESH_MAX_RESULTS = _env_int("TOPIC_REFRESH_MAX_RESULTS", 200)
+
+# Service mode (server.py)
+SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+SERVER_PORT = _env_int("SERVER_PORT", 8000)
+# Sessions run at the same time; further clients wait, up to SERVER_MAX_WAITING of them.
+SERVER_MAX_SESSIONS = _env_int("SERVER_MAX_SESSIONS", 16)
+SERVER_MAX_WAITING = _env_int("SERVER_MAX_WAITING", 64)
+# Messages buffered per connection in each direction before the session is dropped.
+SERVER_QUEUE_SIZE = _env_int("SERVER_QUEUE_SIZE", 256)
+# A session waiting this long for the user's answer is ended.
+SERVER_INPUT_TIMEOUT_SECONDS = _env_float("SERVER_INPUT_TIMEOUT_SECONDS", 15 * 60)
+# Signs the user tokens the server issues. Empty = a random secret per process, so
+# tokens (and with them resuming saved sessions) do not survive a restart.
+SERVER_SECRET = os.getenv("SERVER_SECRET", "")
+
+# Observability
+# Per-session metrics records are appended here; set to "" to disable.
+METRICS_JSONL_PATH = os.getenv("METRICS_JSONL_PATH", "metrics.jsonl")
+# Prometheus text-format snapshot (e.g. for node_exporter's textfile collector); "" disables.
+METRICS_PROM_PATH = os.getenv("METRICS_PROM_PATH", "")
+# Per-session records kept in memory; the least recently updated are dropped beyond this.
+METRICS_MAX_SESSIONS = _env_int("METRICS_MAX_SESSIONS", 1000)
+
+# Logging
+# Records are queued and written by a background thread, rotating at LOG_MAX_BYTES.
+LOG_PATH = os.getenv("LOG_PATH", "research_assistant.log")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+# "json" (one object per line) or "text".
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_MAX_BYTES = _env_int("LOG_MAX_BYTES", 10 * 1024 * 1024)
+LOG_BACKUP_COUNT = _env_int("LOG_BACKUP_COUNT", 5)
+# Records waiting to be written; beyond this they are dropped (and counted).
+LOG_QUEUE_SIZE = _env_int("LOG_QUEUE_SIZE", 10000)
+# Fraction of DEBUG/INFO records kept per logger; warnings and errors are always kept.
+LOG_SAMPLE_RATE = _env_float("LOG_SAMPLE_RATE", 1.0)
+# Tool output shown in the console is cut to about this many characters
+# (0 = no limit); with LOG_LEVEL=DEBUG the full payload is written to the log.
+TOOL_OUTPUT_MAX_CHARS = _env_int("TOOL_OUTPUT_MAX_CHARS", 800)
@@ -0,0 +1,115 @@
+from typing import List, Any, AsyncIterator
+import asyncio
+import logging
+
+from google.genai import types
+
+from core.paper_store import PAPER_IDS_KEY
+
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# Map-reduce foresee analysis
+# ============================================================================
+async def _map_batch(
+    session_service,
+    map_runner,
+    app_name: str,
+    user_id: str,
+    batch_session_id: str,
+    batch_ids: List[str],
+    keywords_str: str,
+) -> str:
+    """Analyze one batch of papers in its own scratch session and return the notes."""
+    await session_service.create_session(
+        app_name=app_name,
+        user_id=user_id,
+        session_id=batch_session_id,
+        state={PAPER_IDS_KEY: batch_ids},
+    )
+    prompt = (
+        "Call `get_retrieved_papers` and write compact analysis notes for this batch of papers. "
+        f"The search keywords were: {keywords_str}."
+    )
+    notes: List[str] = []
+    try:
+        async for event in map_runner.run_async(
+            user_id=user_id,
+            session_id=batch_session_id,
+            new_message=types.Content(parts=[types.Part(text=prompt)]),
+        ):
+            if event.is_final_response() and event.content and event.content.parts:
+                notes.extend(part.text for part in event.content.parts if part.text)
+    finally:
+        await session_service.delete_session(
+            app_name=app_name, user_id=user_id, session_id=batch_session_id
+        )
+    return "\n".join(notes)
+
+
+async def run_foresee_map_reduce(
+    session_service,
+    map_runner,
+    reduce_runner,
+    app_name: str,
+    user_id: str,
+    session_id: str,
+    paper_ids: List[str],
+    keywords_str: str,
+    batch_size: int,
+    concurrency: int,
+) -> AsyncIterator[Any]:
+    """
+    Run the foresee analysis as map-reduce over the papers in `paper_ids`.
+
+    Map: papers are split into batches of `batch_size`, and each batch is
+    analyzed by `map_runner` in a throwaway session, with at most
+    `concurrency` batches in flight at once.
+    Reduce: the per-batch notes are merged by `reduce_runner` in the main
+    session. Its events are yielded, so callers can render them the same way
+    as a single-pass foresee run.
+    """
+    batches = [paper_ids[start:start + batch_size] for start in range(0, len(paper_ids), batch_size)]
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    done = 0
+
+    async def map_one(index: int, batch: List[str]) -> str:
+        nonlocal done
+        async with semaphore:
+            notes = await _map_batch(
+                session_service,
+                map_runner,
+                app_name,
+                user_id,
+                f"{session_id}_map{index}",
+                batch,
+                keywords_str,
+            )
+        done += 1
+        logger.info("analyzed batch %d/%d", done, len(batches))
+        return notes
+
+    logger.info(
+        "analyzing %d papers in %d batches", len(paper_ids), len(batches),
+        extra={"papers": len(paper_ids), "batches": len(batches)},
+    )
+    batch_notes = await asyncio.gather(*(map_one(i, batch) for i, batch in enumerate(batches)))
+
+    sections = "\n\n".join(
+        f"### Batch {i + 1} ({len(batch)} papers)\n{notes or '(no notes)'}"
+        for i, (batch, notes) in enumerate(zip(batches, batch_notes))
+    )
+    reduce_prompt = (
+        f"The confirmed search keywords were: {keywords_str}. "
+        f"{len(paper_ids)} papers were analyzed in {len(batches)} batches. "
+        "Merge the batch notes below into one analysis.\n\n"
+        f"{sections}"
+    )
+    async for event in reduce_runner.run_async(
+        user_id=user_id,
+        session_id=session_id,
+        new_message=types.Content(parts=[types.Part(text=reduce_prompt)]),
+    ):
+        yield event
@@ -0,0 +1,142 @@
+from typing import Optional, List, Dict, Any, Sequence, Set
+import hashlib
+import re
+
+from core.papers import Paper
+from core.result_pages import short_id
+
+
+_WORD_RE = re.compile(r"\w+")
+_MAX_HASH = (1 << 64) - 1
+
+
+# ============================================================================
+# Near-duplicate detection (MinHash + LSH)
+# ============================================================================
+def _shingle_hashes(text: str, size: int = 3) -> Set[int]:
+    """Hash every run of `size` consecutive words in `text` to a 64-bit int."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < size:
+        words = words + [""] * (size - len(words))
+    return {
+        int.from_bytes(
+            hashlib.blake2b(" ".join(words[i:i + size]).encode("utf-8"), digest_size=8).digest(),
+            "big",
+        )
+        for i in range(len(words) - size + 1)
+    }
+
+
+def minhash_signature(text: str, num_bins: int = 64) -> List[int]:
+    """
+    One-permutation MinHash signature of `text`.
+
+    Each shingle is hashed once and assigned to a bin; the signature keeps the
+    minimum per bin. This costs one hash per shingle instead of one per
+    shingle and permutation, and the signature still supports LSH banding.
+    """
+    signature = [_MAX_HASH] * num_bins
+    for value in _shingle_hashes(text):
+        slot = value % num_bins
+        if value < signature[slot]:
+            signature[slot] = value
+    return signature
+
+
+def _estimated_jaccard(a: List[int], b: List[int]) -> float:
+    filled = [(x, y) for x, y in zip(a, b) if x != _MAX_HASH or y != _MAX_HASH]
+    if not filled:
+        return 1.0
+    return sum(1 for x, y in filled if x == y) / len(filled)
+
+
+def find_near_duplicates(
+    texts: List[str], threshold: float = 0.8, bands: int = 16, rows: int = 4
+) -> Set[int]:
+    """
+    Return the indices of texts that near-duplicate an earlier text.
+
+    Candidate pairs come from LSH buckets over `bands` x `rows` signature
+    slices and are confirmed by the estimated Jaccard similarity, so the
+    first (highest-ranked) copy of every near-duplicate group is kept.
+    """
+    signatures = [minhash_signature(text, num_bins=bands * rows) for text in texts]
+    buckets: Dict[tuple, List[int]] = {}
+    duplicates: Set[int] = set()
+
+    for index, signature in enumerate(signatures):
+        if not texts[index].strip():
+            continue
+        candidates: Set[int] = set()
+        for band in range(bands):
+            key = (band, tuple(signature[band * rows:(band + 1) * rows]))
+            bucket = buckets.setdefault(key, [])
+            candidates.update(bucket)
+            bucket.append(index)
+        for other in candidates:
+            if other in duplicates:
+                continue
+            if _estimated_jaccard(signature, signatures[other]) >= threshold:
+                duplicates.add(index)
+                break
+    return duplicates
+
+
+# ============================================================================
+# Payload builder
+# ============================================================================
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)."""
+    return len(text) // 4 + 1
+
+
+def _compact_paper(paper: Paper) -> Dict[str, Any]:
+    """Keep only the fields the analysis needs, in their shortest useful form."""
+    return {
+        "id": short_id(paper.entry_id),
+        "title": paper.title,
+        "year": paper.year,
+        "authors": paper.short_authors(),
+        "abstract": paper.abstract,
+    }
+
+
+def build_foresee_payload(
+    papers: Sequence[Paper],
+    token_budget: int,
+    top_k: Optional[int] = None,
+    duplicate_threshold: float = 0.8,
+) -> Dict[str, Any]:
+    """
+    Build the paper payload for the foresee agent.
+
+    `papers` must already be in relevance order. Near-duplicate abstracts are
+    dropped first, then the top-k compact records are added in order until
+    the next one would exceed `token_budget`.
+    """
+    duplicates = find_near_duplicates(
+        [paper.abstract or paper.title for paper in papers],
+        threshold=duplicate_threshold,
+    )
+    unique = [paper for index, paper in enumerate(papers) if index not in duplicates]
+    candidates = unique[:top_k] if top_k else unique
+
+    included: List[Dict[str, Any]] = []
+    used_tokens = 0
+    for paper in candidates:
+        compact = _compact_paper(paper)
+        cost = estimate_tokens(" ".join(str(value) for value in compact.values() if value))
+        if token_budget > 0 and used_tokens + cost > token_budget:
+            break
+        included.append(compact)
+        used_tokens += cost
+
+    return {
+        "status": "success",
+        "total": len(papers),
+        "included": len(included),
+        "dropped_duplicates": len(duplicates),
+        "omitted": len(unique) - len(included),
+        "estimated_tokens": used_tokens,
+        "papers": included,
+    }
@@ -0,0 +1,488 @@
+from typing import TYPE_CHECKING, Optional, List, Dict, Any, Sequence, Tuple
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+import argparse
+import atexit
+import gzip
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import re
+import threading
+import time
+
+try:  # Optional: `pip install research-assitant-agent[fulltext]`
+    from pypdf import PdfReader
+except ImportError:  # pragma: no cover - depends on the environment
+    PdfReader = None
+
+import requests
+
+from core import config
+from core.papers import Paper
+
+if TYPE_CHECKING:
+    from core.arxiv_client import TokenBucket
+
+
+logger = logging.getLogger(__name__)
+
+# Download responses that are retried after a pause.
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+def fulltext_available() -> bool:
+    """True when pypdf is installed, so PDFs can be read."""
+    return PdfReader is not None
+
+
+def paper_key(entry_id: str) -> str:
+    """Versioned arXiv id used as the cache key: `http://arxiv.org/abs/2401.01234v2` -> `2401.01234v2`."""
+    return entry_id.split("/abs/", 1)[-1]
+
+
+# ============================================================================
+# Text extraction and sections (runs in worker processes)
+# ============================================================================
+_HEADING_NAMES = (
+    "abstract|introduction|related work|background|preliminaries|problem (?:setup|statement|formulation)"
+    "|methods?|methodology|approach|proposed method|model|framework|experiments?|experimental (?:setup|results)"
+    "|evaluation|results(?: and discussion)?|analysis|discussion|limitations|conclusions?(?: and future work)?"
+    "|future work|references|bibliography|acknowledge?ments|appendix"
+)
+# "3 Method", "3. Method", "III. METHOD", or a bare well-known heading on its own line.
+_HEADING_RE = re.compile(
+    rf"^(?:(?:\d{{1,2}}|[IVX]{{1,5}})\.?\s+(?=[A-Z])(?P<numbered>[A-Za-z][A-Za-z ,:&-]{{2,60}})|(?P<named>{_HEADING_NAMES}))\s*$",
+    re.IGNORECASE,
+)
+_END_SECTIONS = {"references", "bibliography", "acknowledgements", "acknowledgments", "appendix"}
+
+
+def _normalize(text: str) -> str:
+    # Re-join words hyphenated at line ends and collapse runs of spaces.
+    text = re.sub(r"(\w)-\n(\w)", r"\1\2", text)
+    return re.sub(r"[ \t]+", " ", text)
+
+
+def _chunks(text: str, chunk_chars: int) -> List[str]:
+    """Split `text` into chunks of at most about `chunk_chars`, at paragraph or sentence ends."""
+    paragraphs = [" ".join(block.split()) for block in re.split(r"\n\s*\n", text)]
+    pieces: List[str] = []
+    for paragraph in filter(None, paragraphs):
+        while len(paragraph) > chunk_chars:
+            cut = paragraph.rfind(". ", 0, chunk_chars)
+            cut = cut + 1 if cut > chunk_chars // 2 else chunk_chars
+            pieces.append(paragraph[:cut].strip())
+            paragraph = paragraph[cut:].strip()
+        pieces.append(paragraph)
+    chunks: List[str] = []
+    for piece in pieces:
+        if chunks and len(chunks[-1]) + len(piece) + 2 <= chunk_chars:
+            chunks[-1] += "\n\n" + piece
+        else:
+            chunks.append(piece)
+    return chunks
+
+
+def split_sections(text: str, chunk_chars: int = 2000) -> List[Dict[str, Any]]:
+    """
+    Split extracted paper text at its section headings.
+
+    Returns `[{"title", "chunks": [...]}, ...]` in document order. Text
+    before the first heading is kept as "Front matter"; everything from the
+    references (or acknowledgements / appendix) on is dropped.
+    """
+    sections: List[Tuple[str, List[str]]] = [("Front matter", [])]
+    for line in _normalize(text).splitlines():
+        stripped = line.strip()
+        match = _HEADING_RE.match(stripped) if len(stripped) <= 70 else None
+        if match:
+            title = " ".join((match.group("numbered") or match.group("named")).split()).title()
+            if title.lower() in _END_SECTIONS:
+                break
+            sections.append((title, []))
+        else:
+            sections[-1][1].append(line)
+    result = []
+    for title, lines in sections:
+        chunks = _chunks("\n".join(lines), chunk_chars)
+        if chunks:
+            result.append({"title": title, "chunks": chunks})
+    return result
+
+
+def extract_document(pdf: bytes, chunk_chars: int = 2000) -> Dict[str, Any]:
+    """Extract the text of one PDF and split it into section chunks (CPU-bound; run in a worker process)."""
+    reader = PdfReader(io.BytesIO(pdf))
+    pages = [page.extract_text() or "" for page in reader.pages]
+    sections = split_sections("\n".join(pages), chunk_chars)
+    return {
+        "pages": len(pages),
+        "chars": sum(len(chunk) for section in sections for chunk in section["chunks"]),
+        "sections": sections,
+    }
+
+
+# ============================================================================
+# Content-addressed cache
+# ============================================================================
+class FullTextCache:
+    """
+    On-disk cache of extracted full text.
+
+    Documents are stored once per PDF content under `objects/<sha256>`
+    (gzipped JSON), and `refs/<key>` maps a versioned arXiv id to the
+    digest of its PDF. arXiv never changes a published version, so entries
+    need no expiry; identical PDFs under several ids share one object.
+    Writes go through a temporary file and `os.replace`, so concurrent
+    processes never see a partial entry.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.join(path, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(path, "refs"), exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.path, "objects", digest[:2], f"{digest}.json.gz")
+
+    def _ref_path(self, key: str) -> str:
+        return os.path.join(self.path, "refs", key.replace("/", "_"))
+
+    @staticmethod
+    def _write(path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def has_object(self, digest: str) -> bool:
+        return os.path.exists(self._object_path(digest))
+
+    def contains(self, key: str) -> bool:
+        """Whether `key` is cached, without loading the document."""
+        try:
+            with open(self._ref_path(key), encoding="utf-8") as f:
+                return self.has_object(f.read().strip())
+        except FileNotFoundError:
+            return False
+
+    def get_object(self, digest: str) -> Optional[Dict[str, Any]]:
+        try:
+            with gzip.open(self._object_path(digest), "rt", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """The document cached for `key`, or None."""
+        try:
+            with open(self._ref_path(key), encoding="utf-8") as f:
+                digest = f.read().strip()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        document = self.get_object(digest)
+        if document is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return document
+
+    def put(self, key: str, digest: str, document: Optional[Dict[str, Any]] = None) -> None:
+        """Point `key` at `digest`, storing `document` first unless that content is cached already."""
+        if document is not None and not self.has_object(digest):
+            payload = dict(document, digest=digest)
+            self._write(self._object_path(digest), gzip.compress(json.dumps(payload).encode("utf-8")))
+        self._write(self._ref_path(key), digest.encode("utf-8"))
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_cache: Optional[FullTextCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_fulltext_cache() -> FullTextCache:
+    """Return the process-wide full-text cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = FullTextCache(config.FULLTEXT_CACHE_DIR)
+    return _cache
+
+
+# ============================================================================
+# Ingestion
+# ============================================================================
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _extract_pool() -> Optional[ProcessPoolExecutor]:
+    """Worker processes for extraction, started on first use (None = extract in threads)."""
+    global _pool
+    if config.FULLTEXT_EXTRACT_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # "spawn": forking a process that runs an event loop and threads is not safe.
+            _pool = ProcessPoolExecutor(
+                max_workers=config.FULLTEXT_EXTRACT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            atexit.register(_pool.shutdown, cancel_futures=True)
+    return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    """Forget a broken pool so the next ingestion starts fresh worker processes."""
+    global _pool
+    logger.warning("full-text extraction pool broke; extracting in threads")
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+_download_bucket: Optional["TokenBucket"] = None
+_download_bucket_lock = threading.Lock()
+
+
+def get_download_bucket() -> Optional["TokenBucket"]:
+    """
+    Return the process-wide rate limiter for PDF downloads from arxiv.org.
+
+    It is separate from the API's bucket, so downloads neither wait behind
+    nor delay the searches of other sessions. PDFs from a mirror
+    (FULLTEXT_PDF_BASE_URL) are not limited: None.
+    """
+    global _download_bucket
+    if config.FULLTEXT_PDF_BASE_URL:
+        return None
+    from core.arxiv_client import TokenBucket
+
+    delay = config.FULLTEXT_DOWNLOAD_DELAY_SECONDS
+    rate = 1.0 / delay if delay > 0 else 0.0
+    burst = max(1, config.FULLTEXT_DOWNLOAD_WORKERS)
+    with _download_bucket_lock:
+        if _download_bucket is None:
+            _download_bucket = TokenBucket(rate, burst)
+        else:
+            _download_bucket.configure(rate, burst)
+    return _download_bucket
+
+
+def pdf_url(paper: Paper) -> Optional[str]:
+    """Where to download `paper`'s PDF; FULLTEXT_PDF_BASE_URL points at a mirror or local server."""
+    if config.FULLTEXT_PDF_BASE_URL:
+        return f"{config.FULLTEXT_PDF_BASE_URL.rstrip('/')}/{paper_key(paper.entry_id)}"
+    return paper.pdf_url
+
+
+def download_pdf(
+    session: requests.Session,
+    url: str,
+    max_bytes: int,
+    retries: int = 2,
+    bucket: Optional["TokenBucket"] = None,
+) -> bytes:
+    """
+    Download one PDF, retrying throttled or failed requests; refuses files over `max_bytes`.
+
+    Every attempt first takes a token from `bucket` (see `get_download_bucket`).
+    """
+    for attempt in range(retries + 1):
+        last = attempt == retries
+        if bucket is not None:
+            bucket.acquire()
+        try:
+            with session.get(url, timeout=config.ARXIV_TIMEOUT_SECONDS, stream=True) as response:
+                if last or response.status_code not in _RETRY_STATUS:
+                    response.raise_for_status()
+                    data = bytearray()
+                    for block in response.iter_content(64 * 1024):
+                        data.extend(block)
+                        if len(data) > max_bytes:
+                            raise ValueError(f"PDF larger than {max_bytes} bytes")
+                    return bytes(data)
+        except requests.exceptions.ConnectionError:
+            if last:
+                raise
+        time.sleep(min(2.0 ** (attempt + 1), 30.0))
+
+
+def ingest_papers(papers: Sequence[Paper], cache: Optional[FullTextCache] = None) -> Dict[str, Any]:
+    """
+    Make the full text of `papers` available in the cache.
+
+    Cached papers are skipped. The rest are downloaded concurrently
+    (FULLTEXT_DOWNLOAD_WORKERS threads, paced by the PDF download bucket)
+    and, as each download finishes, handed to a process pool
+    (FULLTEXT_EXTRACT_WORKERS processes) for text extraction, so downloads
+    and extraction overlap. A PDF whose content is already cached under
+    another id is not extracted again. If a worker process dies, the PDFs
+    it left unfinished and the remaining ones are extracted in threads.
+
+    Returns counts plus `failed` ({entry_id: error}); failures never stop
+    the other papers.
+    """
+    if not fulltext_available():
+        raise RuntimeError("Full-text ingestion needs pypdf: pip install 'research-assitant-agent[fulltext]'")
+    cache = cache or get_fulltext_cache()
+    started = time.perf_counter()
+    summary: Dict[str, Any] = {"papers": len(papers), "cached": 0, "downloaded": 0, "extracted": 0, "failed": {}}
+    missing = []
+    for paper in papers:
+        if cache.contains(paper_key(paper.entry_id)):
+            summary["cached"] += 1
+        elif pdf_url(paper):
+            missing.append(paper)
+        else:
+            summary["failed"][paper.entry_id] = "no PDF link"
+
+    if missing:
+        from core.arxiv_client import get_arxiv_access
+
+        session = get_arxiv_access().session
+        bucket = get_download_bucket()
+        max_bytes = int(config.FULLTEXT_MAX_PDF_MB * 1024 * 1024)
+        pool = _extract_pool()
+        workers = max(1, min(len(missing), config.FULLTEXT_DOWNLOAD_WORKERS))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pdf-download") as downloads:
+            pending = {
+                downloads.submit(download_pdf, session, pdf_url(paper), max_bytes, bucket=bucket): paper
+                for paper in missing
+            }
+            extractions: Dict[Future, str] = {}
+            # Keys waiting for each PDF content being extracted, so equal PDFs are extracted once.
+            waiting: Dict[str, List[str]] = {}
+            # PDFs handed to worker processes, kept until done in case a worker dies.
+            in_process: Dict[str, bytes] = {}
+
+            def extract(digest: str, pdf: bytes) -> None:
+                nonlocal pool
+                if pool is not None:
+                    try:
+                        extractions[pool.submit(extract_document, pdf, config.FULLTEXT_CHUNK_CHARS)] = digest
+                        in_process[digest] = pdf
+                        return
+                    except BrokenProcessPool:
+                        _discard_pool(pool)
+                        pool = None
+                extractions[downloads.submit(extract_document, pdf, config.FULLTEXT_CHUNK_CHARS)] = digest
+
+            for future in as_completed(pending):
+                paper = pending[future]
+                try:
+                    pdf = future.result()
+                except Exception as exc:
+                    summary["failed"][paper.entry_id] = f"download failed: {exc}"
+                    continue
+                summary["downloaded"] += 1
+                digest = hashlib.sha256(pdf).hexdigest()
+                if cache.has_object(digest):
+                    cache.put(paper_key(paper.entry_id), digest)
+                    continue
+                if digest not in waiting:
+                    extract(digest, pdf)
+                waiting.setdefault(digest, []).append(paper.entry_id)
+
+            while extractions:
+                current, extractions = extractions, {}
+                for future in as_completed(current):
+                    digest = current[future]
+                    pdf = in_process.pop(digest, None)
+                    try:
+                        document = future.result()
+                    except BrokenProcessPool:
+                        # A worker died (e.g. killed for memory) with this PDF in flight: retry it,
+                        # in a thread now that the pool is gone.
+                        if pool is not None:
+                            _discard_pool(pool)
+                            pool = None
+                        extract(digest, pdf)
+                        continue
+                    except Exception as exc:
+                        for entry_id in waiting[digest]:
+                            summary["failed"][entry_id] = f"extraction failed: {exc}"
+                        continue
+                    for entry_id in waiting[digest]:
+                        cache.put(paper_key(entry_id), digest, document)
+                    summary["extracted"] += 1
+
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+    logger.info(
+        "ingested full text: %d cached, %d downloaded, %d extracted, %d failed in %.2fs",
+        summary["cached"], summary["downloaded"], summary["extracted"], len(summary["failed"]), summary["seconds"],
+        extra={key: value for key, value in summary.items() if key != "failed"},
+    )
+    return summary
+
+
+# ============================================================================
+# Reading
+# ============================================================================
+def section_titles(entry_id: str, cache: Optional[FullTextCache] = None) -> List[str]:
+    """Titles of the cached sections of a paper (empty when its full text is not cached)."""
+    document = (cache or get_fulltext_cache()).get(paper_key(entry_id))
+    return [section["title"] for section in document["sections"]] if document else []
+
+
+def read_section(
+    entry_id: str, section: str = "", chunk: int = 0, cache: Optional[FullTextCache] = None
+) -> Dict[str, Any]:
+    """
+    One chunk of a cached paper section.
+
+    `section` is matched case-insensitively against the section titles
+    (a prefix is enough, e.g. "conclusion"); empty means the first section.
+    """
+    document = (cache or get_fulltext_cache()).get(paper_key(entry_id))
+    if document is None:
+        return {"status": "error", "error": "The full text of this paper has not been read."}
+    titles = [item["title"] for item in document["sections"]]
+    wanted = section.strip().lower()
+    found = next(
+        (item for item in document["sections"] if not wanted or item["title"].lower().startswith(wanted)),
+        None,
+    )
+    if found is None:
+        return {"status": "error", "error": f"No section {section!r}.", "sections": titles}
+    chunks = found["chunks"]
+    chunk = min(max(chunk, 0), len(chunks) - 1)
+    return {
+        "status": "success",
+        "section": found["title"],
+        "chunk": chunk,
+        "chunks": len(chunks),
+        "text": chunks[chunk],
+        "sections": titles,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Extract the text of a PDF and show its sections.")
+    parser.add_argument("pdf", help="path to a PDF file")
+    args = parser.parse_args()
+    with open(args.pdf, "rb") as f:
+        document = extract_document(f.read(), config.FULLTEXT_CHUNK_CHARS)
+    print(f"{document['pages']} pages, {document['chars']} characters")
+    for section in document["sections"]:
+        print(f"- {section['title']}: {len(section['chunks'])} chunk(s), {sum(map(len, section['chunks']))} characters")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+from typing import TYPE_CHECKING, Optional, List, Dict, Any, Callable, Awaitable
+import time
+
+from core.orchestrator import new_session_id, run_orchestrator_session
+from core.paper_store import session_paper_ids
+
+if TYPE_CHECKING:
+    from observability.metrics_plugin import MetricsPlugin
+
+
+# ============================================================================
+# Scripted user
+# ============================================================================
+def auto_confirm_input(
+    topic: str, max_refinements: int = 2, run_foresee: bool = True
+) -> Callable[[str], Awaitable[str]]:
+    """
+    Build an `input_fn` that plays the user for a non-interactive session.
+
+    It describes `topic`, confirms whatever keywords the keywords agent
+    proposes (giving up after `max_refinements` tries), and then either
+    starts or skips the foresee phase.
+    """
+    refinements = 0
+
+    async def respond(prompt: str) -> str:
+        nonlocal refinements
+        if prompt.startswith("You >"):
+            return topic
+        if "keyword refinement" in prompt:
+            refinements += 1
+            if refinements > max_refinements:
+                return "exit"
+            return "Yes, I confirm these keywords."
+        if prompt.startswith("Press Enter"):
+            return "" if run_foresee else "skip"
+        return ""
+
+    return respond
+
+
+# ============================================================================
+# Headless session
+# ============================================================================
+async def run_headless_session(
+    topic: str,
+    session_service,
+    runners: Dict[str, Any],
+    app_name: str,
+    user_id: str,
+    max_refinements: int = 2,
+    run_foresee: bool = True,
+    metrics: Optional["MetricsPlugin"] = None,
+) -> Dict[str, Any]:
+    """
+    Run one research session for `topic` without a terminal.
+
+    Returns a JSON-serializable record with the session id (also when the
+    session failed), the confirmed keywords, the number of retrieved papers,
+    the captured transcript and the wall time, plus the session's metrics
+    record when `metrics` is given.
+    """
+    transcript: List[str] = []
+    started = time.perf_counter()
+    # Chosen up front, so a failed session can still be looked up and its metrics reported.
+    session_id: Optional[str] = new_session_id()
+    error: Optional[str] = None
+    try:
+        session_id = await run_orchestrator_session(
+            session_service=session_service,
+            app_name=app_name,
+            user_id=user_id,
+            input_fn=auto_confirm_input(topic, max_refinements, run_foresee),
+            output_fn=transcript.append,
+            metrics=metrics,
+            session_id=session_id,
+            **runners,
+        )
+    except Exception as exc:
+        error = repr(exc)
+    elapsed = time.perf_counter() - started
+
+    state: Dict[str, Any] = {}
+    if session_id is not None:
+        session = await session_service.get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id
+        )
+        state = (session.state if session else None) or {}
+
+    confirmed = bool(state.get("confirmed"))
+    if error:
+        status = "error"
+    elif not confirmed:
+        status = "unconfirmed"
+    else:
+        status = "ok"
+    return {
+        "topic": topic,
+        "session_id": session_id,
+        "status": status,
+        "error": error,
+        "keywords": state.get("confirmed_keywords") or state.get("keywords") or [],
+        "total_papers": len(session_paper_ids(state)),
+        "elapsed_seconds": round(elapsed, 3),
+        "metrics": metrics.to_dict(session_id) if metrics and session_id else None,
+        "transcript": transcript,
+    }
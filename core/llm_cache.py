@@ -0,0 +1,141 @@
+from typing import Optional, List, Dict, Any, AsyncGenerator
+import asyncio
+import hashlib
+import json
+import threading
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+
+from core import config
+from core.sqlite_cache import SqliteCache
+
+
+# Marker set in `LlmResponse.custom_metadata` on responses replayed from the cache.
+CACHE_HIT_KEY = "llm_cache_hit"
+
+
+def _strip_call_ids(contents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Drop the per-run function call ids, which would otherwise make every key unique."""
+    for content in contents:
+        for part in content.get("parts") or []:
+            for field in ("function_call", "function_response"):
+                if part.get(field):
+                    part[field].pop("id", None)
+    return contents
+
+
+class LlmResponseCache(SqliteCache):
+    """
+    Persistent cache of model responses, keyed by agent and full request.
+
+    The key covers the agent name, the model, the request config (system
+    instruction, tool declarations, generation settings) and every content
+    in the conversation, including tool calls and tool results. A repeated
+    turn over the same papers, or the same first query, is replayed from
+    disk instead of calling the model again.
+    """
+
+    TABLE = "llm_cache"
+
+    @staticmethod
+    def make_key(agent_name: str, llm_request: LlmRequest) -> str:
+        contents = [
+            content.model_dump(mode="json", exclude_none=True)
+            for content in llm_request.contents
+        ]
+        request_config = (
+            llm_request.config.model_dump(mode="json", exclude_none=True, exclude={"http_options", "labels"})
+            if llm_request.config is not None
+            else None
+        )
+        raw = json.dumps(
+            [agent_name, llm_request.model, request_config, _strip_call_ids(contents)],
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+_llm_cache: Optional[LlmResponseCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LlmResponseCache]:
+    """Return the process-wide LLM response cache, or None when caching is disabled."""
+    global _llm_cache
+    if not config.LLM_CACHE_ENABLED:
+        return None
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = LlmResponseCache(
+                path=config.LLM_CACHE_PATH,
+                ttl_seconds=config.LLM_CACHE_TTL_SECONDS,
+                max_entries=config.LLM_CACHE_MAX_ENTRIES,
+            )
+    return _llm_cache
+
+
+# ============================================================================
+# Caching model wrapper
+# ============================================================================
+class CachingLlm(BaseLlm):
+    """
+    Model wrapper that answers repeated requests from `LlmResponseCache`.
+
+    One wrapper is created per agent (`agent_name` is part of the key) around
+    the shared model. Only complete, error-free responses are stored;
+    replayed responses carry `custom_metadata[CACHE_HIT_KEY] = True`.
+    """
+
+    inner: BaseLlm
+    agent_name: str
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        cache = get_llm_cache()
+        if cache is None:
+            async for response in self.inner.generate_content_async(llm_request, stream=stream):
+                yield response
+            return
+
+        key = cache.make_key(self.agent_name, llm_request)
+        # SQLite calls run in a thread; the event loop is shared by every session.
+        cached = await asyncio.to_thread(cache.get, key)
+        if cached is not None:
+            for data in cached:
+                response = LlmResponse.model_validate(data)
+                response.custom_metadata = {**(response.custom_metadata or {}), CACHE_HIT_KEY: True}
+                yield response
+            return
+
+        final: List[Dict[str, Any]] = []
+        cacheable = True
+        async for response in self.inner.generate_content_async(llm_request, stream=stream):
+            if response.error_code or response.interrupted:
+                cacheable = False
+            elif not response.partial:
+                final.append(_response_to_cache(response))
+            yield response
+
+        if cacheable and final:
+            await asyncio.to_thread(cache.put, key, self.agent_name, final)
+
+
+def _response_to_cache(response: LlmResponse) -> Dict[str, Any]:
+    data = response.model_dump(mode="json", exclude_none=True)
+    # ADK assigns fresh function call ids to replayed calls.
+    for part in (data.get("content") or {}).get("parts") or []:
+        if part.get("function_call"):
+            part["function_call"].pop("id", None)
+    return data
+
+
+def with_llm_cache(agent):
+    """Put a `CachingLlm` in front of `agent`'s model unless the agent opted out."""
+    if agent.name in config.LLM_CACHE_DISABLED_AGENTS or isinstance(agent.model, CachingLlm):
+        return agent
+    agent.model = CachingLlm(model=agent.model.model, inner=agent.model, agent_name=agent.name)
+    return agent
@@ -1,28 +1,247 @@
-from typing import Optional, List, Any
+from typing import TYPE_CHECKING, Optional, List, Dict, Any, AsyncIterator, Callable, Awaitable, ContextManager
+from contextlib import nullcontext, suppress
+import logging
+import time
 import uuid
 from pprint import pformat
 
 
-from google.genai import types
 import asyncio
 
+from core import config
+from core.paper_store import session_paper_ids
+from core.query_planner import SEARCH_CONSTRAINTS_KEY
+from core.startup import preload_modules
 
-# Import Metric Plugin
-# from observability.metrics_plugin import MetricsPlugin
+# ADK, google.genai and the agents are imported inside the functions below, so the
+# first prompt can be shown while they load in the background (see `core.startup`).
+if TYPE_CHECKING:
+    from observability.metrics_plugin import MetricsPlugin
+
+
+logger = logging.getLogger(__name__)
+
+# Answers that end the session at any prompt. The server also sends "exit" when a
+# client disconnects or stops answering.
+QUIT_ANSWERS = {"exit", "quit"}
 
 
 # ============================================================================
 # Helper utilities
 # ============================================================================
-def _render_tool_output(tool_name: str, output: Any) -> str:
-    """Convert tool outputs (dict/list/str/etc.) into printable text."""
+class _Truncated(Exception):
+    """Raised by `_BoundedWriter` once its character budget is used up."""
+
+    def __init__(self):
+        super().__init__()
+        self.noted = False
+
+
+class _BoundedWriter:
+    """
+    Render nested dicts/lists compactly, stopping after `limit` characters.
+
+    Only the part of the value that fits is visited, so a tool result with
+    thousands of papers costs no more to render than one with ten. Where a
+    list is cut off, the number of items not shown is noted.
+    """
+
+    def __init__(self, limit: int):
+        self.parts: List[str] = []
+        self.left = limit
+
+    def write(self, text: str) -> None:
+        if len(text) > self.left:
+            self.parts.append(text[:self.left])
+            self.left = 0
+            raise _Truncated()
+        self.parts.append(text)
+        self.left -= len(text)
+
+    def value(self, obj: Any) -> None:
+        if isinstance(obj, dict):
+            self.write("{")
+            for i, (key, item) in enumerate(obj.items()):
+                self.write(f"{', ' if i else ''}{key!r}: ")
+                self.value(item)
+            self.write("}")
+        elif isinstance(obj, (list, tuple)):
+            self.write("[")
+            for i, item in enumerate(obj):
+                try:
+                    if i:
+                        self.write(", ")
+                    self.value(item)
+                except _Truncated as exc:
+                    if not exc.noted:
+                        exc.noted = True
+                        self.parts.append(f" … ({len(obj) - i} of {len(obj)} items not shown)")
+                    raise
+            self.write("]")
+        elif isinstance(obj, str):
+            # Long strings are cut here rather than by the overall budget, so later fields still show.
+            self.write(repr(obj if len(obj) <= 200 else obj[:200] + "…"))
+        else:
+            self.write(repr(obj))
+
+
+def _render_tool_output(tool_name: str, output: Any, max_chars: Optional[int] = None) -> str:
+    """
+    Convert tool outputs (dict/list/str/etc.) into printable text of at most
+    about `max_chars` characters (default `TOOL_OUTPUT_MAX_CHARS`, 0 = no limit).
+
+    Truncated output ends with a note; the full payload is logged at DEBUG level.
+    """
+    limit = config.TOOL_OUTPUT_MAX_CHARS if max_chars is None else max_chars
+    logger.debug("tool %s output: %s", tool_name, output, extra={"tool": tool_name})
+    if limit <= 0:
+        if isinstance(output, str):
+            return output
+        if isinstance(output, (dict, list, tuple)):
+            return pformat(output, width=100)
+        return repr(output)
+
     if isinstance(output, str):
-        return output
-    if isinstance(output, (dict, list, tuple)):
-        return pformat(output, width=100)
-    return repr(output)
+        if len(output) <= limit:
+            return output
+        return output[:limit] + f" … ({len(output) - limit} more characters)"
+    writer = _BoundedWriter(limit)
+    try:
+        writer.value(output)
+    except _Truncated as exc:
+        if not exc.noted:
+            writer.parts.append(" …")
+        writer.parts.append("\n(truncated; set LOG_LEVEL=DEBUG to log the full output, or TOOL_OUTPUT_MAX_CHARS=0)")
+    return "".join(writer.parts)
+
+
+def _print_event(agent_label: str, event: Any, output_fn: Callable[[str], None] = print) -> None:
+    """Print the text parts and tool output carried by a runner event."""
+    if not (event.content and event.content.parts):
+        return
+    for part in event.content.parts:
+        if hasattr(part, "text") and part.text:
+            output_fn(f"\n🦉 {agent_label} > {part.text}")
+        function_response = getattr(part, "function_response", None)
+        if function_response is not None and function_response.response:
+            rendered = _render_tool_output(function_response.name, function_response.response)
+            output_fn(f"🛠️ Tool `{function_response.name}` output:\n{rendered}")
+
+
+def _phase(metrics: Optional["MetricsPlugin"], session_id: str, name: str) -> ContextManager:
+    """Time a phase when metrics are being collected."""
+    if metrics is None:
+        return nullcontext()
+    return metrics.phase(session_id, name)
+
+
+async def _retrieve_directly(
+    session_service,
+    app_name: str,
+    user_id: str,
+    session_id: str,
+    keywords: List[str],
+    metrics: Optional["MetricsPlugin"] = None,
+    output_fn: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Fast path for phase 2: run the retrieval tool without the retrieval agent.
+
+    The state changes and the rendered paper list are committed as one
+    `retrieval_agent` event, so later agents (and resumed sessions) see the
+    same history as after an agent-driven retrieval.
+    """
+    from google.adk.events import Event, EventActions
+    from google.adk.sessions.state import State
+    from google.genai import types
+
+    from agents.retrieval_agent import fetch_papers, format_paper_list
+
+    session = await session_service.get_session(
+        app_name=app_name, user_id=user_id, session_id=session_id
+    )
+    delta: Dict[str, Any] = {}
+    state = State(value=dict(session.state or {}), delta=delta)
+
+    started = time.perf_counter()
+    result = await fetch_papers(state, session_id, keywords, progress_fn=output_fn)
+    if metrics is not None:
+        metrics.on_retrieval_result(session_id, result, time.perf_counter() - started)
+
+    event = Event(
+        invocation_id=f"e-{uuid.uuid4()}",
+        author="retrieval_agent",
+        content=types.Content(role="model", parts=[types.Part(text=format_paper_list(result))]),
+        actions=EventActions(state_delta=delta),
+    )
+    await session_service.append_event(session, event)
+    return result
 
 
+async def _ingest_full_text(paper_ids: List[str], output_fn: Callable[[str], None]) -> None:
+    """Read the PDFs of the top papers, so the foresee agent can open their sections."""
+    from core.fulltext import fulltext_available, ingest_papers
+    from core.paper_store import get_paper_store
+
+    if not fulltext_available():
+        output_fn("⚠️ FULLTEXT_ENABLED is set, but pypdf is not installed; analyzing abstracts only.")
+        return
+    papers = get_paper_store().get_many(paper_ids[:config.FULLTEXT_MAX_PAPERS])
+    summary = await asyncio.to_thread(ingest_papers, papers)
+    read = summary["papers"] - len(summary["failed"])
+    output_fn(
+        f"📄 Read the full text of {read}/{summary['papers']} papers "
+        f"({summary['cached']} from cache) in {summary['seconds']:.1f}s."
+    )
+
+
+async def _fork_session(session_service, app_name: str, user_id: str, session_id: str, scratch_id: str) -> int:
+    """
+    Copy the state and events of `session_id` into a new scratch session `scratch_id`.
+
+    Agents run there see the same history as in the session itself, but
+    commit nothing to it. Returns the number of events copied.
+    """
+    session = await session_service.get_session(app_name=app_name, user_id=user_id, session_id=session_id)
+    scratch = await session_service.create_session(
+        app_name=app_name, user_id=user_id, session_id=scratch_id, state=dict(session.state or {})
+    )
+    for event in session.events:
+        await session_service.append_event(scratch, event.model_copy(deep=True))
+    return len(session.events)
+
+
+async def _merge_session(
+    session_service, app_name: str, user_id: str, scratch_id: str, session_id: str, start: int
+) -> None:
+    """Append the events of the scratch session from index `start` on, with their state changes, to `session_id`."""
+    scratch = await session_service.get_session(app_name=app_name, user_id=user_id, session_id=scratch_id)
+    session = await session_service.get_session(app_name=app_name, user_id=user_id, session_id=session_id)
+    for event in scratch.events[start:]:
+        await session_service.append_event(session, event.model_copy(deep=True))
+
+
+async def _buffer_events(events: AsyncIterator[Any], queue: asyncio.Queue) -> float:
+    """
+    Run a speculative foresee analysis in the background.
+
+    Every event is put on `queue`, followed by None once the run ends (or by
+    the exception that ended it). Cancelling the task closes `events`, which
+    stops the runner. Returns the seconds the run took, so the caller can
+    record them once the user actually asks for the analysis.
+    """
+    started = time.perf_counter()
+    try:
+        async for event in events:
+            await queue.put(event)
+    except Exception as exc:
+        await queue.put(exc)
+        return time.perf_counter() - started
+    finally:
+        await events.aclose()
+    await queue.put(None)
+    return time.perf_counter() - started
+
 
 # ============================================================================
 # Create Orchestrator Workflow
@@ -33,6 +252,11 @@ async def ainput(prompt: str) -> str:
     return await loop.run_in_executor(None, lambda: input(prompt))
 
 
+def new_session_id() -> str:
+    """Return a unique id for a new research session."""
+    return f"demo_session_{uuid.uuid4().hex[:8]}"
+
+
 async def run_orchestrator_session(
     session_service,
     keywords_runner,
@@ -40,143 +264,302 @@ async def run_orchestrator_session(
     foresee_runner,
     app_name: str,
     user_id: str,
-) -> None:
-    # metrics = MetricsPlugin()
-    session_id = f"demo_session_{uuid.uuid4().hex[:8]}"  # create unique session id
-    await session_service.create_session(
-        app_name=app_name, user_id=user_id, session_id=session_id
-    )
-    print(f"\n🦉 I am your private research assistant. We will first agree on search keywords, then retrieve papers from arXiv.")
-    print(f"Type 'exit' to end the conversation.\n")
-
-    #===================
-    # Phase 1: Keyword Extraction and Confirmation
-    #===================
-    print("Step 1: Please briefly describe your research topic.")
-    user_query = (await ainput("You > ")).strip()
-    if user_query.lower() in {"exit", "quit"}:
-        return
+    foresee_map_runner=None,
+    foresee_reduce_runner=None,
+    input_fn: Callable[[str], Awaitable[str]] = ainput,
+    output_fn: Callable[[str], None] = print,
+    resume_session_id: Optional[str] = None,
+    metrics: Optional["MetricsPlugin"] = None,
+    session_id: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Run one three-phase research session and return its session id.
+
+    `input_fn` and `output_fn` default to the terminal; headless callers
+    (batch mode, services) pass their own to script the user and capture
+    the transcript. With `resume_session_id`, an existing (e.g. persisted)
+    session is continued and phases whose results are already in its state
+    are skipped. With `metrics` (the MetricsPlugin registered on the
+    runners), agent time is recorded per phase. A new session gets the id
+    `session_id` when one is given (see `new_session_id`), so the caller
+    knows it even if the session fails. Returns None if the user quits
+    before describing a topic.
+    """
+    output_fn(f"\n🦉 I am your private research assistant. We will first agree on search keywords, then retrieve papers from arXiv.")
+    output_fn(f"Type 'exit' to end the conversation.\n")
+
+    session = None
+    if resume_session_id:
+        session = await session_service.get_session(
+            app_name=app_name, user_id=user_id, session_id=resume_session_id
+        )
+        if session is None:
+            output_fn(f"Session {resume_session_id} was not found, starting a new one.\n")
 
     confirmed_keywords: Optional[List[str]] = None
-    while not confirmed_keywords:
-        content = types.Content(parts=[types.Part(text=user_query)])
-        print("\n🔎 Keywords Agent is analyzing your query...\n")
-
-        # Run the keywords_agent for this turn
-        async for event in keywords_runner.run_async(
+    if session is not None:
+        # Resume: skip every phase whose result is already in the session state.
+        session_id = session.id
+        resumed_state = session.state or {}
+        output_fn(f"↩️ Resuming session {session_id}.")
+        if resumed_state.get("confirmed"):
+            confirmed_keywords = list(resumed_state.get("confirmed_keywords") or []) or None
+        if not confirmed_keywords:
+            output_fn("Step 1: Let's continue refining your keywords.")
+            user_query = (await input_fn("You (keyword refinement) > ")).strip()
+            if user_query.lower() in QUIT_ANSWERS:
+                return session_id
+    else:
+        session_id = session_id or new_session_id()
+
+        #===================
+        # Phase 1: Keyword Extraction and Confirmation
+        #===================
+        output_fn("Step 1: Please briefly describe your research topic.")
+        user_query = (await input_fn("You > ")).strip()
+        if user_query.lower() in QUIT_ANSWERS:
+            return None
+
+        # Keep the original query in state so retrieved papers can be ranked against it.
+        await session_service.create_session(
+            app_name=app_name,
             user_id=user_id,
             session_id=session_id,
-            new_message=content,
-
-        ):
-            # metrics.on_keywords_event(event)
-            if event.content and event.content.parts:
-                for part in event.content.parts:
-                    if hasattr(part, "text") and part.text:
-                        # This is the Keywords Agent speaking to the user
-                        print(f"\n🦉 Keywords Agent > {part.text}")
-
-            tool_response = getattr(event, "tool_response", None)
-            if tool_response and getattr(tool_response, "output", None):
-                rendered = _render_tool_output(
-                    tool_response.tool_name, tool_response.output
-                )
-                print(f"🛠️ Tool `{tool_response.tool_name}` output:\n{rendered}")
-
-        # After running the keywords_agent, check the shared session state to see
-        # if the keywords have been confirmed.
-        session = await session_service.get_session(
-            app_name=app_name, user_id=user_id, session_id=session_id
+            state={"user_query": user_query},
         )
-        state = session.state or {}
 
-        if state.get("confirmed"):
-            # Prefer confirmed_keywords, fall back to keywords if needed
-            ck = state.get("confirmed_keywords") or state.get("keywords") or []
-            if ck:
-                confirmed_keywords = list(ck)
+    # By now the background preload has had the user's typing time to finish.
+    from google.genai import types
+
+    from agents.foresee_agent import uses_preanalysis
+    from agents.retrieval_agent import cancel_prefetch, format_paper_list, prefetch_keywords
+    from core.foresee_mapreduce import run_foresee_map_reduce
+
+    try:
+        while not confirmed_keywords:
+            content = types.Content(parts=[types.Part(text=user_query)])
+            output_fn("\n🔎 Keywords Agent is analyzing your query...\n")
+
+            # Run the keywords_agent for this turn
+            with _phase(metrics, session_id, "keywords"):
+                async for event in keywords_runner.run_async(
+                    user_id=user_id,
+                    session_id=session_id,
+                    new_message=content,
+
+                ):
+                    _print_event("Keywords Agent", event, output_fn)
+                    # Speculatively fetch papers for each draft keyword list as soon as it is saved.
+                    state_delta = event.actions.state_delta if event.actions else {}
+                    if config.PREFETCH_ENABLED and state_delta.get("keywords"):
+                        prefetch_keywords(
+                            session_id, list(state_delta["keywords"]), state_delta.get(SEARCH_CONSTRAINTS_KEY)
+                        )
+            if metrics is not None:
+                metrics.on_keywords_turn(session_id)
+
+            # After running the keywords_agent, check the shared session state to see
+            # if the keywords have been confirmed.
+            session = await session_service.get_session(
+                app_name=app_name, user_id=user_id, session_id=session_id
+            )
+            state = session.state or {}
 
-        if confirmed_keywords:
-            break
+            if state.get("confirmed"):
+                # Prefer confirmed_keywords, fall back to keywords if needed
+                ck = state.get("confirmed_keywords") or state.get("keywords") or []
+                if ck:
+                    confirmed_keywords = list(ck)
 
-        # If we reach here, keywords are not yet confirmed
-        print(
-            "\nThe keywords are not confirmed yet. "
-            "You can refine your request or say which keywords you prefer."
-        )
-        user_query = (await ainput("You (keyword refinement) > ")).strip()
-        if user_query.lower() in {"exit", "quit"}:
-            return
-
-
-    # ========================
-    # Phase 2: Retrieval
-    # ========================
-    print("\n✅ Confirmed keywords:", ", ".join(confirmed_keywords))
-    print("Step 2: I will now retrieve papers from arXiv using these keywords.")
-
-    keywords_str = ", ".join(confirmed_keywords)
-    retrieval_prompt = (
-        "Please retrieve papers from arXiv using these keywords: "
-        f"{keywords_str}. Use the `retrieve_papers` tool and then summarize the "
-        "results in a numbered list with title, authors, year, and abstract."
-    )
+            if confirmed_keywords:
+                break
 
-    retrieval_content = types.Content(parts=[types.Part(text=retrieval_prompt)])
-    async for event in retrieval_runner.run_async(
-        user_id=user_id,
-        session_id=session_id,
-        new_message=retrieval_content,
-    ):
-        # metrics.on_retrieval_tool(tool_response)
-        if event.content and event.content.parts:
-            for part in event.content.parts:
-                if hasattr(part, "text") and part.text:
-                    print(f"\n🦉 Retrieval Agent > {part.text}")
-
-        tool_response = getattr(event, "tool_response", None)
-        if tool_response and getattr(tool_response, "output", None):
-            rendered = _render_tool_output(
-                tool_response.tool_name, tool_response.output
+            # If we reach here, keywords are not yet confirmed
+            output_fn(
+                "\nThe keywords are not confirmed yet. "
+                "You can refine your request or say which keywords you prefer."
             )
-            print(f"🛠️ Tool `{tool_response.tool_name}` output:\n{rendered}")
+            user_query = (await input_fn("You (keyword refinement) > ")).strip()
+            if user_query.lower() in QUIT_ANSWERS:
+                return session_id
 
 
-    # =============================
-    # Phase 3: Analyze and Foresee
-    # =============================
-    # Before this phase, there need to be a banner remind user to let the foresee_app to take action.
-    print("Step 3: I can give you a summarize of these research and show you potential future directions, press 'Enter' to start.")
-    _ = (await ainput("Press Enter to continue, or type 'skip' to skip this step > ")).strip().lower()
-    if _ in {"skip", "no", "n"}:
-        return
-    foresee_prompt = (
-        "Please analyze the retrieved papers using your tool `get_retrieved_papers`. "
-        f"The confirmed search keywords were: {keywords_str}. "
-        "First summarize the current research themes and hotspots, then propose 3–5 "
-        "concrete future research directions."
-    )
+        # ========================
+        # Phase 2: Retrieval
+        # ========================
+        output_fn(f"\n✅ Confirmed keywords: {', '.join(confirmed_keywords)}")
+        keywords_str = ", ".join(confirmed_keywords)
+
+        session = await session_service.get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id
+        )
+        retrieved_ids = session_paper_ids(session.state or {})
+        if resume_session_id and retrieved_ids:
+            output_fn(f"Step 2: Reusing the {len(retrieved_ids)} papers already retrieved in this session.")
+        elif config.RETRIEVAL_FAST_PATH:
+            output_fn("Step 2: I will now retrieve papers from arXiv using these keywords.")
+            with _phase(metrics, session_id, "retrieval"):
+                result = await _retrieve_directly(
+                    session_service, app_name, user_id, session_id, confirmed_keywords, metrics, output_fn
+                )
+            output_fn(f"\n🦉 Retrieval Agent > {format_paper_list(result)}")
+
+            if result.get("total"):
+                choice = (await input_fn(
+                    "Type 'summary' for a narrative summary of these papers, or press Enter to continue > "
+                )).strip().lower()
+                if choice in QUIT_ANSWERS:
+                    return session_id
+                if choice in {"summary", "s"}:
+                    summary_content = types.Content(parts=[types.Part(text=(
+                        "The papers listed above were already retrieved. Do not call any tools; "
+                        "write a short narrative summary of them."
+                    ))])
+                    with _phase(metrics, session_id, "retrieval"):
+                        async for event in retrieval_runner.run_async(
+                            user_id=user_id,
+                            session_id=session_id,
+                            new_message=summary_content,
+                        ):
+                            _print_event("Retrieval Agent", event, output_fn)
+        else:
+            output_fn("Step 2: I will now retrieve papers from arXiv using these keywords.")
+            retrieval_prompt = (
+                "Please retrieve papers from arXiv using these keywords: "
+                f"{keywords_str}. Use the `retrieve_papers` tool, read the first page with "
+                "`list_papers`, and then summarize the results in a numbered list with title, "
+                "authors, year, and abstract."
+            )
+
+            retrieval_content = types.Content(parts=[types.Part(text=retrieval_prompt)])
+            with _phase(metrics, session_id, "retrieval"):
+                async for event in retrieval_runner.run_async(
+                    user_id=user_id,
+                    session_id=session_id,
+                    new_message=retrieval_content,
+                ):
+                    _print_event("Retrieval Agent", event, output_fn)
+
+
+        # Drop speculative searches for keyword drafts that were not confirmed.
+        cancel_prefetch(session_id)
+
+        # =============================
+        # Phase 3: Analyze and Foresee
+        # =============================
+        foresee_prompt = (
+            "Please analyze the retrieved papers using your tool `get_retrieved_papers`. "
+            f"The confirmed search keywords were: {keywords_str}. "
+            "First summarize the current research themes and hotspots, then propose 3–5 "
+            "concrete future research directions."
+        )
     
-    foresee_content=types.Content(parts=[types.Part(text=foresee_prompt)])
-    async for event in foresee_runner.run_async(
-        user_id=user_id, 
-        session_id=session_id,
-        new_message=foresee_content,
-    ):
-        # metrics.mark_foresee_used()
-        if event.content and event.content.parts:
-            for part in event.content.parts:
-                if hasattr(part, "text") and part.text:
-                    print(f"\n🦉 Foresee Agent > {part.text}")
-
-                
-        tool_response = getattr(event, "tool_response", None)
-        if tool_response and getattr(tool_response, "output", None):
-            rendered = _render_tool_output(
-                tool_response.tool_name, tool_response.output
+        session = await session_service.get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id
+        )
+        paper_ids = session_paper_ids(session.state or {})
+        use_map_reduce = (
+            config.FORESEE_MAP_REDUCE
+            and foresee_map_runner is not None
+            and foresee_reduce_runner is not None
+            and len(paper_ids) > config.FORESEE_BATCH_SIZE
+            # The cluster / trend landscape already has a fixed size.
+            and not uses_preanalysis(len(paper_ids))
+        )
+
+        # Map batches only see abstracts, so full text is read for single-context analyses.
+        read_full_text = config.FULLTEXT_ENABLED and bool(paper_ids) and not use_map_reduce
+
+        def foresee_runs(run_session_id: str) -> AsyncIterator[Any]:
+            # Only called once the run starts, so a skipped step never builds the foresee runners.
+            if use_map_reduce:
+                # Too many papers for one context: analyze batches in parallel, then merge.
+                return run_foresee_map_reduce(
+                    session_service=session_service,
+                    map_runner=foresee_map_runner,
+                    reduce_runner=foresee_reduce_runner,
+                    app_name=app_name,
+                    user_id=user_id,
+                    session_id=run_session_id,
+                    paper_ids=paper_ids,
+                    keywords_str=keywords_str,
+                    batch_size=config.FORESEE_BATCH_SIZE,
+                    concurrency=config.FORESEE_MAP_CONCURRENCY,
+                )
+            foresee_content = types.Content(parts=[types.Part(text=foresee_prompt)])
+            return foresee_runner.run_async(
+                user_id=user_id,
+                session_id=run_session_id,
+                new_message=foresee_content,
             )
-            print(f"🛠️ Tool `{tool_response.tool_name}` output:\n{rendered}")
 
+        async def foresee_events(
+            run_session_id: str = session_id, report: Callable[[str], None] = output_fn
+        ) -> AsyncIterator[Any]:
+            if read_full_text:
+                await _ingest_full_text(paper_ids, report)
+            events = foresee_runs(run_session_id)
+            try:
+                async for event in events:
+                    yield event
+            finally:
+                await events.aclose()
+
+        # Speculatively start the analysis while the user reads the prompt below. It runs in a
+        # scratch copy of the session, which is merged back only if the user continues.
+        buffered: Optional[asyncio.Queue] = None
+        speculative_task: Optional[asyncio.Task] = None
+        scratch_id = f"{session_id}_foresee"
+        forked_events = 0
+        if config.SPECULATIVE_FORESEE:
+            forked_events = await _fork_session(session_service, app_name, user_id, session_id, scratch_id)
+            buffered = asyncio.Queue()
+            speculative_task = asyncio.create_task(
+                # Nothing is printed while the user is at the prompt; the full-text summary goes to the log.
+                _buffer_events(foresee_events(scratch_id, logger.info), buffered)
+            )
 
-                
+        try:
+            # Before this phase, there need to be a banner remind user to let the foresee_app to take action.
+            output_fn("Step 3: I can give you a summarize of these research and show you potential future directions, press 'Enter' to start.")
+            _ = (await input_fn("Press Enter to continue, or type 'skip' to skip this step > ")).strip().lower()
+            if _ in {"skip", "no", "n"} | QUIT_ANSWERS:
+                return session_id
+
+            if metrics is not None:
+                metrics.mark_foresee_used(session_id)
+            if speculative_task is None:
+                with _phase(metrics, session_id, "foresee"):
+                    async for event in foresee_events():
+                        _print_event("Foresee Agent", event, output_fn)
+            else:
+                # Replay what was buffered while the user waited, then follow the live run.
+                try:
+                    with _phase(metrics, session_id, "foresee_wait"):
+                        while (item := await buffered.get()) is not None:
+                            if isinstance(item, BaseException):
+                                raise item
+                            _print_event("Foresee Agent", item, output_fn)
+                finally:
+                    if speculative_task.done() and not speculative_task.cancelled():
+                        if metrics is not None:
+                            metrics.add_phase(session_id, "foresee", speculative_task.result())
+                        await _merge_session(
+                            session_service, app_name, user_id, scratch_id, session_id, forked_events
+                        )
+        finally:
+            # Skipped, failed or cancelled (e.g. the client disconnected at the prompt):
+            # stop the background analysis so no model calls outlive the session.
+            if speculative_task is not None:
+                if not speculative_task.done():
+                    speculative_task.cancel()
+                    with suppress(asyncio.CancelledError):
+                        await speculative_task
+                await session_service.delete_session(
+                    app_name=app_name, user_id=user_id, session_id=scratch_id
+                )
 
+        return session_id
+    finally:
+        # Also for sessions that were cancelled or failed, so no job outlives its session.
+        cancel_prefetch(session_id)
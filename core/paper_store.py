@@ -0,0 +1,151 @@
+from typing import Optional, List, Dict, Any, Iterable, Iterator, MutableMapping, Sequence, Union
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from core import config
+from core.papers import Paper, PaperCollection
+
+
+# Session state only holds paper ids under this key; the papers live in the store.
+PAPER_IDS_KEY = "retrieved_paper_ids"
+
+
+class PaperStore:
+    """
+    Deduplicated on-disk table of papers, keyed by arXiv `entry_id`.
+
+    Sessions keep only paper ids in their state. A paper retrieved by many
+    sessions is stored once, and session state stays small no matter how
+    many papers a session retrieves.
+    """
+
+    def __init__(self, path: str, batch_size: int = 500):
+        self.path = path
+        self.batch_size = batch_size
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS papers (
+                entry_id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def put_many(self, papers: Iterable[Paper]) -> List[str]:
+        """Insert or refresh `papers` and return their ids in the same order."""
+        now = time.time()
+        rows = [
+            (paper.entry_id, json.dumps(paper.to_dict(), ensure_ascii=False), now)
+            for paper in papers
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO papers (entry_id, payload, updated_at) VALUES (?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+        return [row[0] for row in rows]
+
+    def get_many(self, entry_ids: Sequence[str]) -> PaperCollection:
+        """Load papers by id in batches, preserving order and skipping unknown ids."""
+        found: Dict[str, Paper] = {}
+        for start in range(0, len(entry_ids), self.batch_size):
+            chunk = list(entry_ids[start:start + self.batch_size])
+            placeholders = ",".join("?" * len(chunk))
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT entry_id, payload FROM papers WHERE entry_id IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+            for entry_id, payload in rows:
+                found[entry_id] = Paper.from_dict(json.loads(payload))
+        return PaperCollection(found[entry_id] for entry_id in entry_ids if entry_id in found)
+
+    def count(self) -> int:
+        with self._lock:
+            (total,) = self._conn.execute("SELECT COUNT(*) FROM papers").fetchone()
+        return total
+
+
+class LazyPapers(Sequence):
+    """
+    Read-only list view of papers that loads them from the store on demand.
+
+    Only the ids are held up front. Indexing or slicing loads just the
+    requested papers. Iterating loads one store batch at a time.
+    """
+
+    def __init__(self, entry_ids: Sequence[str], store: PaperStore):
+        self._entry_ids = list(entry_ids)
+        self._store = store
+
+    @property
+    def entry_ids(self) -> List[str]:
+        return self._entry_ids
+
+    def __len__(self) -> int:
+        return len(self._entry_ids)
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return self._store.get_many(self._entry_ids[index])
+        papers = self._store.get_many([self._entry_ids[index]])
+        if not papers:
+            raise KeyError(self._entry_ids[index])
+        return papers[0]
+
+    def __iter__(self) -> Iterator[Paper]:
+        for start in range(0, len(self._entry_ids), self._store.batch_size):
+            yield from self._store.get_many(self._entry_ids[start:start + self._store.batch_size])
+
+
+_paper_store: Optional[PaperStore] = None
+_paper_store_lock = threading.Lock()
+
+
+def get_paper_store() -> PaperStore:
+    """Return the process-wide paper store."""
+    global _paper_store
+    with _paper_store_lock:
+        if _paper_store is None:
+            _paper_store = PaperStore(config.PAPER_STORE_PATH)
+    return _paper_store
+
+
+# ============================================================================
+# Session state helpers
+# ============================================================================
+def save_session_papers(
+    state: MutableMapping[str, Any], papers: Iterable[Paper], append: bool = False
+) -> List[str]:
+    """
+    Store `papers` out of line and keep only their ids (in order) in `state`.
+
+    With `append=True` the ids are added after the ones already in `state`;
+    otherwise they replace them. Returns the ids now held in `state`.
+    """
+    entry_ids = get_paper_store().put_many(papers)
+    if append:
+        entry_ids = session_paper_ids(state) + entry_ids
+    # Always assign a new list so the session records the state delta.
+    state[PAPER_IDS_KEY] = entry_ids
+    return entry_ids
+
+
+def session_paper_ids(state: MutableMapping[str, Any]) -> List[str]:
+    return list(state.get(PAPER_IDS_KEY) or [])
+
+
+def load_session_papers(state: MutableMapping[str, Any]) -> LazyPapers:
+    """Return a lazy view over the papers referenced by `state`."""
+    return LazyPapers(session_paper_ids(state), get_paper_store())
@@ -0,0 +1,153 @@
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Sequence, Tuple, Union, overload
+from array import array
+from datetime import datetime, timezone
+import sys
+
+
+# ============================================================================
+# Paper record
+# ============================================================================
+def short_authors(authors: Sequence[str], limit: int = 3) -> str:
+    """The first `limit` author names, followed by "et al." when there are more."""
+    return ", ".join(authors[:limit]) + (", et al." if len(authors) > limit else "")
+
+
+class Paper:
+    """
+    Compact in-memory record for one arXiv paper.
+
+    Slotted (no per-instance `__dict__`), with author names interned so a
+    name shared by many papers and sessions is stored once, and the
+    publication date kept as integer epoch seconds instead of an ISO string.
+    Convert to a plain dict with `to_dict()` only at the LLM / storage
+    boundary.
+    """
+
+    __slots__ = ("entry_id", "title", "authors", "published", "abstract", "pdf_url")
+
+    def __init__(
+        self,
+        entry_id: str,
+        title: str,
+        authors: Iterable[str],
+        published: Optional[int],
+        abstract: str,
+        pdf_url: Optional[str],
+    ):
+        self.entry_id = entry_id
+        self.title = title
+        self.authors: Tuple[str, ...] = tuple(sys.intern(name) for name in authors)
+        self.published = published
+        self.abstract = abstract
+        self.pdf_url = pdf_url
+
+    def __repr__(self) -> str:
+        return f"Paper({self.entry_id!r}, {self.title[:40]!r})"
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Paper) and self.entry_id == other.entry_id
+
+    def __hash__(self) -> int:
+        return hash(self.entry_id)
+
+    @property
+    def published_iso(self) -> Optional[str]:
+        if self.published is None:
+            return None
+        return datetime.fromtimestamp(self.published, tz=timezone.utc).isoformat()
+
+    @property
+    def year(self) -> Optional[int]:
+        if self.published is None:
+            return None
+        return datetime.fromtimestamp(self.published, tz=timezone.utc).year
+
+    def short_authors(self, limit: int = 3) -> str:
+        return short_authors(self.authors, limit)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Paper":
+        published = data.get("published")
+        if isinstance(published, str):
+            published = int(datetime.fromisoformat(published).timestamp())
+        return cls(
+            entry_id=data["entry_id"],
+            title=data.get("title") or "",
+            authors=data.get("authors") or (),
+            published=published,
+            abstract=data.get("abstract") or "",
+            pdf_url=data.get("pdf_url"),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain-dict form, matching the shape the agents and stores have always used."""
+        return {
+            "entry_id": self.entry_id,
+            "title": self.title,
+            "authors": list(self.authors),
+            "published": self.published_iso,
+            "abstract": self.abstract,
+            "pdf_url": self.pdf_url,
+        }
+
+
+# ============================================================================
+# Collections and views
+# ============================================================================
+class PaperView(Sequence):
+    """
+    Read-only window onto a list of papers, addressed by index.
+
+    Slicing a view, or taking one from a `PaperCollection`, never copies
+    `Paper` objects; it only narrows the index range (or index array) over
+    the same underlying list.
+    """
+
+    def __init__(self, papers: List[Paper], indices: Union[range, array]):
+        self._papers = papers
+        self._indices = indices
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    @overload
+    def __getitem__(self, index: int) -> Paper: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "PaperView": ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return PaperView(self._papers, self._indices[index])
+        return self._papers[self._indices[index]]
+
+    def __iter__(self) -> Iterator[Paper]:
+        papers = self._papers
+        for i in self._indices:
+            yield papers[i]
+
+    def entry_ids(self) -> List[str]:
+        return [paper.entry_id for paper in self]
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [paper.to_dict() for paper in self]
+
+
+class PaperCollection(PaperView):
+    """Growable list of `Paper` records that hands out zero-copy views."""
+
+    def __init__(self, papers: Iterable[Paper] = ()):
+        papers = list(papers)
+        super().__init__(papers, range(len(papers)))
+
+    def append(self, paper: Paper) -> None:
+        self._papers.append(paper)
+        self._indices = range(len(self._papers))
+
+    def extend(self, papers: Iterable[Paper]) -> None:
+        self._papers.extend(papers)
+        self._indices = range(len(self._papers))
+
+    def view(self, indices: Iterable[int]) -> PaperView:
+        """Return a view over an arbitrary selection (e.g. a ranking) of this collection."""
+        return PaperView(self._papers, array("I", indices))
@@ -0,0 +1,177 @@
+from typing import Optional, List, Dict, Any, Callable, Iterable, Iterator, Set, Tuple
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
+
+from core.papers import Paper
+
+
+# (query, max_results, cancel_event) -> pages of papers, as they arrive
+SearchFn = Callable[[str, int, threading.Event], Iterable[List[Paper]]]
+
+
+class _Job:
+    """One background search and the pages it has produced so far."""
+
+    __slots__ = ("session_id", "query", "max_results", "future", "cancel_event", "cond", "pages", "done", "error")
+
+    def __init__(self, session_id: str, query: str, max_results: int):
+        self.session_id = session_id
+        self.query = query
+        self.max_results = max_results
+        self.future: Optional[Future] = None
+        self.cancel_event = threading.Event()
+        self.cond = threading.Condition()
+        self.pages: List[List[Paper]] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+
+
+class Prefetcher:
+    """
+    Speculative background arXiv searches for draft keywords.
+
+    While the user is still refining keywords, `prefetch` starts the searches
+    that retrieval would run for the current draft, on a small thread pool.
+    Searches for keywords that were dropped from the draft are cancelled.
+    When retrieval later needs a search, `take` hands over the prefetched
+    pages, and then the pages still to come as they arrive, so the fetch
+    overlaps with the user's reading and typing time and a search still in
+    flight streams like a fresh one.
+
+    Jobs are keyed by the same key as the search cache, so a job is only
+    reused for exactly the query, result count and sort order it ran with.
+    """
+
+    def __init__(self, search_fn: SearchFn, max_workers: int = 2):
+        self._search_fn = search_fn
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, _Job] = {}
+        self._session_keys: Dict[str, Set[str]] = defaultdict(set)
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+        self.cancelled = 0
+
+    def prefetch(self, session_id: str, searches: Dict[str, Tuple[str, int]]) -> List[str]:
+        """
+        Make `searches` ({key: (query, max_results)}) the speculative set for `session_id`.
+
+        Jobs for keys no longer in the set are cancelled; new keys are started.
+        Returns the queries that were started.
+        """
+        started: List[str] = []
+        with self._lock:
+            stale = self._session_keys.get(session_id, set()) - set(searches)
+            for key in stale:
+                self._cancel_locked(key)
+            for key, (query, max_results) in searches.items():
+                if key in self._jobs:
+                    continue
+                job = _Job(session_id, query, max_results)
+                job.future = self._executor.submit(self._run, job)
+                self._jobs[key] = job
+                self._session_keys[session_id].add(key)
+                self.started += 1
+                started.append(query)
+        return started
+
+    def _run(self, job: _Job) -> None:
+        try:
+            for page in self._search_fn(job.query, job.max_results, job.cancel_event):
+                with job.cond:
+                    job.pages.append(page)
+                    job.cond.notify_all()
+                if job.cancel_event.is_set():
+                    break
+        except Exception as exc:
+            job.error = exc
+        finally:
+            with job.cond:
+                job.done = True
+                job.cond.notify_all()
+
+    def take(self, key: str) -> Optional[Iterator[List[Paper]]]:
+        """
+        Claim the prefetched search for `key`.
+
+        Returns an iterator over its pages: those fetched so far at once, then
+        the rest as the job produces them. Closing the iterator early cancels
+        the job. If the job fails before any page was handed over, the search
+        is run again by the caller instead. Returns None when nothing was
+        prefetched for `key`, or when the job was cancelled or failed without
+        results; the caller then searches normally.
+        """
+        with self._lock:
+            job = self._jobs.pop(key, None)
+            if job is not None:
+                self._forget_key_locked(job.session_id, key)
+            if job is None or job.cancel_event.is_set() or (job.done and job.error is not None and not job.pages):
+                self.misses += 1
+                return None
+            self.hits += 1
+        return self._pages(job)
+
+    def _pages(self, job: _Job) -> Iterator[List[Paper]]:
+        handed_over = 0
+        try:
+            while True:
+                with job.cond:
+                    while handed_over >= len(job.pages) and not job.done:
+                        job.cond.wait()
+                    if handed_over < len(job.pages):
+                        page = job.pages[handed_over]
+                    elif job.error is None:
+                        return
+                    elif handed_over:
+                        raise job.error
+                    else:
+                        break
+                handed_over += 1
+                yield page
+        finally:
+            # Abandoned by the caller (e.g. a cancelled retrieval): stop the search.
+            job.cancel_event.set()
+        # Failed before anything was handed over: search again, as if nothing had been prefetched.
+        yield from self._search_fn(job.query, job.max_results, threading.Event())
+
+    def cancel_session(self, session_id: str) -> int:
+        """Cancel every outstanding prefetch for `session_id`; returns how many were cancelled."""
+        with self._lock:
+            keys = list(self._session_keys.pop(session_id, ()))
+            for key in keys:
+                self._cancel_locked(key)
+        return len(keys)
+
+    def _forget_key_locked(self, session_id: str, key: str) -> None:
+        # Drop emptied sessions so finished sessions leave nothing behind.
+        keys = self._session_keys.get(session_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._session_keys[session_id]
+
+    def _cancel_locked(self, key: str) -> None:
+        job = self._jobs.pop(key, None)
+        if job is None:
+            return
+        self._forget_key_locked(job.session_id, key)
+        job.cancel_event.set()
+        job.future.cancel()
+        self.cancelled += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            in_flight = len(self._jobs)
+            sessions = len(self._session_keys)
+        lookups = self.hits + self.misses
+        return {
+            "started": self.started,
+            "in_flight": in_flight,
+            "sessions": sessions,
+            "cancelled": self.cancelled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
@@ -0,0 +1,235 @@
+from typing import Optional, List, Dict, Any, Iterable, MutableMapping, Sequence
+from datetime import date
+import argparse
+import calendar
+import re
+
+from core import config
+
+
+# Optional search constraints saved by the keywords agent next to the keywords:
+# {"categories": [...], "from_date": "2023", "to_date": "2024-06-30"}.
+SEARCH_CONSTRAINTS_KEY = "search_constraints"
+
+# arXiv query field prefixes (https://info.arxiv.org/help/api/user-manual.html#query_details).
+FIELDS = {
+    "ti": "title",
+    "abs": "abstract",
+    "au": "author",
+    "co": "comment",
+    "jr": "journal reference",
+    "cat": "category",
+    "rn": "report number",
+    "id": "id",
+    "all": "any field",
+}
+
+_PREFIXED_RE = re.compile(r"^(%s):\s*(.+)$" % "|".join(FIELDS), re.IGNORECASE)
+_DATE_RE = re.compile(r"^(\d{4})(?:-(\d{1,2}))?(?:-(\d{1,2}))?$")
+# Characters with a meaning in the query syntax; they are dropped from keyword text.
+_SYNTAX_CHARS_RE = re.compile(r'["()\[\]:]')
+_OPERATORS = {"AND", "OR", "ANDNOT"}
+
+
+# ============================================================================
+# Query pieces
+# ============================================================================
+def _clean(text: str) -> str:
+    return " ".join(_SYNTAX_CHARS_RE.sub(" ", text).split())
+
+
+def _term(field: str, text: str) -> str:
+    """`field:word`, or `field:"a phrase"` for several words."""
+    return f'{field}:"{text}"' if " " in text else f"{field}:{text}"
+
+
+def _any_of(terms: Sequence[str]) -> str:
+    return terms[0] if len(terms) == 1 else "(" + " OR ".join(terms) + ")"
+
+
+def _arxiv_date(value: str, end: bool) -> str:
+    """`2023`, `2023-05` or `2023-05-17` -> `YYYYMMDDHHMM`, at the start or end of that period."""
+    match = _DATE_RE.match(str(value).strip())
+    if not match:
+        raise ValueError(f"expected a date like 2023, 2023-05 or 2023-05-17, got {value!r}")
+    year = int(match.group(1))
+    month = int(match.group(2) or (12 if end else 1))
+    try:
+        if match.group(3) is None and not end:
+            day = 1
+        else:
+            day = int(match.group(3) or calendar.monthrange(year, month)[1])
+        # Rejects months and days that do not exist, e.g. 2023-13 or 2023-02-30.
+        date(year, month, day)
+    except ValueError:
+        raise ValueError(f"{value!r} is not a valid date") from None
+    return f"{year:04d}{month:02d}{day:02d}{'2359' if end else '0000'}"
+
+
+def _split_keyword(keyword: str) -> Optional[tuple]:
+    """`cat:cs.LG` -> ("cat", "cs.LG"); None for a plain keyword."""
+    match = _PREFIXED_RE.match(keyword.strip())
+    if not match:
+        return None
+    return match.group(1).lower(), match.group(2).strip()
+
+
+# ============================================================================
+# Query plan
+# ============================================================================
+class QueryPlan:
+    """
+    An arXiv query built from keywords and search constraints.
+
+    `query` combines all keywords; `keyword_queries` has one query per
+    keyword with the same filters, for fanout retrieval. `explain()`
+    describes the choices in plain words.
+    """
+
+    def __init__(
+        self,
+        terms: List[str],
+        filters: List[str],
+        match: str,
+        notes: List[str],
+    ):
+        self.terms = terms
+        self.filters = filters
+        self.match = match
+        self.notes = notes
+
+    def _with_filters(self, terms: Sequence[str], joiner: str) -> str:
+        if not terms:
+            return " AND ".join(self.filters)
+        keyword_part = terms[0] if len(terms) == 1 else f" {joiner} ".join(terms)
+        if not self.filters:
+            return keyword_part
+        if len(terms) > 1:
+            keyword_part = f"({keyword_part})"
+        return " AND ".join([keyword_part, *self.filters])
+
+    @property
+    def query(self) -> str:
+        return self._with_filters(self.terms, "AND" if self.match == "all" else "OR")
+
+    @property
+    def keyword_queries(self) -> List[str]:
+        if not self.terms:
+            return [self.query] if self.filters else []
+        return [self._with_filters([term], "OR") for term in self.terms]
+
+    def explain(self) -> str:
+        return "\n".join([f"Query: {self.query}", *(f"- {note}" for note in self.notes)])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"query": self.query, "explanation": self.notes}
+
+
+def plan_query(
+    keywords: Iterable[str],
+    categories: Optional[Sequence[str]] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    fields: Optional[Sequence[str]] = None,
+    match: Optional[str] = None,
+) -> QueryPlan:
+    """
+    Turn keywords and constraints into field-scoped arXiv query syntax.
+
+    - Plain keywords are searched in `fields` (QUERY_FIELDS, title and
+      abstract by default) instead of everywhere; multi-word keywords are
+      quoted so they match as phrases. With no fields they are sent bare.
+    - Keywords are OR-ed, or AND-ed with `match="all"` (QUERY_MATCH).
+    - Keywords that already carry a field prefix (`au:hinton`) are kept as
+      given; `cat:` keywords become category filters.
+    - Categories (OR-ed among themselves) and a `submittedDate` range are
+      AND-ed onto the keyword part, so arXiv filters server-side.
+    """
+    fields = list(config.QUERY_FIELDS if fields is None else fields)
+    match = (match or config.QUERY_MATCH).lower()
+    categories = list(categories or [])
+    terms: List[str] = []
+    notes: List[str] = []
+    plain = 0
+    kept: List[str] = []
+
+    for keyword in keywords:
+        prefixed = _split_keyword(keyword)
+        if prefixed:
+            field, text = prefixed
+            if field == "cat":
+                categories.append(text)
+            else:
+                terms.append(_term(field, _clean(text)))
+                kept.append(f"{field}:{_clean(text)}")
+            continue
+        text = _clean(keyword)
+        if not text or text.upper() in _OPERATORS:
+            continue
+        plain += 1
+        terms.append(_any_of([_term(field, text) for field in fields]) if fields else text)
+
+    if plain:
+        if fields:
+            scope = " or ".join(FIELDS.get(field, field) for field in fields)
+            notes.append(f"Keywords are matched in the {scope} ({', '.join(f + ':' for f in fields)}) instead of all fields.")
+            notes.append("Multi-word keywords are quoted so they match as phrases.")
+    if kept:
+        notes.append(f"Kept as given: {', '.join(kept)}.")
+    if len(terms) > 1:
+        notes.append(
+            f"Papers must match all {len(terms)} keywords (AND)." if match == "all"
+            else f"Papers may match any of the {len(terms)} keywords (OR); BM25 re-ranking favours those matching several."
+        )
+
+    filters: List[str] = []
+    categories = list(dict.fromkeys(_clean(category) for category in categories if _clean(category)))
+    if categories:
+        filters.append(_any_of([f"cat:{category}" for category in categories]))
+        notes.append(f"Only papers in {', '.join(categories)} (cat:).")
+    if from_date or to_date:
+        start = _arxiv_date(from_date, end=False) if from_date else "190001010000"
+        stop = _arxiv_date(to_date, end=True) if to_date else "299912312359"
+        if start > stop:
+            raise ValueError(f"the date range starts ({from_date}) after it ends ({to_date})")
+        filters.append(f"submittedDate:[{start} TO {stop}]")
+        if from_date and to_date:
+            period = f"between {from_date} and {to_date}"
+        else:
+            period = f"from {from_date} onwards" if from_date else f"up to {to_date}"
+        notes.append(f"Only papers submitted {period} (submittedDate).")
+    return QueryPlan(terms, filters, match, notes)
+
+
+def session_constraints(state: MutableMapping[str, Any]) -> Dict[str, Any]:
+    """The search constraints saved in session state (empty when there are none)."""
+    return dict(state.get(SEARCH_CONSTRAINTS_KEY) or {})
+
+
+def plan_for_session(keywords: Iterable[str], constraints: Optional[Dict[str, Any]] = None) -> QueryPlan:
+    """`plan_query` with the constraints stored by the keywords agent."""
+    constraints = constraints or {}
+    return plan_query(
+        keywords,
+        categories=constraints.get("categories") or config.QUERY_CATEGORIES,
+        from_date=constraints.get("from_date"),
+        to_date=constraints.get("to_date"),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Show the arXiv query planned for some keywords.")
+    parser.add_argument("keywords", nargs="+")
+    parser.add_argument("--category", action="append", dest="categories", help="e.g. cs.LG (repeatable)")
+    parser.add_argument("--from", dest="from_date", help="e.g. 2023 or 2023-05-17")
+    parser.add_argument("--to", dest="to_date")
+    parser.add_argument("--fields", help="comma-separated field prefixes, e.g. ti,abs ('' = unscoped)")
+    parser.add_argument("--match", choices=["any", "all"])
+    args = parser.parse_args()
+    fields = None if args.fields is None else [field.strip() for field in args.fields.split(",") if field.strip()]
+    plan = plan_query(args.keywords, args.categories, args.from_date, args.to_date, fields, args.match)
+    print(plan.explain())
+
+
+if __name__ == "__main__":
+    main()
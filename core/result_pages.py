@@ -0,0 +1,149 @@
+from typing import Optional, List, Dict, Any, MutableMapping, Sequence
+import hashlib
+
+from core import config
+from core.paper_store import get_paper_store, session_paper_ids
+from core.papers import Paper
+
+
+# ============================================================================
+# Result handles
+# ============================================================================
+def short_id(entry_id: str) -> str:
+    """`http://arxiv.org/abs/2401.01234v2` -> `2401.01234v2`, the id shown to the agents."""
+    return entry_id.rsplit("/", 1)[-1]
+
+
+def result_handle(entry_ids: Sequence[str]) -> str:
+    """
+    Stable handle for one ranked result set.
+
+    The handle is a digest of the ids, so it needs no extra session state
+    and a handle from an earlier retrieval no longer matches once the
+    papers in state were replaced.
+    """
+    digest = hashlib.blake2b(digest_size=6)
+    for entry_id in entry_ids:
+        digest.update(entry_id.encode("utf-8"))
+        digest.update(b"\n")
+    return f"res-{digest.hexdigest()}"
+
+
+def _abstract_snippet(text: str, chars: int) -> str:
+    text = " ".join(text.split())
+    if len(text) <= chars:
+        return text
+    return text[:chars].rsplit(" ", 1)[0] + "…"
+
+
+def _listing(paper: Paper, abstract_chars: int) -> Dict[str, Any]:
+    return {
+        "id": short_id(paper.entry_id),
+        "title": paper.title,
+        "year": paper.year,
+        "authors": paper.short_authors(),
+        "abstract": _abstract_snippet(paper.abstract, abstract_chars),
+    }
+
+
+def _next_offset(end: int, total: int) -> Optional[int]:
+    return end if end < total else None
+
+
+# ============================================================================
+# Tool payloads
+# ============================================================================
+def describe_results(state: MutableMapping[str, Any], query: str = "", top_n: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Compact handle for the papers in `state`: counts and the top-N titles.
+
+    Its size does not depend on how many papers were retrieved; the agent
+    pages through the rest with `page_results` and opens single papers
+    with `paper_details`.
+    """
+    entry_ids = session_paper_ids(state)
+    top_n = config.RESULT_HANDLE_TOP_N if top_n is None else top_n
+    top = get_paper_store().get_many(entry_ids[:top_n])
+    return {
+        "status": "success",
+        "handle": result_handle(entry_ids),
+        "query": query,
+        "total": len(entry_ids),
+        "top": [{"id": short_id(paper.entry_id), "title": paper.title, "year": paper.year} for paper in top],
+        "next_offset": _next_offset(len(top), len(entry_ids)),
+    }
+
+
+def _stale(handle: str, entry_ids: Sequence[str]) -> Optional[Dict[str, Any]]:
+    if handle and handle != result_handle(entry_ids):
+        return {
+            "status": "error",
+            "error": f"Unknown or outdated result handle {handle!r}; the current results are {result_handle(entry_ids)!r}.",
+        }
+    return None
+
+
+def page_results(state: MutableMapping[str, Any], handle: str, offset: int = 0, limit: int = 0) -> Dict[str, Any]:
+    """
+    One page of the result set `handle`, in ranking order.
+
+    `limit` defaults to RESULT_PAGE_SIZE and is capped at RESULT_PAGE_MAX;
+    abstracts are cut to RESULT_ABSTRACT_CHARS.
+    """
+    entry_ids = session_paper_ids(state)
+    error = _stale(handle, entry_ids)
+    if error:
+        return error
+    offset = max(0, offset)
+    limit = min(limit if limit > 0 else config.RESULT_PAGE_SIZE, config.RESULT_PAGE_MAX)
+    papers = get_paper_store().get_many(entry_ids[offset:offset + limit])
+    return {
+        "status": "success",
+        "handle": result_handle(entry_ids),
+        "total": len(entry_ids),
+        "offset": offset,
+        "papers": [_listing(paper, config.RESULT_ABSTRACT_CHARS) for paper in papers],
+        "next_offset": _next_offset(offset + limit, len(entry_ids)),
+    }
+
+
+def _resolve_ids(paper_ids: Sequence[str], entry_ids: Sequence[str]) -> Dict[str, Optional[str]]:
+    """Map each requested id (full entry id, short id, or short id without version) to an entry id."""
+    by_key: Dict[str, str] = {}
+    for entry_id in entry_ids:
+        short = short_id(entry_id)
+        by_key.setdefault(entry_id, entry_id)
+        by_key.setdefault(short, entry_id)
+        by_key.setdefault(short.rsplit("v", 1)[0], entry_id)
+    return {paper_id: by_key.get(paper_id.strip()) for paper_id in paper_ids}
+
+
+def resolve_paper_id(state: MutableMapping[str, Any], paper_id: str) -> Optional[str]:
+    """Entry id of a paper in the current results, given any of the ids the agents see."""
+    return _resolve_ids([paper_id], session_paper_ids(state))[paper_id]
+
+
+def paper_details(state: MutableMapping[str, Any], paper_ids: Sequence[str]) -> Dict[str, Any]:
+    """
+    Full records (complete abstract, all authors, PDF link) for papers in the
+    current results, at most RESULT_DETAILS_MAX per call.
+    """
+    entry_ids = session_paper_ids(state)
+    requested = list(dict.fromkeys(paper_ids))
+    skipped = requested[config.RESULT_DETAILS_MAX:]
+    resolved = _resolve_ids(requested[:config.RESULT_DETAILS_MAX], entry_ids)
+    found = get_paper_store().get_many([entry_id for entry_id in resolved.values() if entry_id])
+    papers = []
+    for paper in found:
+        data = paper.to_dict()
+        data["id"] = short_id(paper.entry_id)
+        papers.append(data)
+    result: Dict[str, Any] = {
+        "status": "success",
+        "papers": papers,
+        "not_found": [paper_id for paper_id, entry_id in resolved.items() if entry_id is None],
+    }
+    if skipped:
+        result["skipped"] = skipped
+        result["note"] = f"At most {config.RESULT_DETAILS_MAX} papers per call; ask again for the skipped ids."
+    return result
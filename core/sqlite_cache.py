@@ -0,0 +1,128 @@
+from typing import Optional, Any, Dict
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class SqliteCache:
+    """
+    Persistent SQLite key/value cache for JSON-serializable values.
+
+    Subclasses pick the table name and how keys are built. Each entry also
+    keeps a short human-readable `query` label for inspecting the file.
+
+    - Entries older than `ttl_seconds` are treated as misses and removed.
+    - At most `max_entries` entries are kept; the least recently used ones are
+      evicted first.
+    - `stats()` reports hit/miss counters for this process.
+    """
+
+    TABLE = "cache"
+
+    def __init__(self, path: str, ttl_seconds: float, max_entries: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {self.TABLE} (
+                key TEXT PRIMARY KEY,
+                query TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{self.TABLE}_last_access ON {self.TABLE} (last_access)"
+        )
+        self._conn.commit()
+
+    # -------------------------------
+    # Read / write
+    # -------------------------------
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for `key`, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT payload, created_at FROM {self.TABLE} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            payload, created_at = row
+            if self.ttl_seconds > 0 and now - created_at > self.ttl_seconds:
+                self._conn.execute(f"DELETE FROM {self.TABLE} WHERE key = ?", (key,))
+                self._conn.commit()
+                self.expired += 1
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                f"UPDATE {self.TABLE} SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(payload)
+
+    def put(self, key: str, query: str, value: Any) -> None:
+        """Store `value` under `key` and evict least recently used entries if needed."""
+        now = time.time()
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                f"""
+                INSERT OR REPLACE INTO {self.TABLE} (key, query, payload, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (key, query, payload, now, now),
+            )
+            (count,) = self._conn.execute(f"SELECT COUNT(*) FROM {self.TABLE}").fetchone()
+            overflow = count - self.max_entries
+            if self.max_entries > 0 and overflow > 0:
+                self._conn.execute(
+                    f"""
+                    DELETE FROM {self.TABLE} WHERE key IN (
+                        SELECT key FROM {self.TABLE} ORDER BY last_access ASC LIMIT ?
+                    )
+                    """,
+                    (overflow,),
+                )
+                self.evictions += overflow
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.TABLE}")
+            self._conn.commit()
+
+    # -------------------------------
+    # Summary
+    # -------------------------------
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            (entries,) = self._conn.execute(f"SELECT COUNT(*) FROM {self.TABLE}").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
@@ -0,0 +1,186 @@
+from typing import Optional, List, Dict, Any, Callable, Sequence, Tuple
+from collections import defaultdict
+import argparse
+import importlib
+import os
+import subprocess
+import sys
+import threading
+import time
+
+
+# Modules needed once the first phase starts. google.adk alone takes seconds to import.
+HEAVY_MODULES = (
+    "google.genai.types",
+    "google.adk.runners",
+    "google.adk.apps.app",
+    "google.adk.models.google_llm",
+    "google.adk.sessions.database_session_service",
+    "agents.keywords_agent",
+    "agents.retrieval_agent",
+    "agents.foresee_agent",
+    "core.foresee_mapreduce",
+    "core.llm_cache",
+    "observability.metrics_plugin",
+)
+
+
+# ============================================================================
+# Lazy construction
+# ============================================================================
+class Lazy:
+    """
+    Stand-in for an object that is only built when it is first used.
+
+    Attribute access is forwarded to the object, which `factory` creates on
+    first access (once, even with several threads). Code that needs the real
+    object, e.g. to hand it to ADK, calls `resolve`.
+    """
+
+    def __init__(self, factory: Callable[[], Any], name: str = ""):
+        self._factory = factory
+        self._name = name or getattr(factory, "__name__", "object")
+        self._value: Any = None
+        self._built = False
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        if not self._built:
+            with self._lock:
+                if not self._built:
+                    self._value = self._factory()
+                    self._built = True
+        return self._value
+
+    @property
+    def built(self) -> bool:
+        return self._built
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.get(), name)
+
+    def __repr__(self) -> str:
+        return f"Lazy({self._name}, built={self._built})"
+
+
+def resolve(value: Any) -> Any:
+    """Return the real object behind `value` if it is `Lazy`, else `value` itself."""
+    return value.get() if isinstance(value, Lazy) else value
+
+
+# ============================================================================
+# Background preloading
+# ============================================================================
+_preload_thread: Optional[threading.Thread] = None
+_preload_times: Dict[str, float] = {}
+
+
+def preload_modules(modules: Sequence[str] = HEAVY_MODULES) -> threading.Thread:
+    """
+    Import `modules` on a background thread (once per process).
+
+    Started before the first prompt, the imports overlap with the time the
+    user spends typing. A module that is needed before the thread got to it
+    is simply imported by the caller; Python's import locks keep the two
+    from importing it twice.
+    """
+    global _preload_thread
+    if _preload_thread is None:
+
+        def run() -> None:
+            for module in modules:
+                started = time.perf_counter()
+                try:
+                    importlib.import_module(module)
+                except ImportError:
+                    continue
+                _preload_times[module] = time.perf_counter() - started
+
+        _preload_thread = threading.Thread(target=run, name="preload", daemon=True)
+        _preload_thread.start()
+    return _preload_thread
+
+
+def preload_times() -> Dict[str, float]:
+    """Seconds the background thread spent on each preloaded module so far."""
+    return dict(_preload_times)
+
+
+# ============================================================================
+# Startup measurements
+# ============================================================================
+def import_breakdown(module: str = "main", top: int = 15) -> List[Tuple[str, float]]:
+    """
+    Import `module` in a fresh interpreter and return the slowest top-level packages.
+
+    Uses `python -X importtime` and sums each package's own import time
+    (seconds), so the numbers add up to the total import cost.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    totals: Dict[str, float] = defaultdict(float)
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # header line
+        totals[name.strip().split(".")[0]] += int(self_us) / 1e6
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+
+
+def time_to_first_prompt(args: Sequence[str] = ("-m", "main"), marker: str = "You >") -> float:
+    """
+    Start the CLI in a fresh interpreter and return the seconds until `marker` is printed.
+
+    The session is ended right away by answering "exit". A placeholder
+    API_KEY is set if none is configured, since no model call is made.
+    """
+    env = {**os.environ, "PYTHONUNBUFFERED": "1"}
+    env.setdefault("API_KEY", "startup-measurement")
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, *args],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        env=env,
+        text=True,
+    )
+    seen = ""
+    try:
+        while marker not in seen:
+            char = process.stdout.read(1)
+            if not char:
+                raise RuntimeError(f"{' '.join(args)} exited before printing {marker!r}")
+            seen = seen[-len(marker):] + char
+        elapsed = time.perf_counter() - started
+        process.communicate("exit\n", timeout=30)
+    finally:
+        if process.poll() is None:
+            process.kill()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Report where CLI start-up time goes.")
+    parser.add_argument("--module", default="main", help="module whose imports are broken down")
+    parser.add_argument("--top", type=int, default=15, help="packages listed")
+    parser.add_argument("--no-prompt", action="store_true", help="skip the time-to-first-prompt run")
+    args = parser.parse_args()
+
+    breakdown = import_breakdown(args.module, args.top)
+    print(f"[startup] import time of `{args.module}` by top-level package:")
+    for package, seconds in breakdown:
+        print(f"  {package:<28} {seconds * 1000:8.1f} ms")
+    print(f"[startup] total (listed): {sum(seconds for _, seconds in breakdown) * 1000:.1f} ms")
+    if not args.no_prompt:
+        print(f"[startup] time to first prompt: {time_to_first_prompt() * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+from typing import Optional, List, Dict, Any, Callable
+from datetime import datetime, timezone
+import asyncio
+import uuid
+
+from google.genai import types
+
+from agents.foresee_agent import COVERED_IDS_KEY
+from agents.retrieval_agent import fetch_since
+from core import config
+from core.paper_store import PAPER_IDS_KEY, get_paper_store
+from core.query_planner import SEARCH_CONSTRAINTS_KEY
+from core.topic_store import TopicStore
+
+
+def _delta_prompt(topic: Dict[str, Any], new_papers: int) -> str:
+    keywords_str = ", ".join(topic["keywords"])
+    if not topic["summary"]:
+        return (
+            "Please analyze the retrieved papers using your tool `get_retrieved_papers`. "
+            f"The confirmed search keywords were: {keywords_str}. "
+            "First summarize the current research themes and hotspots, then propose 3–5 "
+            "concrete future research directions."
+        )
+    return (
+        f"This is a saved research topic (keywords: {keywords_str}). Below is the analysis written "
+        f"at the last refresh. Since then, {new_papers} new papers were published; read them with "
+        "`get_retrieved_papers`. Update the analysis: keep what still holds, add new themes and "
+        "hotspots, and add a short '## What's New' section about the new papers. Keep the same structure.\n\n"
+        f"Previous analysis:\n{topic['summary']}"
+    )
+
+
+# ============================================================================
+# Refresh
+# ============================================================================
+async def refresh_topic(
+    store: TopicStore,
+    name: str,
+    session_service=None,
+    foresee_runner=None,
+    app_name: str = "agents",
+    user_id: str = "topic_refresh",
+    output_fn: Callable[[str], None] = print,
+) -> Dict[str, Any]:
+    """
+    Fetch the papers published since topic `name` was last refreshed and update its analysis.
+
+    Only papers newer than the topic's watermark are fetched (see
+    `fetch_since`, with the topic's search constraints) and merged into the
+    topic. When `foresee_runner` is given, the foresee agent reads the
+    pending papers, in a new session, plus the previous summary in its
+    prompt, and its answer becomes the topic's summary. The cost of a
+    refresh therefore follows the number of new papers, not the size of
+    the topic.
+
+    Only the papers the agent's payload actually covered are marked as
+    analyzed (a list of abstracts stops at FORESEE_TOP_K and the token
+    budget); the rest stay pending for the next refresh.
+    """
+    topic = store.get(name)
+    if topic is None:
+        raise KeyError(f"unknown topic: {name}")
+
+    new_papers = await asyncio.to_thread(
+        fetch_since, topic["keywords"], topic["watermark"], config.TOPIC_REFRESH_MAX_RESULTS, topic["constraints"]
+    )
+    get_paper_store().put_many(new_papers)
+    added = store.add_papers(name, new_papers)
+    output_fn(f"[topic_refresh] {name}: {len(added)} new papers")
+
+    pending = store.pending_ids(name)
+    summary: Optional[str] = None
+    session_id: Optional[str] = None
+    analyzed: List[str] = []
+    if foresee_runner is not None and pending:
+        session_id = f"topic_{uuid.uuid4().hex[:8]}"
+        await session_service.create_session(
+            app_name=app_name,
+            user_id=user_id,
+            session_id=session_id,
+            state={
+                "user_query": " ".join(topic["keywords"]),
+                "confirmed": True,
+                "confirmed_keywords": topic["keywords"],
+                SEARCH_CONSTRAINTS_KEY: topic["constraints"],
+                PAPER_IDS_KEY: pending,
+            },
+        )
+        parts: List[str] = []
+        async for event in foresee_runner.run_async(
+            user_id=user_id,
+            session_id=session_id,
+            new_message=types.Content(parts=[types.Part(text=_delta_prompt(topic, len(pending)))]),
+        ):
+            if event.is_final_response() and event.content and event.content.parts:
+                parts.extend(part.text for part in event.content.parts if part.text)
+        summary = "\n".join(parts).strip()
+        if summary:
+            session = await session_service.get_session(app_name=app_name, user_id=user_id, session_id=session_id)
+            covered = set((session.state or {}).get(COVERED_IDS_KEY) or []) if session else set()
+            analyzed = [entry_id for entry_id in pending if entry_id in covered]
+            store.mark_analyzed(name, analyzed, summary)
+            output_fn(f"[topic_refresh] {name}: analysis updated with {len(analyzed)} of {len(pending)} new papers")
+
+    refreshed = store.get(name)
+    return {
+        "topic": name,
+        "new_papers": len(added),
+        "analyzed_papers": len(analyzed),
+        "pending_papers": len(pending) - len(analyzed),
+        "total_papers": refreshed["papers"],
+        "watermark": format_watermark(refreshed["watermark"]),
+        "session_id": session_id,
+        "summary": summary,
+    }
+
+
+def format_watermark(watermark: Optional[int]) -> Optional[str]:
+    if watermark is None:
+        return None
+    return datetime.fromtimestamp(watermark, tz=timezone.utc).isoformat()
@@ -0,0 +1,188 @@
+from typing import Optional, List, Dict, Any, Iterable
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from core import config
+from core.papers import Paper
+
+
+class TopicStore:
+    """
+    Saved research topics and the papers collected for each of them.
+
+    A topic remembers its confirmed keywords and search constraints
+    (categories, dates; see `core.query_planner`), a watermark (the newest
+    `published` timestamp fetched so far) and the latest foresee summary.
+    Its papers are listed by id (the papers themselves live in the paper
+    store); each one is marked once it has been covered by a summary, so a
+    refresh only analyzes what is still pending, even after a failed run.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS topics (
+                name TEXT PRIMARY KEY,
+                keywords TEXT NOT NULL,
+                constraints TEXT NOT NULL DEFAULT '{}',
+                watermark INTEGER,
+                summary TEXT NOT NULL DEFAULT '',
+                created_at REAL NOT NULL,
+                refreshed_at REAL
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS topic_papers (
+                topic TEXT NOT NULL,
+                entry_id TEXT NOT NULL,
+                published INTEGER,
+                analyzed INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (topic, entry_id)
+            )
+            """
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(topics)")}
+        if "constraints" not in columns:
+            # Topic stores created before constraints were saved.
+            self._conn.execute("ALTER TABLE topics ADD COLUMN constraints TEXT NOT NULL DEFAULT '{}'")
+        self._conn.commit()
+
+    # -------------------------------
+    # Topics
+    # -------------------------------
+    def subscribe(self, name: str, keywords: List[str], constraints: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Save `name` with `keywords` and search `constraints`; an existing topic
+        keeps its papers and watermark.
+        """
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO topics (name, keywords, constraints, created_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (name) DO UPDATE SET keywords = excluded.keywords, constraints = excluded.constraints
+                """,
+                (
+                    name,
+                    json.dumps(keywords, ensure_ascii=False),
+                    json.dumps(constraints or {}, ensure_ascii=False),
+                    time.time(),
+                ),
+            )
+            self._conn.commit()
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT name, keywords, constraints, watermark, summary, created_at, refreshed_at,
+                       (SELECT COUNT(*) FROM topic_papers WHERE topic = topics.name)
+                FROM topics WHERE name = ?
+                """,
+                (name,),
+            ).fetchone()
+        return _topic_from_row(row) if row else None
+
+    def list_topics(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT name, keywords, constraints, watermark, summary, created_at, refreshed_at,
+                       (SELECT COUNT(*) FROM topic_papers WHERE topic = topics.name)
+                FROM topics ORDER BY name
+                """
+            ).fetchall()
+        return [_topic_from_row(row) for row in rows]
+
+    def remove(self, name: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM topics WHERE name = ?", (name,))
+            self._conn.execute("DELETE FROM topic_papers WHERE topic = ?", (name,))
+            self._conn.commit()
+        return cursor.rowcount > 0
+
+    # -------------------------------
+    # Papers
+    # -------------------------------
+    def add_papers(self, name: str, papers: Iterable[Paper]) -> List[str]:
+        """
+        Record `papers` for topic `name` and advance its watermark.
+
+        Papers the topic already has are ignored. Returns the ids that were new.
+        """
+        papers = list(papers)
+        added: List[str] = []
+        with self._lock:
+            for paper in papers:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO topic_papers (topic, entry_id, published) VALUES (?, ?, ?)",
+                    (name, paper.entry_id, paper.published),
+                )
+                if cursor.rowcount:
+                    added.append(paper.entry_id)
+            newest = max((paper.published for paper in papers if paper.published is not None), default=None)
+            self._conn.execute(
+                "UPDATE topics SET watermark = MAX(COALESCE(watermark, 0), COALESCE(?, 0)), refreshed_at = ? "
+                "WHERE name = ?",
+                (newest, time.time(), name),
+            )
+            self._conn.commit()
+        return added
+
+    def pending_ids(self, name: str) -> List[str]:
+        """Ids of the topic's papers not covered by a summary yet, newest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT entry_id FROM topic_papers WHERE topic = ? AND analyzed = 0 "
+                "ORDER BY published DESC",
+                (name,),
+            ).fetchall()
+        return [entry_id for (entry_id,) in rows]
+
+    def mark_analyzed(self, name: str, entry_ids: List[str], summary: str) -> None:
+        """Store the new summary of topic `name`; of its papers, it covers `entry_ids`."""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE topic_papers SET analyzed = 1 WHERE topic = ? AND entry_id = ?",
+                [(name, entry_id) for entry_id in entry_ids],
+            )
+            self._conn.execute("UPDATE topics SET summary = ? WHERE name = ?", (summary, name))
+            self._conn.commit()
+
+
+def _topic_from_row(row) -> Dict[str, Any]:
+    name, keywords, constraints, watermark, summary, created_at, refreshed_at, papers = row
+    return {
+        "name": name,
+        "keywords": json.loads(keywords),
+        "constraints": json.loads(constraints),
+        # 0 means "refreshed, but nothing dated was found yet".
+        "watermark": watermark or None,
+        "summary": summary,
+        "created_at": created_at,
+        "refreshed_at": refreshed_at,
+        "papers": papers,
+    }
+
+
+_topic_store: Optional[TopicStore] = None
+_topic_store_lock = threading.Lock()
+
+
+def get_topic_store() -> TopicStore:
+    """Return the process-wide topic store."""
+    global _topic_store
+    with _topic_store_lock:
+        if _topic_store is None:
+            _topic_store = TopicStore(config.TOPIC_STORE_PATH)
+    return _topic_store
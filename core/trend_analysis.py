@@ -0,0 +1,247 @@
+from typing import Optional, List, Dict, Any, Sequence, Tuple
+from array import array
+from collections import Counter
+import math
+
+try:  # Optional: `pip install research-assitant-agent[analysis]`
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+    sparse = None
+
+from core.bm25_index import tokenize
+from core.papers import Paper
+from core.result_pages import short_id
+
+
+def analysis_available() -> bool:
+    """True when NumPy and SciPy are installed, so the pre-analysis can run."""
+    return np is not None and sparse is not None
+
+
+# ============================================================================
+# TF-IDF
+# ============================================================================
+def build_tfidf(
+    texts: Sequence[str],
+    max_features: int = 5000,
+    min_df: int = 2,
+    max_df: float = 0.8,
+) -> Tuple["sparse.csr_matrix", List[str]]:
+    """
+    Build an L2-normalized, sublinear TF-IDF matrix (documents x terms).
+
+    Terms found in fewer than `min_df` documents or in more than a `max_df`
+    share of them are dropped; of the rest, the `max_features` most frequent
+    are kept. Returns the matrix and the term for each column.
+    """
+    n_docs = len(texts)
+    vocabulary: Dict[str, int] = {}
+    rows, cols, counts = array("i"), array("i"), array("f")
+    for doc_id, text in enumerate(texts):
+        for term, count in Counter(tokenize(text)).items():
+            rows.append(doc_id)
+            cols.append(vocabulary.setdefault(term, len(vocabulary)))
+            counts.append(count)
+
+    matrix = sparse.csr_matrix(
+        (np.frombuffer(counts, dtype=np.float32), (np.frombuffer(rows, dtype=np.int32), np.frombuffer(cols, dtype=np.int32))),
+        shape=(n_docs, len(vocabulary)),
+    )
+    terms = np.array(list(vocabulary), dtype=object)
+
+    df = np.bincount(matrix.indices, minlength=len(vocabulary))
+    keep = np.flatnonzero((df >= min(min_df, n_docs)) & (df <= max(1, max_df * n_docs)))
+    if keep.size > max_features:
+        keep = keep[np.argsort(-df[keep], kind="stable")[:max_features]]
+    matrix = matrix[:, keep].tocsr()
+    df = df[keep]
+
+    matrix.data = 1.0 + np.log(matrix.data)
+    idf = (np.log((1.0 + n_docs) / (1.0 + df)) + 1.0).astype(np.float32)
+    matrix = matrix.multiply(idf).tocsr()
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    matrix = sparse.diags((1.0 / norms).astype(np.float32)) @ matrix
+    return matrix.tocsr(), list(terms[keep])
+
+
+# ============================================================================
+# Clustering
+# ============================================================================
+def minibatch_kmeans(
+    matrix: "sparse.csr_matrix",
+    k: int,
+    batch_size: int = 256,
+    n_iter: int = 40,
+    seed: int = 0,
+) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Spherical mini-batch k-means over L2-normalized rows.
+
+    Centers are seeded with k-means++ (on cosine distance) and updated with
+    per-center learning rates from random mini-batches, so the cost per
+    iteration does not grow with the corpus. Returns (labels, centers).
+    """
+    rng = np.random.default_rng(seed)
+    n_docs = matrix.shape[0]
+    k = max(1, min(k, n_docs))
+
+    # k-means++ seeding
+    centers = np.zeros((k, matrix.shape[1]), dtype=np.float32)
+    centers[0] = matrix[rng.integers(n_docs)].toarray().ravel()
+    best_sim = np.asarray(matrix @ centers[0]).ravel()
+    for c in range(1, k):
+        weights = np.clip(1.0 - best_sim, 0.0, None)
+        total = weights.sum()
+        pick = rng.choice(n_docs, p=weights / total) if total > 0 else rng.integers(n_docs)
+        centers[c] = matrix[pick].toarray().ravel()
+        best_sim = np.maximum(best_sim, np.asarray(matrix @ centers[c]).ravel())
+
+    seen = np.zeros(k, dtype=np.float64)
+    batch_size = min(batch_size, n_docs)
+    for _ in range(n_iter):
+        batch = matrix[rng.choice(n_docs, size=batch_size, replace=False)]
+        labels = np.asarray(batch @ centers.T).argmax(axis=1)
+        for c in np.unique(labels):
+            members = batch[labels == c]
+            seen[c] += members.shape[0]
+            rate = members.shape[0] / seen[c]
+            centers[c] = (1.0 - rate) * centers[c] + rate * np.asarray(members.mean(axis=0)).ravel()
+        norms = np.linalg.norm(centers, axis=1, keepdims=True)
+        centers /= np.where(norms == 0, 1.0, norms)
+
+    labels = np.asarray(matrix @ centers.T).argmax(axis=1)
+    return labels, centers
+
+
+# ============================================================================
+# Trends
+# ============================================================================
+def rising_terms(
+    matrix: "sparse.csr_matrix",
+    terms: List[str],
+    years: List[Optional[int]],
+    recent_years: int = 2,
+    top_n: int = 10,
+    min_docs: int = 3,
+) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Compare how often terms appear in recent papers versus earlier ones.
+
+    Papers are bucketed by publication year. A term's share is the fraction
+    of a period's papers that use it; terms are ranked by how much their
+    share grew in the last `recent_years` years. Returns the rising terms and
+    the number of papers per year.
+    """
+    dated = [i for i, year in enumerate(years) if year is not None]
+    per_year = Counter(years[i] for i in dated)
+    papers_per_year = {str(year): per_year[year] for year in sorted(per_year)}
+    if len(per_year) < 2:
+        return [], papers_per_year
+
+    latest = max(per_year)
+    recent = np.array([i for i in dated if years[i] > latest - recent_years], dtype=np.int64)
+    past = np.array([i for i in dated if years[i] <= latest - recent_years], dtype=np.int64)
+    if not recent.size or not past.size:
+        return [], papers_per_year
+
+    present = matrix.copy()
+    present.data[:] = 1.0
+    # Period x document indicator times document x term presence = documents per term and period.
+    periods = sparse.csr_matrix(
+        (np.ones(recent.size + past.size, dtype=np.float32),
+         (np.r_[np.zeros(recent.size, dtype=np.int64), np.ones(past.size, dtype=np.int64)], np.r_[recent, past])),
+        shape=(2, matrix.shape[0]),
+    )
+    recent_docs, past_docs = np.asarray((periods @ present).todense())
+    recent_share = recent_docs / recent.size
+    past_share = past_docs / past.size
+    # Laplace-smoothed growth, weighted by the absolute change in share.
+    growth = np.log((recent_docs + 1) / (recent.size + 2)) - np.log((past_docs + 1) / (past.size + 2))
+    score = growth * (recent_share - past_share)
+    score[(recent_docs < min_docs) | (recent_share <= past_share)] = -np.inf
+
+    rising: List[Dict[str, Any]] = []
+    for j in np.argsort(-score)[:top_n]:
+        if not np.isfinite(score[j]):
+            break
+        rising.append({
+            "term": terms[j],
+            "recent_share": round(float(recent_share[j]), 3),
+            "earlier_share": round(float(past_share[j]), 3),
+        })
+    return rising, papers_per_year
+
+
+# ============================================================================
+# Pre-analysis for the foresee phase
+# ============================================================================
+def analyze_papers(
+    papers: Sequence[Paper],
+    max_clusters: int = 8,
+    terms_per_cluster: int = 6,
+    representatives: int = 3,
+    recent_years: int = 2,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    Summarize a corpus as clusters, representative papers and rising terms.
+
+    The result has a bounded size (at most `max_clusters` clusters with
+    `representatives` papers each, plus ten rising terms), so the foresee
+    prompt stays about the same size whether there are 50 or 5000 papers.
+    """
+    papers = list(papers)
+    if not papers:
+        return {"status": "empty", "total": 0, "clusters": [], "rising_terms": [], "papers_per_year": {}}
+
+    texts = [f"{paper.title} {paper.abstract}" for paper in papers]
+    matrix, terms = build_tfidf(texts, min_df=2 if len(papers) >= 20 else 1)
+
+    k = min(max_clusters, max(1, round(math.sqrt(len(papers) / 2))))
+    if not terms:
+        labels, centers = np.zeros(len(papers), dtype=np.int64), np.zeros((1, 0), dtype=np.float32)
+    else:
+        labels, centers = minibatch_kmeans(matrix, k, seed=seed)
+
+    similarities = np.asarray(matrix @ centers.T) if terms else np.zeros((len(papers), 1))
+    clusters: List[Dict[str, Any]] = []
+    for c in range(centers.shape[0]):
+        members = np.flatnonzero(labels == c)
+        if not members.size:
+            continue
+        top_terms = [terms[j] for j in np.argsort(-centers[c])[:terms_per_cluster] if centers[c, j] > 0]
+        closest = members[np.argsort(-similarities[members, c])[:representatives]]
+        clusters.append({
+            "label": " / ".join(top_terms[:3]) or "misc",
+            "top_terms": top_terms,
+            "size": int(members.size),
+            "share": round(members.size / len(papers), 3),
+            "years": _year_span([papers[i].year for i in members]),
+            "representative_papers": [
+                {"id": short_id(papers[i].entry_id), "title": papers[i].title, "year": papers[i].year}
+                for i in closest
+            ],
+        })
+    clusters.sort(key=lambda cluster: cluster["size"], reverse=True)
+
+    rising, papers_per_year = rising_terms(
+        matrix, terms, [paper.year for paper in papers], recent_years=recent_years
+    )
+    return {
+        "status": "success",
+        "total": len(papers),
+        "clusters": clusters,
+        "rising_terms": rising,
+        "papers_per_year": papers_per_year,
+    }
+
+
+def _year_span(years: List[Optional[int]]) -> Optional[str]:
+    known = [year for year in years if year is not None]
+    if not known:
+        return None
+    low, high = min(known), max(known)
+    return str(low) if low == high else f"{low}-{high}"
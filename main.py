@@ -1,19 +1,28 @@
+from typing import TYPE_CHECKING, Optional, Dict, Callable, Iterator
+from contextlib import contextmanager
+import argparse
 import asyncio
 import logging
 import os
+import signal
+import sys
 from dotenv import load_dotenv
 
-from google.adk.apps.app import App
-from google.adk.models.google_llm import Gemini
-from google.adk.plugins.logging_plugin import LoggingPlugin
-from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
-from google.genai import types
+# Load `.env` before importing project modules so `core.config` sees overrides.
+load_dotenv()
 
-from agents.keywords_agent import create_keywords_agent
-from agents.retrieval_agent import create_retrieval_agent
-from agents.foresee_agent import create_foresee_agent
-from core.orchestrator import run_orchestrator_session
+from core import config
+from core.orchestrator import new_session_id, run_orchestrator_session
+from core.query_planner import session_constraints
+from core.startup import Lazy, preload_modules, resolve
+from core.topic_store import get_topic_store
+
+if TYPE_CHECKING:
+    from google.adk.models.google_llm import Gemini
+    from google.adk.plugins.logging_plugin import LoggingPlugin
+    from google.adk.runners import Runner
+    from google.adk.sessions import BaseSessionService
+    from observability.metrics_plugin import MetricsPlugin
 
 
 APP_NAME = "agents"
@@ -21,19 +30,27 @@ USER_ID = "demo_user"
 
 
 def setup_logging() -> None:
-    """Configure application-wide logging."""
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-        filename="research_assistant.log",
-        filemode="a",
+    """Configure application-wide logging (queued, off the event loop; see `observability.log_pipeline`)."""
+    from observability.log_pipeline import configure_logging
+
+    configure_logging(
+        config.LOG_PATH,
+        level=config.LOG_LEVEL,
+        fmt=config.LOG_FORMAT,
+        max_bytes=config.LOG_MAX_BYTES,
+        backup_count=config.LOG_BACKUP_COUNT,
+        queue_size=config.LOG_QUEUE_SIZE,
+        sample_rate=config.LOG_SAMPLE_RATE,
     )
     # Reduce noise from underlying libraries (optional)
     logging.getLogger("httpx").setLevel(logging.WARNING)
     logging.getLogger("google_genai").setLevel(logging.WARNING)
 
-def create_model() -> Gemini:
+def create_model() -> "Gemini":
     """Create a shared Gemini model instance with retry configuration."""
+    from google.adk.models.google_llm import Gemini
+    from google.genai import types
+
     retry_config = types.HttpRetryOptions(
         attempts=3,
         exp_base=3,
@@ -42,8 +59,18 @@ def create_model() -> Gemini:
     )
     return Gemini(model="gemini-2.5-flash-lite", retry_options=retry_config)
 
-async def async_main() -> None:
-    """Async entry point: initialize agents and run the orchestrator session."""
+def create_session_service() -> "BaseSessionService":
+    """Create the session service: SQLite-backed by default, in-memory if SESSION_DB_URL=memory."""
+    from google.adk.sessions import DatabaseSessionService, InMemorySessionService
+
+    if config.SESSION_DB_URL == "memory":
+        return InMemorySessionService()
+    os.makedirs(config.CACHE_DIR, exist_ok=True)
+    return DatabaseSessionService(db_url=config.SESSION_DB_URL)
+
+
+def configure_api_key() -> None:
+    """Expose the API key from `.env` under the name the Gemini client expects."""
     load_dotenv()
     api_key = os.getenv("API_KEY")
 
@@ -51,65 +78,156 @@ async def async_main() -> None:
         raise ValueError("API_KEY not found in environment. Please set it in a .env file.")
     os.environ["GOOGLE_API_KEY"] = api_key
 
+
+def build_runners(model, session_service, plugins) -> Dict[str, Lazy]:
+    """
+    Create one App and Runner per agent, all sharing `model` and `session_service`.
+
+    Runners are built lazily, on their first use, so a session that ends
+    before retrieval or skips the foresee step never constructs (or imports)
+    the agents it did not need. Any argument may itself be `Lazy`, e.g. a
+    model that is only created for the first runner.
+
+    Each agent's model calls go through the LLM response cache (see
+    `LLM_CACHE_DISABLED_AGENTS` to opt agents out). The returned dict is keyed
+    by the matching `run_orchestrator_session` arguments.
+    """
+
+    def runner_factory(key: str) -> Callable[[], "Runner"]:
+        def build() -> "Runner":
+            from google.adk.apps.app import App
+            from google.adk.runners import Runner
+            from agents.keywords_agent import create_keywords_agent
+            from agents.retrieval_agent import create_retrieval_agent
+            from agents.foresee_agent import (
+                create_foresee_agent,
+                create_foresee_map_agent,
+                create_foresee_reduce_agent,
+            )
+            from core.llm_cache import with_llm_cache
+
+            create_agent = {
+                "keywords_runner": create_keywords_agent,
+                "retrieval_runner": create_retrieval_agent,
+                "foresee_runner": create_foresee_agent,
+                "foresee_map_runner": create_foresee_map_agent,
+                "foresee_reduce_runner": create_foresee_reduce_agent,
+            }[key]
+            app = App(
+                name=APP_NAME,
+                root_agent=with_llm_cache(create_agent(resolve(model))),
+                plugins=[resolve(plugin) for plugin in plugins],
+            )
+            return Runner(app=app, session_service=resolve(session_service))
+
+        return build
+
+    return {
+        key: Lazy(runner_factory(key), name=key)
+        for key in (
+            "keywords_runner",
+            "retrieval_runner",
+            "foresee_runner",
+            "foresee_map_runner",
+            "foresee_reduce_runner",
+        )
+    }
+
+
+def create_metrics_plugin() -> "MetricsPlugin":
+    from observability.metrics_plugin import MetricsPlugin
+
+    return MetricsPlugin()
+
+
+def create_logging_plugin() -> "LoggingPlugin":
+    from google.adk.plugins.logging_plugin import LoggingPlugin
+
+    return LoggingPlugin(name="research_assistant_logging")
+
+
+@contextmanager
+def interrupt_stops_retrieval(session_id: str) -> Iterator[None]:
+    """
+    While active, Ctrl-C stops a running paper retrieval of `session_id` early
+    (see `cancel_retrieval`), keeping the papers fetched so far. At any other
+    time it interrupts the program as usual.
+    """
+    previous = signal.getsignal(signal.SIGINT)
+
+    def on_interrupt(signum, frame) -> None:
+        # Nothing can be retrieving before the retrieval agent module is loaded;
+        # importing it here, inside a signal handler, could deadlock.
+        retrieval = sys.modules.get("agents.retrieval_agent")
+        if retrieval is not None and retrieval.cancel_retrieval(session_id):
+            print("\n⏹️ Stopping the retrieval; the papers fetched so far are kept.")
+        elif callable(previous):
+            previous(signum, frame)
+        else:
+            raise KeyboardInterrupt
+
+    signal.signal(signal.SIGINT, on_interrupt)
+    try:
+        yield
+    finally:
+        signal.signal(signal.SIGINT, previous)
+
+
+async def async_main(resume_session_id: Optional[str] = None, subscribe: Optional[str] = None) -> None:
+    """Async entry point: initialize agents and run the orchestrator session."""
+    configure_api_key()
+
     setup_logging()
     logger = logging.getLogger("research_assistant")
     logger.info("Starting Research Assistant application")
-    model = create_model()
-    session_service = InMemorySessionService()
-
-    logging_plugin = LoggingPlugin(name="research_assistant_logging")
-    plugins = [logging_plugin]
-
-    # Create agents
-    keywords_agent = create_keywords_agent(model)
-    retrieval_agent = create_retrieval_agent(model)
-    foresee_agent = create_foresee_agent(model)
-
-    # Create Apps
-    keywords_app = App(
-        name=APP_NAME,
-        root_agent=keywords_agent,
-        plugins=plugins,
-    )
-    retrieval_app = App(
-        name=APP_NAME,
-        root_agent=retrieval_agent,
-        plugins=plugins,
-    )
-    foresee_app = App(
-        name=APP_NAME,
-        root_agent=foresee_agent,
-        plugins=plugins,
-    )
-    # Create runners
-    keywords_runner = Runner(
-        app=keywords_app,
-        session_service=session_service,
-    )
-    retrieval_runner = Runner(
-        app=retrieval_app,
-        session_service=session_service,
-    )
-    foresee_runner = Runner(
-        app=foresee_app,
-        session_service=session_service,
-    )
-
-    # Run the orchestrated multi-agent session
-    await run_orchestrator_session(
-        session_service=session_service,
-        keywords_runner=keywords_runner,
-        retrieval_runner=retrieval_runner,
-        foresee_runner=foresee_runner,
-        app_name=APP_NAME,
-        user_id=USER_ID,
-    )
+    # Nothing heavy is built before the first prompt: ADK, the model, the session
+    # database and the agents are imported in the background while the user types.
+    preload_modules()
+    model = Lazy(create_model)
+    session_service = Lazy(create_session_service)
+    metrics = Lazy(create_metrics_plugin)
+    plugins = [Lazy(create_logging_plugin), metrics]
+
+    runners = build_runners(model, session_service, plugins)
+
+    # Run the orchestrated multi-agent session; Ctrl-C during retrieval only stops the retrieval.
+    session_id = resume_session_id or new_session_id()
+    with interrupt_stops_retrieval(session_id):
+        session_id = await run_orchestrator_session(
+            session_service=session_service,
+            app_name=APP_NAME,
+            user_id=USER_ID,
+            resume_session_id=resume_session_id,
+            metrics=metrics,
+            session_id=session_id,
+            **runners,
+        )
+    if session_id:
+        print(f"\n📊{metrics.summary(session_id)}")
+        if config.METRICS_JSONL_PATH:
+            metrics.persist(session_id, config.METRICS_JSONL_PATH)
+        metrics.discard(session_id)
+    if config.METRICS_PROM_PATH:
+        metrics.write_prometheus(config.METRICS_PROM_PATH)
+    if session_id and subscribe:
+        session = await session_service.get_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
+        state = (session.state or {}) if session else {}
+        keywords = list(state.get("confirmed_keywords") or [])
+        if keywords:
+            get_topic_store().subscribe(subscribe, keywords, session_constraints(state))
+            print(f"\n🔔 Saved topic '{subscribe}'. Fetch new papers later with: python -m refresh refresh {subscribe}")
+    if session_id and config.SESSION_DB_URL != "memory":
+        print(f"\n💾 Session saved. Resume it with: python -m main --resume {session_id}")
     logger.info("Research Assistant session finished.")
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Interactive multi-agent research assistant.")
+    parser.add_argument("--resume", metavar="SESSION_ID", help="continue a saved session")
+    parser.add_argument("--subscribe", metavar="NAME", help="save the confirmed keywords as a topic for refresh.py")
+    args = parser.parse_args()
     try:
-        asyncio.run(async_main())
+        asyncio.run(async_main(resume_session_id=args.resume, subscribe=args.subscribe))
     except KeyboardInterrupt:
         print("\n👋 Interrupted by user. Exiting...")
     except Exception as e:
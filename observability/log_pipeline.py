@@ -0,0 +1,172 @@
+from typing import Optional, Dict, Any
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import threading
+
+
+# Attributes every LogRecord has; anything else came in through `extra=` and is
+# written as a structured field.
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+TEXT_FORMAT = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+_TRACEBACKS = logging.Formatter()
+
+
+# ============================================================================
+# Formatting, sampling and queueing
+# ============================================================================
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, plus any `extra=` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                data[key] = value
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["exc_info"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep a `rate` fraction of records below WARNING, per logger.
+
+    Sampling is deterministic (every 1/rate-th record of each logger is
+    kept), so a chatty logger is thinned evenly instead of in bursts.
+    Warnings and errors always pass.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = min(max(rate, 0.0), 1.0)
+        self._seen: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.sampled_out = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate >= 1.0 or record.levelno >= logging.WARNING:
+            return True
+        with self._lock:
+            seen = self._seen.get(record.name, 0)
+            self._seen[record.name] = seen + 1
+            keep = int((seen + 1) * self.rate) > int(seen * self.rate)
+            if not keep:
+                self.sampled_out += 1
+        return keep
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    `QueueHandler` for a bounded queue that drops records when it is full.
+
+    The calling thread (usually the event loop) only pays for putting the
+    record on the queue; when the writer falls behind, records are counted
+    and discarded instead of blocking the caller.
+    """
+
+    def __init__(self, log_queue: "queue.Queue"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the arguments now (they may change after the call returns) but keep the
+        # traceback apart from the message, so the JSON record has it as its own field.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or _TRACEBACKS.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+# ============================================================================
+# Setup
+# ============================================================================
+_listener: Optional[QueueListener] = None
+_handler: Optional[DroppingQueueHandler] = None
+_sampler: Optional[SamplingFilter] = None
+_setup_lock = threading.Lock()
+
+
+def configure_logging(
+    path: str,
+    level: str = "INFO",
+    fmt: str = "json",
+    max_bytes: int = 10 * 1024 * 1024,
+    backup_count: int = 5,
+    queue_size: int = 10000,
+    sample_rate: float = 1.0,
+) -> None:
+    """
+    Route the root logger through a bounded queue to a rotating file.
+
+    Log calls only enqueue the record; a `QueueListener` thread formats it
+    (JSON lines, or the classic text format with `fmt="text"`) and writes
+    it, rotating the file at `max_bytes`. Records below WARNING are sampled
+    at `sample_rate`. Calling this again is a no-op.
+    """
+    global _listener, _handler, _sampler
+    with _setup_lock:
+        if _listener is not None:
+            return
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        file_handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        file_handler.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+        _sampler = SamplingFilter(sample_rate)
+        _handler = DroppingQueueHandler(queue.Queue(maxsize=max(1, queue_size)))
+        _handler.addFilter(_sampler)
+
+        root = logging.getLogger()
+        root.setLevel(level.upper())
+        root.addHandler(_handler)
+
+        _listener = QueueListener(_handler.queue, file_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Write out the queued records and stop the writer thread."""
+    global _listener, _handler
+    with _setup_lock:
+        if _listener is None:
+            return
+        logging.getLogger().removeHandler(_handler)
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+        _handler = None
+
+
+def log_stats() -> Dict[str, int]:
+    """Records dropped because the queue was full, and records sampled out."""
+    return {
+        "queued": _handler.queue.qsize() if _handler is not None else 0,
+        "dropped": _handler.dropped if _handler is not None else 0,
+        "sampled_out": _sampler.sampled_out if _sampler is not None else 0,
+    }
@@ -1,69 +1,378 @@
-from collections import defaultdict
-from typing import Dict, Any, Optional
-from datetime import datetime
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Iterator, List, Set, Tuple
+from datetime import datetime, timezone
 import json
+import os
+import re
+import time
 
-class MetricsPlugin:
+from google.adk.plugins.base_plugin import BasePlugin
+
+from agents.retrieval_agent import prefetch_stats
+from core import config
+from core.arxiv_cache import get_search_cache
+from core.arxiv_client import arxiv_client_stats
+from core.llm_cache import CACHE_HIT_KEY, get_llm_cache
+from observability.log_pipeline import log_stats as log_pipeline_stats
+
+
+class LatencyHistogram:
+    """Cumulative latency histogram with Prometheus-style `le` buckets (seconds)."""
+
+    BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self):
+        self.bucket_counts = [0] * len(self.BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+        for i, bound in enumerate(self.BUCKETS):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "max": round(self.max, 6),
+            "buckets": {str(bound): n for bound, n in zip(self.BUCKETS, self.bucket_counts)},
+        }
+
+
+def _new_session_record() -> Dict[str, Any]:
+    return {
+        "phases": defaultdict(float),
+        "keywords_turns": 0,
+        "retrieved_papers": 0,
+        "foresee_used": False,
+        "llm_calls": 0,
+        "llm_cache_hits": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "tool_calls": 0,
+        "tool_errors": 0,
+    }
+
+
+# Scratch sessions are named `<session id>_map<n>` (map-reduce batches) and
+# `<session id>_foresee` (a speculative foresee run, with its own `_map<n>` batches).
+_SCRATCH_SESSION_RE = re.compile(r"^(.+?)(?:_foresee(?:_map\d+)?|_map\d+)$")
+
+
+class MetricsPlugin(BasePlugin):
 
     """
     A lightweight custom metrics collector for observability.
 
-    This plugin collects:
+    Registered as an ADK plugin on every App, it times each tool call and LLM
+    call and counts LLM token usage. The orchestrator adds per-session data:
+    - phases: time spent running agents in each phase (user think-time excluded)
     - keyword_turns: how many times the keywords_agent interacted
     - retrieved_papers: how many papers were retrieved by retrieval_agent
     - foresee_used: whether foresee_agent was triggered
+
+    `persist` appends a per-session JSON record to a JSONL file, and
+    `write_prometheus` writes all process-wide metrics, including arXiv
+    cache hit rates, in the Prometheus text format.
+
+    Callers `discard` a session once it is reported; at most `max_sessions`
+    records (METRICS_MAX_SESSIONS) are kept, so a long-running server does
+    not grow with every session it ever served.
     """
 
-    def __init__(self):
-        self.data = defaultdict(int)
-        self.used_foresee = False
+    def __init__(self, name: str = "research_assistant_metrics", max_sessions: Optional[int] = None):
+        super().__init__(name=name)
+        self.max_sessions = config.METRICS_MAX_SESSIONS if max_sessions is None else max_sessions
+        # Least recently updated first.
+        self.sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Session id -> ids of its map-reduce scratch sessions.
+        self._scratch_sessions: Dict[str, Set[str]] = defaultdict(set)
+        self.phase_latency: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+        self.tool_latency: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+        self.llm_latency: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+        self.llm_calls: Dict[str, int] = defaultdict(int)
+        self.llm_cache_hits: Dict[str, int] = defaultdict(int)
+        self.llm_tokens: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.tool_errors: Dict[str, int] = defaultdict(int)
+        self._tool_starts: Dict[Tuple[str, str], float] = {}
+        self._model_starts: Dict[Tuple[str, str], float] = {}
 
     # -------------------------------
-    # Phase 1: Keywords Agent
+    # Session records
     # -------------------------------
-    def on_keywords_event(self, event: Any) -> None:
-        """Called whenever keywords_agent produces an event"""
-        self.data["keywords_turns"] += 1
+    def _record(self, session_id: str) -> Dict[str, Any]:
+        record = self.sessions.get(session_id)
+        if record is not None:
+            self.sessions.move_to_end(session_id)
+            return record
+        record = self.sessions[session_id] = _new_session_record()
+        match = _SCRATCH_SESSION_RE.match(session_id)
+        if match:
+            self._scratch_sessions[match.group(1)].add(session_id)
+        while len(self.sessions) > max(1, self.max_sessions):
+            self.discard(next(iter(self.sessions)))
+        return record
+
+    def discard(self, session_id: str) -> None:
+        """Drop the records of `session_id` and its scratch sessions, e.g. once persisted."""
+        for sid in (session_id, *self._scratch_sessions.pop(session_id, ())):
+            self.sessions.pop(sid, None)
+        match = _SCRATCH_SESSION_RE.match(session_id)
+        if match:
+            siblings = self._scratch_sessions.get(match.group(1))
+            if siblings is not None:
+                siblings.discard(session_id)
+                if not siblings:
+                    del self._scratch_sessions[match.group(1)]
 
     # -------------------------------
-    # Phase 2: Retrieval Agent
+    # Orchestrator hooks
     # -------------------------------
-    def on_retrieval_tool(self, tool_response: Any) -> None:
-        """Capture tool output from retrieve_papers."""
-        output = getattr(tool_response, "output", None) or {}
-        total = output.get("total")
+    @contextmanager
+    def phase(self, session_id: str, name: str) -> Iterator[None]:
+        """Time a block of agent work and add it to the phase total for `session_id`."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(session_id, name, time.perf_counter() - started)
+
+    def add_phase(self, session_id: str, name: str, seconds: float) -> None:
+        """Add agent work timed elsewhere (e.g. a background run) to the phase total for `session_id`."""
+        self._record(session_id)["phases"][name] += seconds
+        self.phase_latency[name].observe(seconds)
+
+    def on_keywords_turn(self, session_id: str) -> None:
+        """Called once per keywords_agent turn"""
+        self._record(session_id)["keywords_turns"] += 1
+
+    def on_retrieval_result(self, session_id: str, result: Dict[str, Any], seconds: float) -> None:
+        """Record a retrieval the orchestrator ran directly, without the agent."""
+        self.tool_latency["retrieve_papers"].observe(seconds)
+        session = self._record(session_id)
+        session["tool_calls"] += 1
+        total = result.get("total")
         if isinstance(total, int):
-            self.data["retrieved_papers"] = total
+            session["retrieved_papers"] = total
+
+    def mark_foresee_used(self, session_id: str) -> None:
+        """Flag that foresee_agent has been invoked."""
+        self._record(session_id)["foresee_used"] = True
 
     # -------------------------------
-    # Phase 3: Foresee Agent
+    # ADK plugin callbacks
     # -------------------------------
-    def mark_foresee_used(self) -> str:
-        """Flag that foresee_agent has been invoked."""
-        self.used_foresee = True
+    async def before_tool_callback(self, *, tool, tool_args, tool_context) -> Optional[dict]:
+        key = (tool_context.invocation_id, tool_context.function_call_id or tool.name)
+        self._tool_starts[key] = time.perf_counter()
+        return None
+
+    async def after_tool_callback(self, *, tool, tool_args, tool_context, result) -> Optional[dict]:
+        self._finish_tool(tool.name, tool_context)
+        session = self._record(tool_context.session.id)
+        session["tool_calls"] += 1
+        if tool.name == "retrieve_papers" and isinstance(result, dict):
+            total = result.get("total")
+            if isinstance(total, int):
+                session["retrieved_papers"] = total
+        return None
+
+    async def on_tool_error_callback(self, *, tool, tool_args, tool_context, error) -> Optional[dict]:
+        self._finish_tool(tool.name, tool_context)
+        self.tool_errors[tool.name] += 1
+        self._record(tool_context.session.id)["tool_errors"] += 1
+        return None
+
+    async def before_model_callback(self, *, callback_context, llm_request):
+        key = (callback_context.invocation_id, callback_context.agent_name)
+        self._model_starts[key] = time.perf_counter()
+        return None
+
+    async def after_model_callback(self, *, callback_context, llm_response):
+        agent = callback_context.agent_name
+        started = self._model_starts.pop((callback_context.invocation_id, agent), None)
+        if llm_response.partial:
+            # Streaming chunks: only the final response counts as a call.
+            return None
+        if started is not None:
+            self.llm_latency[agent].observe(time.perf_counter() - started)
+        self.llm_calls[agent] += 1
+
+        session = self._record(callback_context.session.id)
+        session["llm_calls"] += 1
+        if (llm_response.custom_metadata or {}).get(CACHE_HIT_KEY):
+            # Replayed from the LLM cache: no tokens were spent.
+            self.llm_cache_hits[agent] += 1
+            session["llm_cache_hits"] += 1
+            return None
+        usage = llm_response.usage_metadata
+        if usage is not None:
+            prompt = usage.prompt_token_count or 0
+            completion = usage.candidates_token_count or 0
+            self.llm_tokens[(agent, "prompt")] += prompt
+            self.llm_tokens[(agent, "completion")] += completion
+            session["prompt_tokens"] += prompt
+            session["completion_tokens"] += completion
+        return None
+
+    def _finish_tool(self, tool_name: str, tool_context) -> None:
+        key = (tool_context.invocation_id, tool_context.function_call_id or tool_name)
+        started = self._tool_starts.pop(key, None)
+        if started is not None:
+            self.tool_latency[tool_name].observe(time.perf_counter() - started)
 
     # -------------------------------
     # Summary (for prininting and saving)
     # -------------------------------
-    def summary(self) -> str:
+    def _session_record(self, session_id: str) -> Dict[str, Any]:
+        """Merge the session with its scratch sessions (`<id>_map<n>`, `<id>_foresee`)."""
+        merged = _new_session_record()
+        for sid in (session_id, *self._scratch_sessions.get(session_id, ())):
+            record = self.sessions.get(sid)
+            if record is None:
+                continue
+            for key, value in record.items():
+                if key == "phases":
+                    for phase, seconds in value.items():
+                        merged["phases"][phase] += seconds
+                elif key == "foresee_used":
+                    merged[key] = merged[key] or value
+                elif key == "retrieved_papers":
+                    merged[key] = max(merged[key], value)
+                else:
+                    merged[key] += value
+        return merged
+
+    def summary(self, session_id: str) -> str:
+        record = self._session_record(session_id)
+        phases = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in record["phases"].items())
         return (
             f" Metric Summary:\n"
-            f"- Keyword refinement turns: {self.data.get('keywords_turns', 0)}\n"
-            f"- Retrieved papers: {self.data.get('retrieved_papers', 0)}\n"
-            f"- Foresee agent used: {'yes' if self.used_foresee else 'no'}"
-
+            f"- Keyword refinement turns: {record['keywords_turns']}\n"
+            f"- Retrieved papers: {record['retrieved_papers']}\n"
+            f"- Foresee agent used: {'yes' if record['foresee_used'] else 'no'}\n"
+            f"- Agent time per phase: {phases or 'n/a'}\n"
+            f"- LLM calls: {record['llm_calls']} ({record['llm_cache_hits']} from cache, "
+            f"{record['prompt_tokens']} prompt / {record['completion_tokens']} completion tokens)"
         )
 
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        stats: Dict[str, Dict[str, Any]] = {}
+        search_cache = get_search_cache()
+        if search_cache is not None:
+            stats["arxiv_search"] = search_cache.stats()
+        llm_cache = get_llm_cache()
+        if llm_cache is not None:
+            stats["llm"] = llm_cache.stats()
+        stats["arxiv_prefetch"] = prefetch_stats()
+        return stats
+
     def to_dict(self, session_id: str) -> Dict[str, Any]:
+        record = self._session_record(session_id)
         return {
             "session_id": session_id,
-            "tempstamp": datetime.utcnow().isoformat(),
-            "keywords_turns": self.data.get("keywords_turns", 0),
-            "retrieved_papers": self.data.get("retrieved_papers", 0),
-            "foresee_used": self.used_foresee,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "phases_seconds": {name: round(seconds, 6) for name, seconds in record["phases"].items()},
+            "keywords_turns": record["keywords_turns"],
+            "retrieved_papers": record["retrieved_papers"],
+            "foresee_used": record["foresee_used"],
+            "llm_calls": record["llm_calls"],
+            "llm_cache_hits": record["llm_cache_hits"],
+            "prompt_tokens": record["prompt_tokens"],
+            "completion_tokens": record["completion_tokens"],
+            "tool_calls": record["tool_calls"],
+            "tool_errors": record["tool_errors"],
+            "tool_latency": {name: hist.to_dict() for name, hist in self.tool_latency.items()},
+            "caches": self.cache_stats(),
+            "arxiv_client": arxiv_client_stats(),
         }
 
     def persist(self, session_id: str, path: str = "metrics.jsonl") -> None:
-        record = self.do_dict(session_id)
+        record = self.to_dict(session_id)
         with open(path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(record, ensure_ascii=False) + "\n")
\ No newline at end of file
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    # -------------------------------
+    # Prometheus text export
+    # -------------------------------
+    def to_prometheus(self) -> str:
+        lines: List[str] = []
+
+        def histogram(metric: str, help_text: str, label: str, hists: Dict[str, LatencyHistogram]) -> None:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} histogram")
+            for value, hist in sorted(hists.items()):
+                for bound, n in zip(hist.BUCKETS, hist.bucket_counts):
+                    lines.append(f'{metric}_bucket{{{label}="{value}",le="{bound}"}} {n}')
+                lines.append(f'{metric}_bucket{{{label}="{value}",le="+Inf"}} {hist.count}')
+                lines.append(f'{metric}_sum{{{label}="{value}"}} {hist.sum:.6f}')
+                lines.append(f'{metric}_count{{{label}="{value}"}} {hist.count}')
+
+        histogram("research_assistant_phase_seconds", "Agent time per orchestrator phase.", "phase", self.phase_latency)
+        histogram("research_assistant_tool_latency_seconds", "Tool call latency.", "tool", self.tool_latency)
+        histogram("research_assistant_llm_latency_seconds", "LLM call latency.", "agent", self.llm_latency)
+
+        lines.append("# HELP research_assistant_llm_calls_total LLM calls per agent.")
+        lines.append("# TYPE research_assistant_llm_calls_total counter")
+        for agent, n in sorted(self.llm_calls.items()):
+            lines.append(f'research_assistant_llm_calls_total{{agent="{agent}"}} {n}')
+
+        lines.append("# HELP research_assistant_llm_cache_hits_total LLM calls answered from the response cache.")
+        lines.append("# TYPE research_assistant_llm_cache_hits_total counter")
+        for agent, n in sorted(self.llm_cache_hits.items()):
+            lines.append(f'research_assistant_llm_cache_hits_total{{agent="{agent}"}} {n}')
+
+        lines.append("# HELP research_assistant_llm_tokens_total LLM tokens per agent.")
+        lines.append("# TYPE research_assistant_llm_tokens_total counter")
+        for (agent, kind), n in sorted(self.llm_tokens.items()):
+            lines.append(f'research_assistant_llm_tokens_total{{agent="{agent}",kind="{kind}"}} {n}')
+
+        lines.append("# HELP research_assistant_tool_errors_total Failed tool calls.")
+        lines.append("# TYPE research_assistant_tool_errors_total counter")
+        for tool, n in sorted(self.tool_errors.items()):
+            lines.append(f'research_assistant_tool_errors_total{{tool="{tool}"}} {n}')
+
+        # Each metric family must be one contiguous block in the text format.
+        cache_stats = sorted(self.cache_stats().items())
+        lines.append("# HELP research_assistant_cache_requests_total Cache lookups by result.")
+        lines.append("# TYPE research_assistant_cache_requests_total counter")
+        for cache, stats in cache_stats:
+            lines.append(f'research_assistant_cache_requests_total{{cache="{cache}",result="hit"}} {stats["hits"]}')
+            lines.append(f'research_assistant_cache_requests_total{{cache="{cache}",result="miss"}} {stats["misses"]}')
+        lines.append("# HELP research_assistant_cache_hit_ratio Cache hit ratio since start.")
+        lines.append("# TYPE research_assistant_cache_hit_ratio gauge")
+        for cache, stats in cache_stats:
+            lines.append(f'research_assistant_cache_hit_ratio{{cache="{cache}"}} {stats["hit_rate"]:.6f}')
+
+        arxiv_stats = arxiv_client_stats()
+        log_stats = log_pipeline_stats()
+        for name, kind, help_text, value in (
+            ("arxiv_requests_total", "counter", "HTTP requests sent to the arXiv API.", arxiv_stats["requests"]),
+            ("arxiv_retries_total", "counter", "arXiv requests retried after an error or throttling.", arxiv_stats["retries"]),
+            ("arxiv_coalesced_total", "counter", "arXiv page requests served by an identical request in flight.", arxiv_stats["coalesced"]),
+            ("arxiv_rate_limit_wait_seconds_total", "counter", "Time spent waiting for the shared arXiv rate limiter.", arxiv_stats["wait_seconds"]),
+            ("arxiv_queue_depth", "gauge", "Requests currently waiting for the arXiv rate limiter.", arxiv_stats["queue_depth"]),
+            ("arxiv_max_queue_depth", "gauge", "Most requests ever waiting for the arXiv rate limiter at once.", arxiv_stats["max_queue_depth"]),
+            ("log_records_dropped_total", "counter", "Log records dropped because the log queue was full.", log_stats["dropped"]),
+            ("log_records_sampled_out_total", "counter", "Log records below WARNING skipped by sampling.", log_stats["sampled_out"]),
+            ("log_queue_depth", "gauge", "Log records waiting to be written.", log_stats["queued"]),
+        ):
+            lines.append(f"# HELP research_assistant_{name} {help_text}")
+            lines.append(f"# TYPE research_assistant_{name} {kind}")
+            lines.append(f"research_assistant_{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str = "metrics.prom") -> None:
+        """Write the metrics atomically, so a textfile collector never reads a partial file."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
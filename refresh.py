@@ -0,0 +1,121 @@
+from typing import List
+import argparse
+import asyncio
+import json
+import logging
+
+from core.query_planner import plan_for_session
+from core.topic_refresh import format_watermark, refresh_topic
+from core.topic_store import get_topic_store
+from main import (
+    APP_NAME,
+    build_runners,
+    configure_api_key,
+    create_logging_plugin,
+    create_model,
+    create_session_service,
+    setup_logging,
+)
+
+
+# ============================================================================
+# Commands
+# ============================================================================
+async def refresh_topics(names: List[str], analyze: bool = True) -> None:
+    """Refresh each topic in `names` in turn, sharing one model and session service."""
+    store = get_topic_store()
+    session_service = None
+    foresee_runner = None
+    if analyze:
+        configure_api_key()
+        session_service = create_session_service()
+        runners = build_runners(
+            create_model(), session_service, [create_logging_plugin()]
+        )
+        foresee_runner = runners["foresee_runner"]
+
+    for name in names:
+        result = await refresh_topic(
+            store,
+            name,
+            session_service=session_service,
+            foresee_runner=foresee_runner,
+            app_name=APP_NAME,
+        )
+        if result["summary"]:
+            print(f"\n🦉 {name} > {result['summary']}\n")
+        print(f"[refresh] {json.dumps({k: v for k, v in result.items() if k != 'summary'})}")
+
+
+def list_topics() -> None:
+    topics = get_topic_store().list_topics()
+    if not topics:
+        print("No saved topics. Add one with: python -m refresh subscribe NAME KEYWORD [KEYWORD ...]")
+    for topic in topics:
+        print(
+            f"- {topic['name']}: {', '.join(topic['keywords'])} "
+            f"({topic['papers']} papers, newest {format_watermark(topic['watermark']) or 'never refreshed'})"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Saved research topics, refreshed incrementally.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    subscribe = sub.add_parser("subscribe", help="save a topic and its keywords")
+    subscribe.add_argument("name")
+    subscribe.add_argument("keywords", nargs="+")
+    subscribe.add_argument("--category", action="append", dest="categories", help="e.g. cs.LG (repeatable)")
+    subscribe.add_argument("--from", dest="from_date", help="e.g. 2023 or 2023-05-17")
+    subscribe.add_argument("--to", dest="to_date")
+
+    sub.add_parser("list", help="list saved topics")
+
+    show = sub.add_parser("show", help="print a topic's latest analysis")
+    show.add_argument("name")
+
+    remove = sub.add_parser("remove", help="delete a saved topic")
+    remove.add_argument("name")
+
+    refresh = sub.add_parser("refresh", help="fetch new papers and update the analysis")
+    refresh.add_argument("names", nargs="*", help="topics to refresh (default: all)")
+    refresh.add_argument("--no-analysis", action="store_true", help="only fetch and store new papers")
+    args = parser.parse_args()
+
+    store = get_topic_store()
+    if args.command == "subscribe":
+        constraints = {
+            key: value
+            for key, value in (("categories", args.categories), ("from_date", args.from_date), ("to_date", args.to_date))
+            if value
+        }
+        try:
+            # Check the constraints now rather than at the first refresh.
+            plan = plan_for_session(args.keywords, constraints)
+        except ValueError as exc:
+            parser.error(str(exc))
+        store.subscribe(args.name, args.keywords, constraints)
+        print(f"[refresh] saved topic {args.name}: {plan.query}")
+    elif args.command == "list":
+        list_topics()
+    elif args.command == "show":
+        topic = store.get(args.name)
+        if topic is None:
+            parser.error(f"unknown topic: {args.name}")
+        print(topic["summary"] or "(not analyzed yet)")
+    elif args.command == "remove":
+        if not store.remove(args.name):
+            parser.error(f"unknown topic: {args.name}")
+        print(f"[refresh] removed topic {args.name}")
+    else:
+        names = args.names or [topic["name"] for topic in store.list_topics()]
+        unknown = [name for name in names if store.get(name) is None]
+        if unknown:
+            parser.error(f"unknown topic(s): {', '.join(unknown)}")
+        setup_logging()
+        logging.getLogger("research_assistant").info("Refreshing topics: %s", names)
+        asyncio.run(refresh_topics(names, analyze=not args.no_analysis))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+from typing import Optional, Dict, Any
+from contextlib import suppress
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import secrets
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route, WebSocketRoute
+from starlette.websockets import WebSocket, WebSocketDisconnect
+import uvicorn
+
+from agents.retrieval_agent import cancel_retrieval
+from core import config
+from core.orchestrator import new_session_id, run_orchestrator_session
+from main import (
+    APP_NAME,
+    build_runners,
+    configure_api_key,
+    create_logging_plugin,
+    create_metrics_plugin,
+    create_model,
+    create_session_service,
+    setup_logging,
+)
+
+
+logger = logging.getLogger("research_assistant.server")
+
+# Put on a connection's input queue when the client goes away.
+_CLOSED = object()
+
+
+def sign_user(secret: bytes, user_id: str) -> str:
+    """Token for `user_id`: the id and its HMAC-SHA256 under the server's secret."""
+    digest = hmac.new(secret, user_id.encode("utf-8"), hashlib.sha256).hexdigest()
+    return f"{user_id}.{digest}"
+
+
+def verify_token(secret: bytes, token: str) -> Optional[str]:
+    """The user id a token was issued for, or None if it was not signed with `secret`."""
+    user_id, _, _ = token.rpartition(".")
+    if user_id and hmac.compare_digest(sign_user(secret, user_id), token):
+        return user_id
+    return None
+
+
+def _parse_input(raw: str) -> Dict[str, str]:
+    """Accept `{"type": "input", "text": ...}` and `{"type": "cancel"}` messages as well as plain text."""
+    with suppress(ValueError):
+        message = json.loads(raw)
+        if isinstance(message, dict):
+            return {"type": str(message.get("type") or "input"), "text": str(message.get("text") or "")}
+    return {"type": "input", "text": raw}
+
+
+# ============================================================================
+# Connection
+# ============================================================================
+class Connection:
+    """
+    One WebSocket client and the orchestrator session it drives.
+
+    The session's `output_fn` / `input_fn` are `output` / `ask`. Messages in
+    both directions go through bounded queues: a client that stops reading
+    makes `output` fail (ending the session) instead of growing memory, and
+    `ask` waits until everything sent so far was delivered before prompting
+    again, so a session never runs ahead of a slow client. A `cancel`
+    message stops the session's running retrieval early.
+    """
+
+    def __init__(self, websocket: WebSocket, queue_size: int, input_timeout: float):
+        self.websocket = websocket
+        self.input_timeout = input_timeout
+        self.session_id: Optional[str] = None
+        self.outgoing: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.incoming: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    def send(self, message: Dict[str, Any]) -> None:
+        try:
+            self.outgoing.put_nowait(message)
+        except asyncio.QueueFull:
+            raise RuntimeError("client is not reading its messages") from None
+
+    def output(self, text: str) -> None:
+        self.send({"type": "output", "text": text})
+
+    async def ask(self, prompt: str) -> str:
+        # "exit" ends the session at any prompt (see orchestrator.QUIT_ANSWERS).
+        await self.outgoing.join()
+        self.send({"type": "prompt", "text": prompt})
+        try:
+            answer = await asyncio.wait_for(self.incoming.get(), timeout=self.input_timeout)
+        except asyncio.TimeoutError:
+            self.output("⌛ No answer received, ending the session.")
+            return "exit"
+        return "exit" if answer is _CLOSED else answer
+
+    def cancel(self) -> None:
+        """Stop the session's running retrieval, keeping the papers fetched so far."""
+        if self.session_id and cancel_retrieval(self.session_id):
+            self.output("⏹️ Stopping the retrieval; the papers fetched so far are kept.")
+        else:
+            self.send({"type": "error", "message": "no retrieval is running"})
+
+    async def send_loop(self) -> None:
+        while True:
+            message = await self.outgoing.get()
+            try:
+                await self.websocket.send_json(message)
+            finally:
+                self.outgoing.task_done()
+
+    async def receive_loop(self) -> None:
+        """Queue the client's answers until it disconnects."""
+        try:
+            while True:
+                message = _parse_input(await self.websocket.receive_text())
+                if message["type"] == "cancel":
+                    self.cancel()
+                    continue
+                try:
+                    self.incoming.put_nowait(message["text"])
+                except asyncio.QueueFull:
+                    self.send({"type": "error", "message": "too many unanswered messages; this one was dropped"})
+        except WebSocketDisconnect:
+            pass
+        finally:
+            with suppress(asyncio.QueueFull):
+                self.incoming.put_nowait(_CLOSED)
+
+
+# ============================================================================
+# Service
+# ============================================================================
+class ResearchService:
+    """
+    Runs research sessions for many WebSocket clients in one process.
+
+    All sessions share one model (and with it one pooled HTTP client), one
+    session service and one set of runners; each connection gets its own
+    session under the user id of its token. Tokens are issued by the server
+    and signed with `secret` (a random one per process by default), so a
+    client can only resume its own sessions. At most `max_sessions` sessions
+    run at once. Further clients are told their place in the queue and
+    wait, and beyond `max_waiting` waiting clients new connections are
+    turned away.
+    """
+
+    def __init__(
+        self,
+        model,
+        session_service,
+        max_sessions: int = 16,
+        max_waiting: int = 64,
+        queue_size: int = 256,
+        input_timeout: float = 15 * 60,
+        secret: Optional[bytes] = None,
+    ):
+        self.session_service = session_service
+        self.secret = secret or secrets.token_bytes(32)
+        self.metrics = create_metrics_plugin()
+        self.runners = build_runners(model, session_service, [create_logging_plugin(), self.metrics])
+        self.max_sessions = max_sessions
+        self.max_waiting = max_waiting
+        self.queue_size = queue_size
+        self.input_timeout = input_timeout
+        self._slots = asyncio.Semaphore(max(1, max_sessions))
+        self.active = 0
+        self.waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def issue_token(self) -> Dict[str, str]:
+        """Create a new user and the token it connects with."""
+        user_id = f"user_{secrets.token_hex(8)}"
+        return {"user_id": user_id, "token": sign_user(self.secret, user_id)}
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "active_sessions": self.active,
+            "waiting_sessions": self.waiting,
+            "max_sessions": self.max_sessions,
+            "completed_sessions": self.completed,
+            "failed_sessions": self.failed,
+            "rejected_connections": self.rejected,
+        }
+
+    async def handle(self, websocket: WebSocket) -> None:
+        """Serve one client: wait for a free slot, then run its session to the end."""
+        await websocket.accept()
+        user_id = verify_token(self.secret, websocket.query_params.get("token", "").strip())
+        if user_id is None:
+            await websocket.send_json({"type": "error", "message": "connect with ?token=<token from POST /token>"})
+            await websocket.close(code=1008)
+            return
+        resume_session_id = websocket.query_params.get("resume", "").strip() or None
+        if resume_session_id and await self.session_service.get_session(
+            app_name=APP_NAME, user_id=user_id, session_id=resume_session_id
+        ) is None:
+            # Sessions are looked up per user, so another user's session is not found either.
+            await websocket.send_json({"type": "error", "message": f"session {resume_session_id} was not found"})
+            await websocket.close(code=1008)
+            return
+        if self.waiting >= self.max_waiting:
+            self.rejected += 1
+            await websocket.send_json({"type": "error", "message": "the server is busy, try again later"})
+            await websocket.close(code=1013)
+            return
+
+        connection = Connection(websocket, self.queue_size, self.input_timeout)
+        sender = asyncio.create_task(connection.send_loop())
+        receiver = asyncio.create_task(connection.receive_loop())
+        try:
+            if not await self._acquire_slot(connection, receiver):
+                return
+            try:
+                await self._run_session(connection, user_id, resume_session_id, sender, receiver)
+            finally:
+                self._slots.release()
+        finally:
+            for task in (sender, receiver):
+                task.cancel()
+            with suppress(Exception):
+                await websocket.close()
+
+    async def _acquire_slot(self, connection: Connection, receiver: asyncio.Task) -> bool:
+        """Wait for a session slot; False if the client left while waiting."""
+        if not self._slots.locked():
+            await self._slots.acquire()  # a free slot is taken without suspending
+            return True
+        connection.send({"type": "queued", "position": self.waiting + 1})
+        self.waiting += 1
+        acquire = asyncio.create_task(self._slots.acquire())
+        try:
+            await asyncio.wait({acquire, receiver}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            self.waiting -= 1
+        if acquire.done():
+            return True
+        acquire.cancel()
+        with suppress(asyncio.CancelledError):
+            await acquire
+        if not acquire.cancelled():
+            self._slots.release()
+        return False
+
+    async def _run_session(
+        self,
+        connection: Connection,
+        user_id: str,
+        resume_session_id: Optional[str],
+        sender: asyncio.Task,
+        receiver: asyncio.Task,
+    ) -> None:
+        self.active += 1
+        # Known before the session starts, so `cancel` messages can find its retrieval.
+        connection.session_id = resume_session_id or new_session_id()
+        session = asyncio.create_task(
+            run_orchestrator_session(
+                session_service=self.session_service,
+                app_name=APP_NAME,
+                user_id=user_id,
+                input_fn=connection.ask,
+                output_fn=connection.output,
+                resume_session_id=resume_session_id,
+                metrics=self.metrics,
+                session_id=connection.session_id,
+                **self.runners,
+            )
+        )
+        try:
+            # A client that disconnects (or cannot be written to) ends its session early.
+            await asyncio.wait({session, sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            if not session.done():
+                session.cancel()
+                with suppress(asyncio.CancelledError):
+                    await session
+                self.failed += 1
+                logger.info("Client %s left, session cancelled", user_id)
+                return
+            try:
+                session_id = session.result()
+            except Exception as exc:
+                self.failed += 1
+                logger.exception("Session for %s failed", user_id)
+                connection.send({"type": "error", "message": repr(exc)})
+            else:
+                self.completed += 1
+                if session_id and config.METRICS_JSONL_PATH:
+                    self.metrics.persist(session_id, config.METRICS_JSONL_PATH)
+                connection.send({
+                    "type": "done",
+                    "session_id": session_id,
+                    "summary": self.metrics.summary(session_id) if session_id else None,
+                })
+                if session_id:
+                    self.metrics.discard(session_id)
+            # Let the last messages reach the client before closing.
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(connection.outgoing.join(), timeout=5)
+        finally:
+            self.active -= 1
+
+
+def create_app(service: ResearchService) -> Starlette:
+    """
+    Starlette app: tokens from `POST /token`, sessions on `/ws?token=<token>`,
+    service counters on `/healthz`, Prometheus text on `/metrics`.
+    """
+
+    async def token(request: Request) -> JSONResponse:
+        return JSONResponse(service.issue_token())
+
+    async def healthz(request: Request) -> JSONResponse:
+        return JSONResponse({"status": "ok", **service.stats()})
+
+    async def metrics(request: Request) -> PlainTextResponse:
+        lines = [service.metrics.to_prometheus().rstrip("\n")]
+        for name, value in service.stats().items():
+            lines.append(f"# TYPE research_assistant_{name} gauge")
+            lines.append(f"research_assistant_{name} {value}")
+        return PlainTextResponse("\n".join(lines) + "\n")
+
+    return Starlette(
+        routes=[
+            Route("/token", token, methods=["POST"]),
+            WebSocketRoute("/ws", service.handle),
+            Route("/healthz", healthz),
+            Route("/metrics", metrics),
+        ]
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve research sessions to many users over WebSockets.")
+    parser.add_argument("--host", default=config.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=config.SERVER_PORT)
+    args = parser.parse_args()
+
+    configure_api_key()
+    setup_logging()
+    service = ResearchService(
+        model=create_model(),
+        session_service=create_session_service(),
+        max_sessions=config.SERVER_MAX_SESSIONS,
+        max_waiting=config.SERVER_MAX_WAITING,
+        queue_size=config.SERVER_QUEUE_SIZE,
+        input_timeout=config.SERVER_INPUT_TIMEOUT_SECONDS,
+        secret=config.SERVER_SECRET.encode("utf-8") or None,
+    )
+    print(f"[server] serving research sessions on ws://{args.host}:{args.port}/ws?token=<token from POST /token>")
+    uvicorn.run(create_app(service), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks.fake_arxiv import FakeArxivServer
+from benchmarks.fake_llm import FakeLlm
+from core import arxiv_cache
+from core import config
+from core import llm_cache
+from core import paper_store
+
+
+@pytest.fixture
+def settings():
+    """`core.config`, with every setting restored after the test."""
+    saved = {name: value for name, value in vars(config).items() if name.isupper()}
+    yield config
+    for name, value in saved.items():
+        setattr(config, name, value)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """A fresh paper store in `tmp_path`, used by everything that calls `get_paper_store()`."""
+    monkeypatch.setattr(config, "PAPER_STORE_PATH", str(tmp_path / "papers.sqlite3"))
+    monkeypatch.setattr(paper_store, "_paper_store", None)
+    return paper_store.get_paper_store()
+
+
+@pytest.fixture
+def caches(tmp_path, monkeypatch):
+    """Fresh arXiv search and LLM response caches in `tmp_path`, never the ones in `.cache/`."""
+    monkeypatch.setattr(config, "ARXIV_CACHE_PATH", str(tmp_path / "arxiv_search.sqlite3"))
+    monkeypatch.setattr(config, "LLM_CACHE_PATH", str(tmp_path / "llm_cache.sqlite3"))
+    monkeypatch.setattr(arxiv_cache, "_search_cache", None)
+    monkeypatch.setattr(llm_cache, "_llm_cache", None)
+
+
+@pytest.fixture
+def fake_arxiv(settings, caches, store):
+    """A local arXiv stand-in that all searches go to, without rate limiting."""
+    with FakeArxivServer() as server:
+        settings.ARXIV_API_URL = server.url
+        settings.ARXIV_DELAY_SECONDS = 0.0
+        yield server
+
+
+@pytest.fixture
+def offline(fake_arxiv, settings, tmp_path):
+    """Runners for whole sessions: a fake model, in-memory sessions, metrics and the arXiv stand-in."""
+    from google.adk.sessions import InMemorySessionService
+
+    from main import build_runners
+    from observability.metrics_plugin import MetricsPlugin
+
+    settings.FULLTEXT_CACHE_DIR = str(tmp_path / "fulltext")
+    settings.METRICS_JSONL_PATH = ""
+    settings.METRICS_PROM_PATH = ""
+    model = FakeLlm()
+    session_service = InMemorySessionService()
+    metrics = MetricsPlugin()
+    return SimpleNamespace(
+        model=model,
+        session_service=session_service,
+        metrics=metrics,
+        runners=build_runners(model, session_service, [metrics]),
+        arxiv=fake_arxiv,
+    )
@@ -0,0 +1,21 @@
+from typing import Iterable, Optional
+
+from core.papers import Paper
+
+
+def make_paper(
+    index: int,
+    title: str = "",
+    abstract: str = "",
+    authors: Iterable[str] = ("Ada Lovelace",),
+    published: Optional[int] = None,
+) -> Paper:
+    """A paper with a deterministic arXiv id, `2401.<index>v1`."""
+    return Paper(
+        f"http://arxiv.org/abs/2401.{index:05d}v1",
+        title or f"Paper {index}",
+        authors,
+        published,
+        abstract or f"Abstract of paper {index}.",
+        f"http://arxiv.org/pdf/2401.{index:05d}v1",
+    )
@@ -0,0 +1,21 @@
+from core.arxiv_cache import ArxivSearchCache, get_search_cache
+from tests.helpers import make_paper
+
+
+def test_search_keys_ignore_case_and_spacing():
+    key = ArxivSearchCache.make_key("Graph  Neural Networks", 10, "relevance", "descending")
+    assert key == ArxivSearchCache.make_key("graph neural networks", 10, "relevance", "descending")
+    assert key != ArxivSearchCache.make_key("graph neural networks", 20, "relevance", "descending")
+
+
+def test_cached_searches_come_back(caches, settings):
+    cache = get_search_cache()
+    assert cache is get_search_cache()
+    key = cache.make_key("graph", 1, "relevance", "descending")
+    cache.put(key, "graph", [make_paper(0).to_dict()])
+    assert cache.get(key) == [make_paper(0).to_dict()]
+
+
+def test_disabled_cache_is_none(caches, settings):
+    settings.ARXIV_CACHE_ENABLED = False
+    assert get_search_cache() is None
@@ -0,0 +1,86 @@
+import threading
+import time
+
+import pytest
+
+from core.arxiv_client import SingleFlight, TokenBucket
+
+
+# ============================================================================
+# TokenBucket
+# ============================================================================
+def test_bucket_allows_burst_then_paces():
+    bucket = TokenBucket(rate=20.0, burst=2)
+    waits = [bucket.acquire() for _ in range(4)]
+    assert waits[:2] == [0.0, 0.0]
+    # Past the burst, every caller waits about 1/rate for its token.
+    assert waits[2] == pytest.approx(0.05, abs=0.02)
+    assert waits[3] == pytest.approx(0.05, abs=0.02)
+    assert bucket.acquired == 4
+    assert bucket.waiting == 0
+
+
+def test_bucket_without_rate_never_waits():
+    bucket = TokenBucket(rate=0.0)
+    assert all(bucket.acquire() == 0.0 for _ in range(100))
+
+
+def test_bucket_is_shared_between_threads():
+    bucket = TokenBucket(rate=50.0, burst=1)
+    started = time.monotonic()
+    threads = [threading.Thread(target=bucket.acquire) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # One free token, then five paced at 20 ms.
+    assert time.monotonic() - started >= 0.09
+    assert bucket.max_waiting >= 1
+
+
+def test_bucket_configure_caps_saved_tokens():
+    bucket = TokenBucket(rate=10.0, burst=5)
+    bucket.configure(rate=10.0, burst=1)
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() > 0.0
+
+
+# ============================================================================
+# SingleFlight
+# ============================================================================
+def test_single_flight_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return "result"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("key", slow))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while flight.coalesced < 4:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert {value for value, _ in results} == {"result"}
+    assert flight.in_flight == 0
+
+
+def test_single_flight_shares_errors_and_forgets_the_key():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flight.do("key", fail)
+    # A finished call is not reused.
+    assert flight.do("key", lambda: 42) == (42, False)
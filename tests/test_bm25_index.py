@@ -0,0 +1,34 @@
+from core.bm25_index import BM25Index, rerank_papers
+from tests.helpers import make_paper
+
+
+def test_rerank_puts_the_best_match_first():
+    papers = [
+        make_paper(0, "Protein folding", "We study protein structure."),
+        make_paper(1, "Graph neural networks", "Message passing on graphs for molecules."),
+        make_paper(2, "Image classification", "Convolutional networks."),
+    ]
+    ranked = rerank_papers(papers, "graph neural molecules")
+    assert ranked[0].entry_id == papers[1].entry_id
+
+
+def test_ties_keep_the_original_order():
+    papers = [make_paper(i, f"Unrelated {i}", "Nothing in common.") for i in range(4)]
+    ranked = rerank_papers(papers, "quantum")
+    assert ranked.entry_ids() == [paper.entry_id for paper in papers]
+
+
+def test_title_matches_weigh_more_than_abstract_matches():
+    in_title = make_paper(0, "Transformers", "A model.")
+    in_abstract = make_paper(1, "A model", "Transformers.")
+    ranked = rerank_papers([in_abstract, in_title], "transformers")
+    assert ranked[0].entry_id == in_title.entry_id
+
+
+def test_index_grows_page_by_page():
+    index = BM25Index()
+    index.add([make_paper(0, "Graph networks")])
+    index.add([make_paper(1, "Graph graph networks")])
+    assert len(index) == 2
+    assert [paper.entry_id for paper, _ in index.search("graph", top_k=1)] == [make_paper(1).entry_id]
+    assert index.search("absent") == []
@@ -0,0 +1,61 @@
+from core.foresee_payload import build_foresee_payload, find_near_duplicates, minhash_signature
+from tests.helpers import make_paper
+
+
+ABSTRACT = (
+    "We propose a graph neural network for molecular property prediction that combines message "
+    "passing with attention over chemical substructures. The model learns representations of atoms "
+    "and bonds jointly, pools them hierarchically into fragment embeddings, and is pretrained on a "
+    "large unlabeled corpus of molecules with a contrastive objective. On standard benchmarks for "
+    "solubility, toxicity and binding affinity it improves accuracy over strong baselines while "
+    "using fewer parameters, and an ablation shows that the substructure attention accounts for "
+    "most of the gain. We release code and pretrained weights to support further research."
+)
+TOPICS = ["robot control", "protein folding", "speech recognition", "galaxy surveys", "crop yields",
+          "traffic forecasting", "code generation", "climate models", "music synthesis", "fraud detection"]
+
+
+# ============================================================================
+# MinHash / LSH
+# ============================================================================
+def test_signatures_are_deterministic():
+    assert minhash_signature(ABSTRACT) == minhash_signature(ABSTRACT)
+    assert len(minhash_signature(ABSTRACT, num_bins=32)) == 32
+
+
+def test_later_near_duplicates_are_found():
+    near_copy = ABSTRACT.replace("improves", "clearly improves")
+    other = "A study of reinforcement learning for robot control with sparse rewards in simulation."
+    assert find_near_duplicates([ABSTRACT, other, near_copy, ABSTRACT]) == {2, 3}
+
+
+def test_empty_texts_are_never_duplicates():
+    assert find_near_duplicates(["", "", ABSTRACT]) == set()
+
+
+# ============================================================================
+# Payload
+# ============================================================================
+def test_payload_drops_duplicates_and_uses_short_ids():
+    papers = [make_paper(0, abstract=ABSTRACT), make_paper(1, abstract=ABSTRACT), make_paper(2)]
+    payload = build_foresee_payload(papers, token_budget=0)
+    assert payload["dropped_duplicates"] == 1
+    assert [record["id"] for record in payload["papers"]] == ["2401.00000v1", "2401.00002v1"]
+
+
+def test_payload_respects_top_k_and_token_budget():
+    papers = [
+        make_paper(i, abstract=f"A new method for {topic}, tested on several datasets. " * 3)
+        for i, topic in enumerate(TOPICS)
+    ]
+    assert build_foresee_payload(papers, token_budget=0, top_k=3)["included"] == 3
+
+    payload = build_foresee_payload(papers, token_budget=150)
+    assert 0 < payload["included"] < len(papers)
+    assert payload["estimated_tokens"] <= 150
+    assert payload["omitted"] == len(papers) - payload["dropped_duplicates"] - payload["included"]
+
+
+def test_authors_are_shortened():
+    paper = make_paper(0, authors=["A", "B", "C", "D"])
+    assert build_foresee_payload([paper], token_budget=0)["papers"][0]["authors"] == "A, B, C, et al."
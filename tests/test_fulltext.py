@@ -0,0 +1,111 @@
+import pytest
+
+from benchmarks.fake_arxiv import synthetic_pdf
+from core import fulltext
+from core.arxiv_client import get_arxiv_access
+from core.fulltext import FullTextCache, extract_document, ingest_papers, read_section, section_titles, split_sections
+from core.papers import Paper
+from tests.helpers import make_paper
+
+pytestmark = pytest.mark.skipif(not fulltext.fulltext_available(), reason="needs pypdf")
+
+
+@pytest.fixture
+def pdfs(fake_arxiv, settings, tmp_path, monkeypatch):
+    """PDFs served by the arXiv stand-in, extracted in threads into a cache in `tmp_path`."""
+    settings.FULLTEXT_PDF_BASE_URL = fake_arxiv.pdf_url
+    settings.FULLTEXT_EXTRACT_WORKERS = 0
+    monkeypatch.setattr(fulltext, "_download_bucket", None)
+    return FullTextCache(str(tmp_path / "fulltext"))
+
+
+# ============================================================================
+# Sections
+# ============================================================================
+def test_split_sections_at_headings_and_drops_references():
+    text = "Title line\n\n1 Introduction\nWe study things.\n\n2. Method\nWe do it.\n\nReferences\n[1] Someone."
+    sections = split_sections(text)
+    assert [section["title"] for section in sections] == ["Front matter", "Introduction", "Method"]
+    assert sections[2]["chunks"] == ["We do it."]
+
+
+def test_split_sections_rejoins_hyphenated_words():
+    sections = split_sections("1 Introduction\nA well-known trans-\nformer model.")
+    assert sections[0]["chunks"] == ["A well-known transformer model."]
+
+
+def test_extract_document_reads_synthetic_pdf():
+    document = extract_document(synthetic_pdf("2401.00001v1"))
+    assert document["pages"] >= 1
+    titles = [section["title"] for section in document["sections"]]
+    assert titles[1:] == ["Introduction", "Related Work", "Method", "Experiments", "Conclusion"]
+    assert document["chars"] > 0
+
+
+# ============================================================================
+# Cache
+# ============================================================================
+def test_cache_shares_one_object_between_ids(tmp_path):
+    cache = FullTextCache(str(tmp_path))
+    document = {"pages": 1, "chars": 3, "sections": [{"title": "Method", "chunks": ["abc"]}]}
+    cache.put("2401.00001v1", "d" * 64, document)
+    cache.put("2401.00002v1", "d" * 64)
+    assert cache.get("2401.00002v1")["sections"] == document["sections"]
+    assert cache.contains("2401.00001v1")
+    assert not cache.contains("2401.00003v1")
+    assert len(list((tmp_path / "objects").rglob("*.json.gz"))) == 1
+
+
+# ============================================================================
+# Ingestion
+# ============================================================================
+def test_ingest_downloads_extracts_then_hits_cache(pdfs, fake_arxiv):
+    papers = [make_paper(i) for i in range(1, 4)]
+    first = ingest_papers(papers, cache=pdfs)
+    assert (first["downloaded"], first["extracted"], first["failed"]) == (3, 3, {})
+    assert fake_arxiv.pdf_requests == 3
+
+    again = ingest_papers(papers, cache=pdfs)
+    assert again["cached"] == 3
+    assert fake_arxiv.pdf_requests == 3
+    assert "Method" in section_titles(papers[0].entry_id, cache=pdfs)
+    assert read_section(papers[0].entry_id, "method", cache=pdfs)
+
+
+def test_ingest_reports_papers_without_pdf(pdfs, settings):
+    settings.FULLTEXT_PDF_BASE_URL = ""
+    paper = Paper("http://arxiv.org/abs/2401.00009v1", "No PDF", ["Ada Lovelace"], None, "Abstract.", None)
+    summary = ingest_papers([paper], cache=pdfs)
+    assert summary["failed"] == {paper.entry_id: "no PDF link"}
+
+
+# ============================================================================
+# Download rate limit
+# ============================================================================
+def test_mirror_downloads_are_not_rate_limited(pdfs):
+    assert fulltext.get_download_bucket() is None
+
+
+def test_arxiv_downloads_have_their_own_bucket(pdfs, settings):
+    settings.FULLTEXT_PDF_BASE_URL = ""
+    settings.FULLTEXT_DOWNLOAD_DELAY_SECONDS = 0.5
+    settings.FULLTEXT_DOWNLOAD_WORKERS = 3
+    bucket = fulltext.get_download_bucket()
+    assert bucket is not None and bucket is not get_arxiv_access().bucket
+    assert (bucket.rate, bucket.burst) == (2.0, 3)
+    assert fulltext.get_download_bucket() is bucket
+
+
+def test_arxiv_downloads_do_not_take_search_tokens(pdfs, fake_arxiv, settings):
+    settings.FULLTEXT_PDF_BASE_URL = ""
+    settings.FULLTEXT_DOWNLOAD_DELAY_SECONDS = 0.0
+    papers = [make_paper(i) for i in range(1, 3)]
+    for paper in papers:
+        paper.pdf_url = f"{fake_arxiv.pdf_url}/{fulltext.paper_key(paper.entry_id)}"
+    searches = get_arxiv_access().bucket.acquired
+
+    summary = ingest_papers(papers, cache=pdfs)
+
+    assert summary["downloaded"] == 2
+    assert fulltext.get_download_bucket().acquired == 2
+    assert get_arxiv_access().bucket.acquired == searches
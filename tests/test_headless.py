@@ -0,0 +1,37 @@
+import asyncio
+
+from core.headless import run_headless_session
+
+
+def _run(offline, topic="graph neural networks", **kwargs):
+    return asyncio.run(run_headless_session(
+        topic=topic,
+        session_service=offline.session_service,
+        runners=offline.runners,
+        app_name="agents",
+        user_id="tester",
+        metrics=offline.metrics,
+        **kwargs,
+    ))
+
+
+def test_session_runs_to_the_end(offline, settings):
+    settings.RETRIEVAL_MAX_RESULTS = 10
+    result = _run(offline)
+    assert result["status"] == "ok"
+    assert result["keywords"]
+    assert result["total_papers"] == 10
+    assert result["metrics"]["foresee_used"] is True
+
+
+def test_failed_session_keeps_its_id_and_metrics(offline, monkeypatch):
+    async def fail(*args, **kwargs):
+        raise RuntimeError("model is down")
+        yield
+
+    monkeypatch.setattr(type(offline.model), "generate_content_async", fail)
+    result = _run(offline)
+    assert result["status"] == "error"
+    assert "model is down" in result["error"]
+    assert result["session_id"]
+    assert "keywords" in result["metrics"]["phases_seconds"]
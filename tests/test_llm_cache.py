@@ -0,0 +1,86 @@
+import asyncio
+import threading
+
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from benchmarks.fake_llm import FakeLlm
+from core.llm_cache import CACHE_HIT_KEY, CachingLlm, LlmResponseCache, get_llm_cache
+
+
+def _request(text: str) -> LlmRequest:
+    return LlmRequest(model="fake-llm", contents=[types.Content(role="user", parts=[types.Part(text=text)])])
+
+
+def _generate(model, request):
+    async def collect():
+        return [response async for response in model.generate_content_async(request)]
+
+    return asyncio.run(collect())
+
+
+def test_keys_cover_agent_and_request_but_not_call_ids():
+    assert LlmResponseCache.make_key("a", _request("x")) == LlmResponseCache.make_key("a", _request("x"))
+    assert LlmResponseCache.make_key("a", _request("x")) != LlmResponseCache.make_key("b", _request("x"))
+    assert LlmResponseCache.make_key("a", _request("x")) != LlmResponseCache.make_key("a", _request("y"))
+
+    def with_call(call_id):
+        request = _request("x")
+        call = types.FunctionCall(id=call_id, name="tool", args={})
+        request.contents.append(types.Content(role="model", parts=[types.Part(function_call=call)]))
+        return request
+
+    assert LlmResponseCache.make_key("a", with_call("1")) == LlmResponseCache.make_key("a", with_call("2"))
+
+
+def test_repeated_requests_are_replayed(caches, settings):
+    inner = FakeLlm()
+    model = CachingLlm(model=inner.model, inner=inner, agent_name="foresee_agent")
+    first = _generate(model, _request("graph neural networks"))
+    second = _generate(model, _request("graph neural networks"))
+
+    assert inner.calls == 1
+    assert [response.content for response in second] == [response.content for response in first]
+    assert second[0].custom_metadata[CACHE_HIT_KEY] is True
+    assert get_llm_cache().stats()["hits"] == 1
+
+
+def test_errors_are_not_cached(caches, settings):
+    class FailingLlm(FakeLlm):
+        async def generate_content_async(self, llm_request, stream=False):
+            self.calls += 1
+            yield LlmResponse(error_code="RESOURCE_EXHAUSTED", error_message="quota")
+
+    inner = FailingLlm()
+    model = CachingLlm(model=inner.model, inner=inner, agent_name="foresee_agent")
+    _generate(model, _request("x"))
+    _generate(model, _request("x"))
+    assert inner.calls == 2
+
+
+def test_cache_io_stays_off_the_event_loop(caches, settings):
+    cache = get_llm_cache()
+    threads = []
+    for name in ("get", "put"):
+        method = getattr(cache, name)
+
+        def record(*args, _method=method):
+            threads.append(threading.get_ident())
+            return _method(*args)
+
+        setattr(cache, name, record)
+
+    inner = FakeLlm()
+    _generate(CachingLlm(model=inner.model, inner=inner, agent_name="foresee_agent"), _request("x"))
+    assert len(threads) == 2
+    assert threading.get_ident() not in threads
+
+
+def test_disabled_cache_calls_the_model(caches, settings):
+    settings.LLM_CACHE_ENABLED = False
+    inner = FakeLlm()
+    model = CachingLlm(model=inner.model, inner=inner, agent_name="foresee_agent")
+    _generate(model, _request("x"))
+    _generate(model, _request("x"))
+    assert inner.calls == 2
@@ -0,0 +1,78 @@
+import json
+import logging
+import queue
+import sys
+
+import pytest
+
+from observability import log_pipeline
+from observability.log_pipeline import DroppingQueueHandler, JsonFormatter, SamplingFilter
+
+
+def _record(msg="hello %s", args=("world",), level=logging.INFO, name="test", **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_lines_carry_extra_fields():
+    line = JsonFormatter().format(_record(session_id="s1", papers=3))
+    data = json.loads(line)
+    assert data["message"] == "hello world"
+    assert data["level"] == "INFO"
+    assert (data["session_id"], data["papers"]) == ("s1", 3)
+
+
+def test_sampling_is_even_and_keeps_warnings():
+    sampler = SamplingFilter(0.25)
+    kept = [sampler.filter(_record()) for _ in range(100)]
+    assert sum(kept) == 25
+    assert sampler.sampled_out == 75
+    assert all(sampler.filter(_record(level=logging.WARNING)) for _ in range(10))
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    for _ in range(5):
+        handler.handle(_record())
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_queued_records_keep_the_traceback_apart():
+    handler = DroppingQueueHandler(queue.Queue())
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = _record()
+        record.exc_info = sys.exc_info()
+    prepared = handler.prepare(record)
+    assert (prepared.msg, prepared.args, prepared.exc_info) == ("hello world", None, None)
+    data = json.loads(JsonFormatter().format(prepared))
+    assert data["message"] == "hello world"
+    assert "ValueError: boom" in data["exc_info"]
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """A fresh pipeline on the root logger, shut down (and the root level restored) afterwards."""
+    for name in ("_listener", "_handler", "_sampler"):
+        monkeypatch.setattr(log_pipeline, name, None)
+    root = logging.getLogger()
+    level = root.level
+    yield log_pipeline
+    log_pipeline.shutdown_logging()
+    root.setLevel(level)
+
+
+def test_records_are_written_to_the_file(pipeline, tmp_path):
+    path = tmp_path / "logs" / "app.jsonl"
+    pipeline.configure_logging(str(path), sample_rate=1.0)
+    logging.getLogger("test.pipeline").info("ingested %d papers", 4, extra={"seconds": 1.5})
+    pipeline.shutdown_logging()
+
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    record = next(line for line in lines if line["logger"] == "test.pipeline")
+    assert record["message"] == "ingested 4 papers"
+    assert record["seconds"] == 1.5
+    assert pipeline.log_stats()["dropped"] == 0
@@ -0,0 +1,24 @@
+import os
+import signal
+import threading
+
+import pytest
+
+from agents import retrieval_agent
+from main import interrupt_stops_retrieval
+
+
+def test_ctrl_c_stops_a_running_retrieval(monkeypatch):
+    event = threading.Event()
+    monkeypatch.setitem(retrieval_agent._cancel_events, "s1", event)
+    with interrupt_stops_retrieval("s1"):
+        os.kill(os.getpid(), signal.SIGINT)
+    assert event.is_set()
+
+
+def test_ctrl_c_interrupts_when_nothing_is_retrieved():
+    previous = signal.getsignal(signal.SIGINT)
+    with pytest.raises(KeyboardInterrupt):
+        with interrupt_stops_retrieval("s1"):
+            os.kill(os.getpid(), signal.SIGINT)
+    assert signal.getsignal(signal.SIGINT) is previous
@@ -0,0 +1,66 @@
+from observability.metrics_plugin import MetricsPlugin
+
+
+def test_map_sessions_are_merged_into_their_session(caches):
+    metrics = MetricsPlugin(max_sessions=10)
+    metrics.on_keywords_turn("s1")
+    metrics.on_retrieval_result("s1_map0", {"total": 30}, 0.1)
+    metrics.on_retrieval_result("s1_map1", {"total": 20}, 0.1)
+    metrics.mark_foresee_used("s1_map1")
+    metrics.on_keywords_turn("s10")
+
+    record = metrics.to_dict("s1")
+    assert record["keywords_turns"] == 1
+    assert record["tool_calls"] == 2
+    assert record["retrieved_papers"] == 30
+    assert record["foresee_used"] is True
+
+
+def test_discard_drops_the_session_and_its_map_sessions():
+    metrics = MetricsPlugin(max_sessions=10)
+    for sid in ("s1", "s1_map0", "s2"):
+        metrics.on_keywords_turn(sid)
+    metrics.discard("s1")
+    assert list(metrics.sessions) == ["s2"]
+    assert "s1" not in metrics._scratch_sessions
+
+
+def test_least_recently_updated_sessions_are_evicted():
+    metrics = MetricsPlugin(max_sessions=2)
+    metrics.on_keywords_turn("a")
+    metrics.on_keywords_turn("b")
+    metrics.on_keywords_turn("a")
+    metrics.on_keywords_turn("c")
+    assert list(metrics.sessions) == ["a", "c"]
+
+
+def test_prometheus_families_are_contiguous(caches):
+    metrics = MetricsPlugin(max_sessions=10)
+    with metrics.phase("s1", "retrieval"):
+        pass
+    metrics.on_retrieval_result("s1", {"total": 3}, 0.2)
+
+    families = []
+    for line in metrics.to_prometheus().splitlines():
+        if line.startswith("# TYPE "):
+            families.append(line.split()[2])
+        elif not line.startswith("#"):
+            # Every sample follows the TYPE line of its own family.
+            assert line.split("{")[0].split(" ")[0].startswith(families[-1])
+    assert len(families) == len(set(families))
+    assert "research_assistant_cache_hit_ratio" in families
+
+
+def test_speculative_foresee_sessions_are_merged_into_their_session():
+    metrics = MetricsPlugin(max_sessions=10)
+    metrics.on_keywords_turn("s1")
+    metrics.mark_foresee_used("s1_foresee")
+    metrics.on_retrieval_result("s1_foresee_map0", {"total": 5}, 0.1)
+    metrics.add_phase("s1", "foresee", 2.0)
+
+    record = metrics.to_dict("s1")
+    assert record["foresee_used"] is True
+    assert record["retrieved_papers"] == 5
+    assert record["phases_seconds"]["foresee"] == 2.0
+    metrics.discard("s1")
+    assert not metrics.sessions
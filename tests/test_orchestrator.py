@@ -0,0 +1,102 @@
+import asyncio
+
+from core.headless import auto_confirm_input
+from core.orchestrator import run_orchestrator_session
+from core.paper_store import session_paper_ids
+
+FORESEE_AUTHORS = {"foresee_agent", "foresee_reduce_agent"}
+
+
+def _run(offline, run_foresee=True, think_seconds=0.0):
+    """Run a scripted session; the user waits `think_seconds` at the foresee prompt."""
+    respond = auto_confirm_input("graph neural networks", run_foresee=run_foresee)
+
+    async def input_fn(prompt):
+        if prompt.startswith("Press Enter"):
+            await asyncio.sleep(think_seconds)
+        return await respond(prompt)
+
+    async def main():
+        transcript = []
+        session_id = await run_orchestrator_session(
+            session_service=offline.session_service,
+            app_name="agents",
+            user_id="tester",
+            input_fn=input_fn,
+            output_fn=transcript.append,
+            metrics=offline.metrics,
+            **offline.runners,
+        )
+        session = await offline.session_service.get_session(
+            app_name="agents", user_id="tester", session_id=session_id
+        )
+        scratch = await offline.session_service.get_session(
+            app_name="agents", user_id="tester", session_id=f"{session_id}_foresee"
+        )
+        return session, scratch, transcript
+
+    return asyncio.run(main())
+
+
+# ============================================================================
+# Retrieval fast path
+# ============================================================================
+def test_fast_path_retrieves_without_the_retrieval_agent(offline, settings):
+    settings.RETRIEVAL_FAST_PATH = True
+    settings.RETRIEVAL_MAX_RESULTS = 10
+    session, _, transcript = _run(offline, run_foresee=False)
+
+    assert len(session_paper_ids(session.state)) == 10
+    retrieval_events = [event for event in session.events if event.author == "retrieval_agent"]
+    # One committed event with the rendered list, and no model call of the retrieval agent.
+    assert len(retrieval_events) == 1
+    assert not retrieval_events[0].get_function_calls()
+    assert any("Retrieval Agent >" in line for line in transcript)
+
+
+def test_agent_retrieval_when_fast_path_is_off(offline, settings):
+    settings.RETRIEVAL_FAST_PATH = False
+    settings.RETRIEVAL_MAX_RESULTS = 10
+    session, _, _ = _run(offline, run_foresee=False)
+
+    assert len(session_paper_ids(session.state)) == 10
+    calls = [
+        call.name
+        for event in session.events if event.author == "retrieval_agent"
+        for call in event.get_function_calls()
+    ]
+    assert "retrieve_papers" in calls
+
+
+# ============================================================================
+# Speculative foresee
+# ============================================================================
+def test_skipped_speculative_foresee_leaves_no_trace(offline, settings):
+    settings.SPECULATIVE_FORESEE = True
+    settings.RETRIEVAL_MAX_RESULTS = 10
+    # Give the background run time to finish before the user skips.
+    session, scratch, _ = _run(offline, run_foresee=False, think_seconds=0.3)
+
+    assert not [event for event in session.events if event.author in FORESEE_AUTHORS]
+    assert scratch is None
+    phases = offline.metrics.to_dict(session.id)["phases_seconds"]
+    assert "foresee" not in phases
+    assert "foresee_wait" not in phases
+
+
+def test_continued_speculative_foresee_is_added_to_the_session(offline, settings):
+    settings.SPECULATIVE_FORESEE = True
+    settings.RETRIEVAL_MAX_RESULTS = 10
+    session, scratch, transcript = _run(offline, run_foresee=True, think_seconds=0.3)
+
+    assert [event for event in session.events if event.author in FORESEE_AUTHORS]
+    # The foresee prompt is committed too, as after a run in the session itself.
+    assert any(
+        event.author == "user" and "get_retrieved_papers" in event.content.parts[0].text
+        for event in session.events
+    )
+    assert scratch is None
+    assert any("Foresee Agent" in line for line in transcript)
+    phases = offline.metrics.to_dict(session.id)["phases_seconds"]
+    assert phases["foresee"] > 0
+    assert "foresee_wait" in phases
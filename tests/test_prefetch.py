@@ -0,0 +1,132 @@
+import threading
+
+from core.prefetch import Prefetcher
+from tests.helpers import make_paper
+
+
+def _search(query, max_results, cancel_event):
+    return [[make_paper(i, title=query)] for i in range(max_results)]
+
+
+def _papers(pages):
+    return [paper for page in pages for paper in page]
+
+
+def test_take_returns_the_prefetched_result():
+    prefetcher = Prefetcher(_search)
+    assert prefetcher.prefetch("s1", {"k1": ("graph", 3)}) == ["graph"]
+    papers = _papers(prefetcher.take("k1"))
+    assert [paper.title for paper in papers] == ["graph"] * 3
+    assert prefetcher.stats()["hits"] == 1
+    # Claimed once; the next lookup is a miss.
+    assert prefetcher.take("k1") is None
+    assert prefetcher.stats()["sessions"] == 0
+
+
+def test_running_jobs_are_not_restarted():
+    prefetcher = Prefetcher(_search)
+    prefetcher.prefetch("s1", {"k1": ("graph", 1)})
+    assert prefetcher.prefetch("s1", {"k1": ("graph", 1)}) == []
+    assert prefetcher.stats()["started"] == 1
+
+
+def test_pages_are_handed_over_as_they_arrive():
+    release = threading.Event()
+
+    def slow(query, max_results, cancel_event):
+        yield [make_paper(0)]
+        release.wait(5)
+        yield [make_paper(1)]
+
+    prefetcher = Prefetcher(slow)
+    prefetcher.prefetch("s1", {"k1": ("graph", 2)})
+    pages = prefetcher.take("k1")
+    # The first page comes while the job is still waiting for the second.
+    assert next(pages)[0].entry_id == make_paper(0).entry_id
+    release.set()
+    assert next(pages)[0].entry_id == make_paper(1).entry_id
+    assert next(pages, None) is None
+
+
+def test_closing_the_pages_stops_the_job():
+    first_page = threading.Event()
+    stopped = threading.Event()
+
+    def endless(query, max_results, cancel_event):
+        while not cancel_event.is_set():
+            yield [make_paper(0)]
+            first_page.set()
+            cancel_event.wait(0.01)
+        stopped.set()
+
+    prefetcher = Prefetcher(endless)
+    prefetcher.prefetch("s1", {"k1": ("graph", 1)})
+    pages = prefetcher.take("k1")
+    first_page.wait(5)
+    next(pages)
+    pages.close()
+    assert stopped.wait(5)
+
+
+def test_dropped_keywords_are_cancelled():
+    release = threading.Event()
+    cancelled = []
+
+    def blocking(query, max_results, cancel_event):
+        release.wait(5)
+        if cancel_event.is_set():
+            cancelled.append(query)
+        return []
+
+    prefetcher = Prefetcher(blocking, max_workers=2)
+    prefetcher.prefetch("s1", {"k1": ("graph", 1), "k2": ("protein", 1)})
+    prefetcher.prefetch("s1", {"k2": ("protein", 1)})
+    release.set()
+    assert prefetcher.take("k1") is None
+    assert prefetcher.stats()["cancelled"] == 1
+    assert _papers(prefetcher.take("k2")) == []
+    assert cancelled == ["graph"]
+
+
+def test_cancel_session_leaves_nothing_behind():
+    prefetcher = Prefetcher(_search)
+    prefetcher.prefetch("s1", {"k1": ("graph", 1), "k2": ("protein", 1)})
+    prefetcher.prefetch("s2", {"k3": ("rna", 1)})
+    assert prefetcher.cancel_session("s1") == 2
+    stats = prefetcher.stats()
+    assert stats["in_flight"] == 1
+    assert stats["sessions"] == 1
+    assert prefetcher.cancel_session("s2") == 1
+    assert prefetcher.stats()["sessions"] == 0
+    assert prefetcher.cancel_session("unknown") == 0
+
+
+def test_failed_search_is_run_again_by_the_caller():
+    gate = threading.Event()
+    calls = []
+
+    def flaky(query, max_results, cancel_event):
+        calls.append(threading.current_thread().name)
+        if len(calls) == 1:
+            gate.wait(5)
+            raise RuntimeError("arXiv is down")
+        return [[make_paper(0)]]
+
+    prefetcher = Prefetcher(flaky)
+    prefetcher.prefetch("s1", {"k1": ("graph", 1)})
+    pages = prefetcher.take("k1")
+    gate.set()
+    assert len(_papers(pages)) == 1
+    assert calls[0].startswith("prefetch")
+    assert calls[1] == threading.current_thread().name
+
+
+def test_search_that_already_failed_is_a_miss():
+    def failing(query, max_results, cancel_event):
+        raise RuntimeError("arXiv is down")
+
+    prefetcher = Prefetcher(failing)
+    prefetcher.prefetch("s1", {"k1": ("graph", 1)})
+    prefetcher._jobs["k1"].future.result(timeout=5)
+    assert prefetcher.take("k1") is None
+    assert prefetcher.stats()["misses"] == 1
@@ -0,0 +1,64 @@
+import pytest
+
+from core.query_planner import plan_for_session, plan_query
+
+
+def test_keywords_are_scoped_and_quoted():
+    plan = plan_query(["graph neural networks", "protein"], fields=["ti", "abs"], match="any")
+    assert plan.query == '(ti:"graph neural networks" OR abs:"graph neural networks") OR (ti:protein OR abs:protein)'
+    assert plan.keyword_queries == [
+        '(ti:"graph neural networks" OR abs:"graph neural networks")',
+        "(ti:protein OR abs:protein)",
+    ]
+
+
+def test_match_all_ands_the_keywords():
+    assert plan_query(["a", "b"], fields=[], match="all").query == "a AND b"
+
+
+def test_prefixed_keywords_are_kept_and_categories_become_filters():
+    plan = plan_query(["au:hinton", "cat:cs.LG", "AND", ""], categories=["stat.ML"], fields=["ti"])
+    assert plan.query == "au:hinton AND (cat:stat.ML OR cat:cs.LG)"
+
+
+def test_syntax_characters_are_stripped():
+    assert plan_query(['"deep" (learning)'], fields=[]).query == "deep learning"
+
+
+def test_date_range_covers_whole_periods():
+    plan = plan_query(["x"], fields=[], from_date="2023-02", to_date="2024")
+    assert plan.query == "x AND submittedDate:[202302010000 TO 202412312359]"
+    assert plan_query(["x"], fields=[], to_date="2024-02").filters == ["submittedDate:[190001010000 TO 202402292359]"]
+
+
+@pytest.mark.parametrize("value", ["2023-13", "2023-00", "2023-02-30", "2023-04-31", "May 2023", "0000"])
+def test_invalid_dates_are_rejected(value):
+    with pytest.raises(ValueError):
+        plan_query(["x"], from_date=value)
+
+
+def test_reversed_range_is_rejected():
+    with pytest.raises(ValueError):
+        plan_query(["x"], from_date="2024", to_date="2023-12")
+
+
+def test_filters_alone_make_a_query():
+    plan = plan_query([], categories=["cs.LG"])
+    assert plan.query == "cat:cs.LG"
+    assert plan.keyword_queries == ["cat:cs.LG"]
+
+
+def test_session_constraints_and_default_categories(settings):
+    settings.QUERY_FIELDS = []
+    settings.QUERY_CATEGORIES = ["q-bio.BM"]
+    assert plan_for_session(["x"]).query == "x AND cat:q-bio.BM"
+    assert plan_for_session(["x"], {"categories": ["cs.LG"], "from_date": "2022"}).query == (
+        "x AND cat:cs.LG AND submittedDate:[202201010000 TO 299912312359]"
+    )
+
+
+def test_plan_explains_itself():
+    plan = plan_query(["a", "b"], categories=["cs.LG"], fields=["ti"], match="any")
+    assert plan.to_dict()["query"] == plan.query
+    assert any("cs.LG" in note for note in plan.notes)
+    assert plan.explain().startswith(f"Query: {plan.query}")
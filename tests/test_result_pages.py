@@ -0,0 +1,79 @@
+import pytest
+
+from core.paper_store import save_session_papers
+from core.papers import short_authors
+from core.result_pages import (
+    describe_results,
+    page_results,
+    paper_details,
+    resolve_paper_id,
+    result_handle,
+    short_id,
+)
+from tests.helpers import make_paper
+
+
+@pytest.fixture
+def state(store, settings):
+    settings.RESULT_PAGE_SIZE = 4
+    settings.RESULT_PAGE_MAX = 6
+    settings.RESULT_DETAILS_MAX = 2
+    state = {}
+    save_session_papers(state, [make_paper(i) for i in range(10)])
+    return state
+
+
+def test_short_id():
+    assert short_id("http://arxiv.org/abs/2401.01234v2") == "2401.01234v2"
+
+
+def test_short_authors():
+    assert short_authors(["A", "B", "C"]) == "A, B, C"
+    assert short_authors(["A", "B", "C", "D"]) == "A, B, C, et al."
+    assert make_paper(1, authors=("A", "B", "C", "D")).short_authors(limit=1) == "A, et al."
+
+
+def test_handle_is_stable_and_follows_the_results():
+    ids = ["a", "b"]
+    assert result_handle(ids) == result_handle(list(ids))
+    assert result_handle(ids) != result_handle(["b", "a"])
+    assert result_handle(ids).startswith("res-")
+
+
+def test_describe_results_is_bounded(state):
+    described = describe_results(state, "query", top_n=3)
+    assert described["total"] == 10
+    assert [paper["id"] for paper in described["top"]] == ["2401.00000v1", "2401.00001v1", "2401.00002v1"]
+    assert described["next_offset"] == 3
+
+
+def test_pages_default_to_the_configured_size_and_are_capped(state):
+    handle = describe_results(state)["handle"]
+    first = page_results(state, handle)
+    assert len(first["papers"]) == 4
+    assert first["next_offset"] == 4
+    capped = page_results(state, handle, offset=4, limit=100)
+    assert len(capped["papers"]) == 6
+    assert capped["next_offset"] is None
+
+
+def test_stale_handles_are_rejected(state):
+    handle = describe_results(state)["handle"]
+    save_session_papers(state, [make_paper(99)])
+    result = page_results(state, handle)
+    assert result["status"] == "error"
+    assert result_handle(state["retrieved_paper_ids"]) in result["error"]
+
+
+def test_ids_resolve_in_every_form(state):
+    entry_id = make_paper(3).entry_id
+    for paper_id in (entry_id, "2401.00003v1", "2401.00003", " 2401.00003v1 "):
+        assert resolve_paper_id(state, paper_id) == entry_id
+    assert resolve_paper_id(state, "9999.99999") is None
+
+
+def test_details_are_capped_per_call(state):
+    result = paper_details(state, ["2401.00001", "2401.00001", "nope", "2401.00002"])
+    assert [paper["id"] for paper in result["papers"]] == ["2401.00001v1"]
+    assert result["not_found"] == ["nope"]
+    assert result["skipped"] == ["2401.00002"]
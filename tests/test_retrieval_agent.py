@@ -0,0 +1,137 @@
+from datetime import datetime
+import asyncio
+import re
+
+import pytest
+
+from agents.retrieval_agent import (
+    _reciprocal_rank_fusion,
+    cancel_retrieval,
+    fetch_papers,
+    fetch_since,
+    prefetch_keywords,
+    prefetch_stats,
+)
+from benchmarks.fake_arxiv import FakeArxivServer, render_feed, synthetic_entry
+from tests.helpers import make_paper
+
+
+# ============================================================================
+# Reciprocal-rank fusion
+# ============================================================================
+def test_fusion_deduplicates_and_favours_shared_papers():
+    a, b, c, d = (make_paper(i) for i in range(4))
+    merged = _reciprocal_rank_fusion([[a, b, c], [d, b]])
+    assert merged[0].entry_id == b.entry_id
+    assert sorted(paper.entry_id for paper in merged) == sorted(paper.entry_id for paper in (a, b, c, d))
+
+
+def test_fusion_of_one_list_keeps_its_order():
+    papers = [make_paper(i) for i in range(5)]
+    assert _reciprocal_rank_fusion([papers]) == papers
+
+
+# ============================================================================
+# fetch_papers
+# ============================================================================
+def test_papers_are_fetched_and_ids_kept_in_state(fake_arxiv, settings):
+    settings.RETRIEVAL_MAX_RESULTS = 25
+    settings.ARXIV_PAGE_SIZE = 10
+    state = {}
+    result = asyncio.run(fetch_papers(state, "s1", ["graph"]))
+    assert result["total"] == 25
+    assert len(state["retrieved_paper_ids"]) == 25
+
+
+
+def test_streamed_ids_are_written_to_state_once(fake_arxiv, settings):
+    class CountingState(dict):
+        writes = 0
+
+        def __setitem__(self, key, value):
+            if key == "retrieved_paper_ids" and value:
+                CountingState.writes += 1
+            super().__setitem__(key, value)
+
+    settings.RETRIEVAL_MAX_RESULTS = 50
+    settings.ARXIV_PAGE_SIZE = 5
+    state = CountingState()
+    assert asyncio.run(fetch_papers(state, "s1", ["graph"]))["total"] == 50
+    assert CountingState.writes == 1
+    assert len(state["retrieved_paper_ids"]) == 50
+
+
+@pytest.mark.parametrize("mode", ["single", "fanout"])
+def test_cancelled_retrieval_keeps_what_was_fetched(fake_arxiv, settings, mode):
+    settings.RETRIEVAL_MODE = mode
+    settings.RETRIEVAL_MAX_RESULTS = settings.FANOUT_RESULTS_PER_KEYWORD = 100
+    settings.ARXIV_PAGE_SIZE = 10
+    fake_arxiv.latency = 0.05
+
+    async def run():
+        fetch = asyncio.create_task(fetch_papers(state, "s1", ["graph"]))
+        while fake_arxiv.requests < 2:
+            await asyncio.sleep(0.01)
+        assert cancel_retrieval("s1")
+        return await fetch
+
+    state = {}
+    result = asyncio.run(run())
+    assert 0 < result["total"] < 100
+    assert len(state["retrieved_paper_ids"]) == result["total"]
+    assert not cancel_retrieval("s1")
+
+
+
+def test_prefetch_in_flight_is_streamed_and_can_be_cancelled(fake_arxiv, settings):
+    settings.RETRIEVAL_MAX_RESULTS = 100
+    settings.ARXIV_PAGE_SIZE = 10
+    fake_arxiv.latency = 0.05
+    hits = prefetch_stats()["hits"]
+    requests_at_first_page = []
+
+    def progress(text):
+        if not requests_at_first_page:
+            requests_at_first_page.append(fake_arxiv.requests)
+            cancel_retrieval("s1")
+
+    assert prefetch_keywords("s1", ["graph"])
+    result = asyncio.run(fetch_papers({}, "s1", ["graph"], progress_fn=progress))
+    assert prefetch_stats()["hits"] == hits + 1
+    # The first page was shown long before the prefetch could have finished.
+    assert requests_at_first_page[0] < 10
+    assert result["total"] < 100
+
+
+@pytest.mark.parametrize("mode", ["single", "fanout"])
+def test_timeouts_become_an_error_result(fake_arxiv, settings, mode):
+    settings.RETRIEVAL_MODE = mode
+    settings.ARXIV_TIMEOUT_SECONDS = 0.05
+    fake_arxiv.latency = 0.5
+    result = asyncio.run(fetch_papers({}, "s1", ["graph", "protein"]))
+    assert result["total"] == 0
+    assert result["error"].startswith("arXiv request failed: request failed:")
+
+
+# ============================================================================
+# fetch_since
+# ============================================================================
+def _published(entry):
+    published = re.search(r"<published>(.*?)</published>", entry).group(1)
+    return int(datetime.fromisoformat(published.replace("Z", "+00:00")).timestamp())
+
+
+def test_refresh_pages_until_the_watermark(tmp_path, settings, caches):
+    # A feed sorted newest first, as arXiv answers a submittedDate query.
+    entries = sorted((synthetic_entry("topic", i) for i in range(40)), key=_published, reverse=True)
+    (tmp_path / "feed.xml").write_bytes(render_feed(entries, len(entries), 0, len(entries)))
+    watermark = _published(entries[30])
+    settings.ARXIV_DELAY_SECONDS = 0.0
+    settings.ARXIV_PAGE_SIZE = 10
+
+    with FakeArxivServer(feeds_dir=str(tmp_path)) as server:
+        settings.ARXIV_API_URL = server.url
+        # More new papers than max_results: none of them may be skipped.
+        papers = fetch_since(["topic"], watermark, max_results=10)
+        assert len(papers) == sum(_published(entry) >= watermark for entry in entries)
+        assert len(fetch_since(["topic"], None, max_results=10)) == 10
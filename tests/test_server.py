@@ -0,0 +1,97 @@
+import pytest
+from starlette.testclient import TestClient
+
+from server import ResearchService, create_app, sign_user, verify_token
+
+
+@pytest.fixture
+def client(offline):
+    service = ResearchService(model=offline.model, session_service=offline.session_service)
+    with TestClient(create_app(service)) as client:
+        yield client
+
+
+@pytest.fixture
+def token(client):
+    return client.post("/token").json()["token"]
+
+
+def _answer(prompt: str) -> str:
+    if prompt.startswith("You >"):
+        return "graph neural networks"
+    if "keyword refinement" in prompt:
+        return "Yes, I confirm these keywords."
+    return "exit"
+
+
+def _run_session(ws) -> dict:
+    """Answer every prompt until the session ends; returns the `done` message."""
+    while (message := ws.receive_json())["type"] != "done":
+        if message["type"] == "prompt":
+            ws.send_json({"type": "input", "text": _answer(message["text"])})
+    return message
+
+
+# ============================================================================
+# Tokens
+# ============================================================================
+def test_tokens_are_signed_for_their_user():
+    token = sign_user(b"secret", "user_1")
+    assert verify_token(b"secret", token) == "user_1"
+    assert verify_token(b"other", token) is None
+    assert verify_token(b"secret", token.replace("user_1", "user_2")) is None
+    assert verify_token(b"secret", "user_1") is None
+
+
+def test_connecting_needs_a_valid_token(client):
+    for query in ("", "?user_id=ada", "?token=user_1.0123"):
+        with client.websocket_connect(f"/ws{query}") as ws:
+            assert ws.receive_json()["type"] == "error"
+
+
+def test_resume_only_finds_the_users_own_sessions(client, settings):
+    settings.RETRIEVAL_MAX_RESULTS = 10
+    owner = client.post("/token").json()
+    with client.websocket_connect(f"/ws?token={owner['token']}") as ws:
+        session_id = _run_session(ws)["session_id"]
+    assert session_id
+
+    other = client.post("/token").json()
+    assert other["user_id"] != owner["user_id"]
+    with client.websocket_connect(f"/ws?token={other['token']}&resume={session_id}") as ws:
+        assert ws.receive_json() == {"type": "error", "message": f"session {session_id} was not found"}
+
+    with client.websocket_connect(f"/ws?token={owner['token']}&resume={session_id}") as ws:
+        assert _run_session(ws)["session_id"] == session_id
+
+
+# ============================================================================
+# Cancel
+# ============================================================================
+def test_cancel_stops_the_retrieval(client, token, offline, settings):
+    settings.RETRIEVAL_MAX_RESULTS = 100
+    settings.ARXIV_PAGE_SIZE = 10
+    offline.arxiv.latency = 0.05
+    outputs = []
+    with client.websocket_connect(f"/ws?token={token}") as ws:
+        while (message := ws.receive_json())["type"] != "done":
+            if message["type"] == "prompt":
+                ws.send_json({"type": "input", "text": _answer(message["text"])})
+            elif message["type"] == "output":
+                outputs.append(message["text"])
+                if message["text"].startswith("📥 Fetched 10/"):
+                    ws.send_json({"type": "cancel"})
+    assert any(text.startswith("⏹️ Stopping the retrieval") for text in outputs)
+    fetched = [text for text in outputs if text.startswith("📥 Fetched")]
+    assert not fetched[-1].startswith("📥 Fetched 100/")
+
+
+def test_cancel_without_a_retrieval_is_an_error(client, token):
+    with client.websocket_connect(f"/ws?token={token}") as ws:
+        while ws.receive_json()["type"] != "prompt":
+            pass
+        ws.send_json({"type": "cancel"})
+        assert ws.receive_json() == {"type": "error", "message": "no retrieval is running"}
+        ws.send_text("exit")
+        while ws.receive_json()["type"] != "done":
+            pass
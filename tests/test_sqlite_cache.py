@@ -0,0 +1,45 @@
+import time
+
+from core.sqlite_cache import SqliteCache
+
+
+def test_round_trip_and_counters(tmp_path):
+    cache = SqliteCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=60, max_entries=10)
+    assert cache.get("k") is None
+    cache.put("k", "label", {"papers": [1, 2]})
+    assert cache.get("k") == {"papers": [1, 2]}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_expired_entries_are_misses(tmp_path, monkeypatch):
+    cache = SqliteCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=10, max_entries=10)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now)
+    cache.put("k", "label", 1)
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    assert cache.get("k") is None
+    assert cache.stats()["expired"] == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    cache = SqliteCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=0, max_entries=2)
+    clock = iter(range(1000, 2000))
+    monkeypatch.setattr(time, "time", lambda: next(clock))
+    cache.put("a", "a", 1)
+    cache.put("b", "b", 2)
+    cache.get("a")  # "b" is now the least recently used
+    cache.put("c", "c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_survive_a_reopen(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    SqliteCache(path, ttl_seconds=60, max_entries=10).put("k", "label", [1])
+    assert SqliteCache(path, ttl_seconds=60, max_entries=10).get("k") == [1]
+
@@ -0,0 +1,66 @@
+import sqlite3
+
+from core.topic_store import TopicStore
+from tests.helpers import make_paper
+
+
+def test_subscribe_keeps_papers_and_updates_keywords(tmp_path):
+    store = TopicStore(str(tmp_path / "topics.sqlite3"))
+    store.subscribe("gnn", ["graph neural networks"], {"categories": ["cs.LG"], "from_date": "2023"})
+    store.add_papers("gnn", [make_paper(0, published=100)])
+    store.subscribe("gnn", ["gnn"])
+
+    topic = store.get("gnn")
+    assert topic["keywords"] == ["gnn"]
+    assert topic["constraints"] == {}
+    assert topic["papers"] == 1
+    assert topic["watermark"] == 100
+
+
+def test_only_new_papers_are_added_and_the_watermark_never_moves_back(tmp_path):
+    store = TopicStore(str(tmp_path / "topics.sqlite3"))
+    store.subscribe("gnn", ["gnn"])
+    assert store.add_papers("gnn", [make_paper(0, published=200), make_paper(1, published=100)]) == [
+        make_paper(0).entry_id,
+        make_paper(1).entry_id,
+    ]
+    assert store.add_papers("gnn", [make_paper(1, published=100), make_paper(2)]) == [make_paper(2).entry_id]
+    assert store.get("gnn")["watermark"] == 200
+
+
+def test_only_covered_papers_are_marked_analyzed(tmp_path):
+    store = TopicStore(str(tmp_path / "topics.sqlite3"))
+    store.subscribe("gnn", ["gnn"])
+    store.add_papers("gnn", [make_paper(i, published=i) for i in range(4)])
+    assert store.pending_ids("gnn") == [make_paper(i).entry_id for i in (3, 2, 1, 0)]
+
+    store.mark_analyzed("gnn", [make_paper(3).entry_id, make_paper(2).entry_id], "summary")
+    assert store.pending_ids("gnn") == [make_paper(1).entry_id, make_paper(0).entry_id]
+    assert store.get("gnn")["summary"] == "summary"
+
+
+def test_remove_deletes_the_topic_and_its_papers(tmp_path):
+    store = TopicStore(str(tmp_path / "topics.sqlite3"))
+    store.subscribe("gnn", ["gnn"])
+    store.add_papers("gnn", [make_paper(0)])
+    assert store.remove("gnn") is True
+    assert store.remove("gnn") is False
+    assert store.list_topics() == []
+    assert store.pending_ids("gnn") == []
+
+
+def test_stores_without_constraints_are_migrated(tmp_path):
+    path = str(tmp_path / "topics.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE topics (name TEXT PRIMARY KEY, keywords TEXT NOT NULL, watermark INTEGER, "
+        "summary TEXT NOT NULL DEFAULT '', created_at REAL NOT NULL, refreshed_at REAL)"
+    )
+    conn.execute("INSERT INTO topics (name, keywords, created_at) VALUES ('old', '[\"x\"]', 0)")
+    conn.commit()
+    conn.close()
+
+    store = TopicStore(path)
+    assert store.get("old")["constraints"] == {}
+    store.subscribe("old", ["x"], {"categories": ["cs.LG"]})
+    assert store.get("old")["constraints"] == {"categories": ["cs.LG"]}
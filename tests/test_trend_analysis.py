@@ -0,0 +1,68 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from core.trend_analysis import analysis_available, analyze_papers, build_tfidf, minibatch_kmeans, rising_terms
+from tests.helpers import make_paper
+
+pytestmark = pytest.mark.skipif(not analysis_available(), reason="needs numpy and scipy")
+
+
+def _year(year: int) -> int:
+    return int(datetime(year, 6, 1, tzinfo=timezone.utc).timestamp())
+
+
+def _corpus():
+    """Two topics: protein papers throughout, diffusion papers only recently."""
+    papers = []
+    for i in range(12):
+        papers.append(make_paper(i, "Protein folding structure", "Protein structure prediction with folding models.",
+                                 published=_year(2018 + i % 4)))
+    for i in range(12, 24):
+        papers.append(make_paper(i, "Diffusion image generation", "Diffusion models generate images by denoising.",
+                                 published=_year(2022 + i % 2)))
+    return papers
+
+
+def test_tfidf_rows_are_normalized_and_rare_terms_dropped():
+    matrix, terms = build_tfidf(["graph neural network", "graph neural model", "protein"], min_df=2)
+    assert set(terms) == {"graph", "neural"}
+    norms = (matrix.multiply(matrix).sum(axis=1)).A.ravel()
+    assert norms[:2] == pytest.approx([1.0, 1.0])
+    assert norms[2] == 0
+
+
+def test_kmeans_separates_two_topics():
+    papers = _corpus()
+    matrix, _ = build_tfidf([f"{paper.title} {paper.abstract}" for paper in papers])
+    labels, centers = minibatch_kmeans(matrix, k=2)
+    assert centers.shape[0] == 2
+    assert len(set(labels[:12])) == 1 and len(set(labels[12:])) == 1
+    assert labels[0] != labels[12]
+
+
+def test_rising_terms_come_from_recent_papers():
+    papers = _corpus()
+    matrix, terms = build_tfidf([f"{paper.title} {paper.abstract}" for paper in papers])
+    rising, per_year = rising_terms(matrix, terms, [paper.year for paper in papers])
+    assert {"diffusion", "denoising"} <= {entry["term"] for entry in rising}
+    assert "protein" not in {entry["term"] for entry in rising}
+    assert per_year["2023"] == 6
+
+
+def test_rising_terms_need_more_than_one_year():
+    matrix, terms = build_tfidf(["a graph", "a graph"], min_df=1)
+    assert rising_terms(matrix, terms, [2024, 2024]) == ([], {"2024": 2})
+
+
+def test_analysis_has_a_bounded_size():
+    result = analyze_papers(_corpus(), max_clusters=2, representatives=2)
+    assert result["status"] == "success"
+    assert result["total"] == 24
+    assert sum(cluster["size"] for cluster in result["clusters"]) == 24
+    assert all(len(cluster["representative_papers"]) <= 2 for cluster in result["clusters"])
+    assert result["clusters"][0]["years"]
+
+
+def test_empty_corpus():
+    assert analyze_papers([])["status"] == "empty"